@@ -0,0 +1,276 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# The rendering is measured without a display.
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+
+from engine.engines import ENGINES, create_engine
+from gui.game_grid import GameGrid
+from model.gol_model import GOLModel
+from utils import pattern
+from utils.config import config
+from utils.pattern_library import library
+from utils.utils import np_to_qimage
+
+# Version of the results format.
+RESULTS_VERSION = 1
+# Folder of the results, one JSON file per run.
+RESULTS_DIR = Path(__file__).parent.resolve() / "results"
+
+# The grid sizes measured by default: the configured one up to 8k x 8k.
+DEFAULT_SIZES = [tuple(config.GRID_SIZE), (1024, 1024), (2048, 2048), (4096, 4096), (8192, 8192)]
+QUICK_SIZES = [tuple(config.GRID_SIZE), (1024, 1024)]
+# Maximum number of calls of a measure.
+MAX_CALLS = 2 ** 24
+# Density of the alive cells of the random soups.
+SOUP_DENSITY = 0.35
+# Maximum cells of the random soups stepped by each engine. HashLife is designed for regular patterns: a soup has
+# little repetition and makes it build huge quadtrees.
+SOUP_CELL_LIMITS = {"hashlife": 1024 * 1024}
+# Size of the widget that draws the grid in the render benchmark.
+RENDER_WIDGET_SIZE = (1000, 600)
+# Number of different frames drawn by the render benchmark.
+RENDER_FRAMES = 10
+# The workloads drawn by the render benchmark: a soup, which changes everywhere, and a gun, which changes a small region.
+RENDER_WORKLOADS = ("soup", "gosperglidergun")
+
+
+def measure(func, min_time: float, max_calls: int = MAX_CALLS) -> tuple:
+    """
+    Call a function repeatedly, doubling the calls until they last at least the given time.
+    :param func: The function to measure, which takes the number of calls to do.
+    :param min_time: The minimum duration of the measure in seconds.
+    :param max_calls: The maximum number of calls, reached before the minimum duration by the functions whose time
+    does not grow with the calls, such as HashLife that skips generations exponentially.
+    :return: The number of calls and the elapsed time in seconds.
+    """
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        func(calls)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or calls >= max_calls:
+            return calls, elapsed
+        # Estimate the calls that fill the time, without growing too fast after a very short measure.
+        calls = calls * min(max(2, int(min_time / max(elapsed, 1e-9))), 16)
+
+
+def make_soup(size: tuple, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return (rng.random(size) < SOUP_DENSITY).astype(np.uint8)
+
+
+def get_workloads(size: tuple) -> list:
+    """
+    :param size: The size of the grid.
+    :return: The initial grids of the benchmarks as (name, grid): the bundled patterns that fit the grid, placed at
+    its center, and a random soup.
+    """
+    workloads = []
+    for name in library.get_names():
+        grid = pattern.place_pattern(library.get_pattern(name), size)
+        if grid is not None:
+            workloads.append((name, grid))
+    workloads.append(("soup", make_soup(size)))
+    return workloads
+
+
+def bench_stepping(engines: list, sizes: list, min_time: float) -> list:
+    """
+    Measure the generations per second of the engines, without the age of the cells as the headless mode.
+    """
+    results = []
+    for size in sizes:
+        for workload, grid in get_workloads(size):
+            for engine_name in engines:
+                if workload == "soup" and size[0] * size[1] > SOUP_CELL_LIMITS.get(engine_name, np.inf):
+                    continue
+                start = time.perf_counter()
+                engine = create_engine(engine_name, grid, track_age=False)
+                setup = time.perf_counter() - start
+                generations, elapsed = measure(engine.run, min_time)
+                if hasattr(engine, "close"):
+                    engine.close()
+                results.append(_result("step", engine=engine_name, size=size, workload=workload,
+                                       setup_seconds=setup, generations=generations, seconds=elapsed,
+                                       generations_per_second=generations / elapsed))
+                _report(results[-1], f"{generations / elapsed:.1f} generations/s")
+    return results
+
+
+def bench_pattern_io(sizes: list, min_time: float) -> list:
+    """
+    Measure the throughput of the pattern files written by save_pattern and read by read_pattern, in both formats.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for size in sizes:
+            for workload, grid in get_workloads(size):
+                for suffix in pattern.PATTERN_SUFFIXES:
+                    file_path = os.path.join(folder, "pattern" + suffix)
+                    writes, write_time = measure(lambda n: [pattern.save_pattern(file_path, grid) for _ in range(n)],
+                                                 min_time)
+                    reads, read_time = measure(lambda n: [pattern.read_pattern(file_path) for _ in range(n)],
+                                               min_time)
+                    file_size = os.path.getsize(file_path)
+                    results.append(_result("io", format=suffix[1:], size=size, workload=workload, file_bytes=file_size,
+                                           write_seconds=write_time / writes, read_seconds=read_time / reads,
+                                           write_cells_per_second=grid.size * writes / write_time,
+                                           read_cells_per_second=grid.size * reads / read_time))
+                    _report(results[-1], f"write {write_time / writes * 1000:.2f} ms, "
+                                         f"read {read_time / reads * 1000:.2f} ms, {file_size} bytes")
+    return results
+
+
+def bench_render(sizes: list, min_time: float) -> list:
+    """
+    Measure the time to draw a frame: the conversion of the grid into an image, and the update of the GameGrid widget
+    with the paint of the scaled pixmap.
+    """
+    application = QApplication.instance() or QApplication(sys.argv)
+    results = []
+    for size in sizes:
+        for workload, grid in get_workloads(size):
+            if workload not in RENDER_WORKLOADS:
+                continue
+            # Successive generations, so that every frame changes the grid as the running simulation does.
+            engine = create_engine("bitpacked", grid)
+            frames = []
+            for _ in range(RENDER_FRAMES):
+                engine.step()
+                frames.append(engine.get_grid())
+
+            for show_age in (False, True):
+                calls, elapsed = measure(lambda n: [np_to_qimage(frames[i % RENDER_FRAMES], show_age)
+                                                    for i in range(n)], min_time)
+                results.append(_result("render_image", size=size, workload=workload, show_age=show_age,
+                                       frame_seconds=elapsed / calls))
+                _report(results[-1], f"{elapsed / calls * 1000:.2f} ms/frame")
+
+                model = GOLModel()
+                model.set_grid_size(*size)
+                model.set_show_age(show_age)
+                game_grid = GameGrid(model)
+                game_grid.resize(*RENDER_WIDGET_SIZE)
+
+                def draw(n):
+                    for i in range(n):
+                        # The model takes the ownership of the grid, so it's given a copy.
+                        model.set_grid_state(frames[i % RENDER_FRAMES].copy())
+                        game_grid.grab()
+
+                calls, elapsed = measure(draw, min_time)
+                results.append(_result("render_widget", size=size, workload=workload, show_age=show_age,
+                                       frame_seconds=elapsed / calls))
+                _report(results[-1], f"{elapsed / calls * 1000:.2f} ms/frame")
+                game_grid.deleteLater()
+                application.processEvents()
+    return results
+
+
+def compare_results(results: list, previous: list) -> None:
+    """
+    Print the ratio between the timings of two runs, for the benchmarks found in both.
+    """
+    previous_by_key = {_key(result): result for result in previous}
+    for result in results:
+        old = previous_by_key.get(_key(result))
+        if old is None:
+            continue
+        if result["benchmark"] == "step":
+            ratio = result["generations_per_second"] / old["generations_per_second"]
+        elif result["benchmark"] == "io":
+            ratio = (old["write_seconds"] + old["read_seconds"]) / (result["write_seconds"] + result["read_seconds"])
+        else:
+            ratio = old["frame_seconds"] / result["frame_seconds"]
+        print(f"{_describe(result)}: {ratio:.2f}x {'faster' if ratio >= 1 else 'slower'}")
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the speed of the engines, of the pattern files and of the "
+                                                 "rendering, and save the results in JSON.")
+    parser.add_argument("-b", "--benchmarks", nargs="+", choices=["step", "io", "render"],
+                        default=["step", "io", "render"], help="Benchmarks to run.")
+    parser.add_argument("-e", "--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES),
+                        help="Engines measured by the step benchmark.")
+    parser.add_argument("-s", "--sizes", nargs="+", type=_parse_size, metavar="ROWSxCOLUMNS",
+                        help="Grid sizes, by default from the configured one up to 8192x8192.")
+    parser.add_argument("-t", "--min-time", type=float, default=0.5,
+                        help="Minimum duration of each measure in seconds.")
+    parser.add_argument("-q", "--quick", action="store_true",
+                        help="Measure only the small grid sizes, with shorter measures.")
+    parser.add_argument("-o", "--output", help="JSON file of the results, by default a new file in "
+                                               f"{RESULTS_DIR}.")
+    parser.add_argument("-c", "--compare", help="JSON file of a previous run to compare with.")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    min_time = min(args.min_time, 0.1) if args.quick else args.min_time
+
+    results = []
+    if "step" in args.benchmarks:
+        results += bench_stepping(args.engines, sizes, min_time)
+    if "io" in args.benchmarks:
+        results += bench_pattern_io(sizes, min_time)
+    if "render" in args.benchmarks:
+        results += bench_render(sizes, min_time)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"version": RESULTS_VERSION, "date": datetime.now().isoformat(timespec="seconds"),
+                   "machine": {"platform": platform.platform(), "processor": platform.processor(),
+                               "cpus": os.cpu_count(), "python": platform.python_version(), "numpy": np.__version__},
+                   "min_time": min_time, "results": results}, f, indent=1)
+    print(f"Results saved in {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare_results(results, json.load(f)["results"])
+    return 0
+
+
+def _result(benchmark: str, size: tuple, **fields) -> dict:
+    return dict(benchmark=benchmark, size=list(size), **fields)
+
+
+def _key(result: dict) -> tuple:
+    """
+    :return: The fields that identify a benchmark, to match the results of different runs.
+    """
+    return (result["benchmark"], tuple(result["size"]), result["workload"], result.get("engine"),
+            result.get("format"), result.get("show_age"))
+
+
+def _describe(result: dict) -> str:
+    names = [result["benchmark"], "x".join(map(str, result["size"])), result["workload"]]
+    names += [str(result[field]) for field in ("engine", "format") if field in result]
+    if "show_age" in result:
+        names.append("age" if result["show_age"] else "black and white")
+    return " ".join(names)
+
+
+def _report(result: dict, measure_text: str) -> None:
+    print(f"{_describe(result)}: {measure_text}", flush=True)
+
+
+def _parse_size(text: str) -> tuple:
+    try:
+        rows, cols = text.lower().split("x")
+        return int(rows), int(cols)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid size '{text}', expected ROWSxCOLUMNS")
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
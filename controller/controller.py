@@ -1,17 +1,27 @@
 import math
-import os
 import numpy as np
 
 from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QFileDialog, QApplication
-from scipy import ndimage
 
-from utils import pattern
+from controller.simulation_worker import SimulationWorker
+from engine.engines import create_engine
+from engine.hashlife_engine import HashLifeEngine
+from engine.rules import CONWAY, parse_rule
+from utils import checkpoint, pattern
+from utils.pattern_library import library
+from utils.profiler import timer
+from utils.run_recorder import RunRecorder
 from utils.config import config
 from gui.main_window import MainWindow
 from gui.info_dialog import InfoDialog
 from model.gol_model import GOLModel
 
+# Interval in milliseconds between two updates of the timings shown on the status bar.
+TIMINGS_INTERVAL = 500
+# Refresh rate of the screen, in Hz, used when the platform doesn't report it.
+DEFAULT_REFRESH_RATE = 60
+
 
 class Controller:
     """
@@ -27,21 +37,67 @@ class Controller:
         main_window.connect_to_button_play(self.start_stop)
         main_window.connect_to_button_save(self.save_pattern)
         main_window.connect_to_button_step(self.single_step)
+        main_window.connect_to_button_jump(self.jump_to_generation)
+        main_window.connect_to_button_run_until(self.run_until)
+        main_window.connect_to_spinbox_turbo(self.set_generations_per_frame)
         main_window.connect_to_combo_patterns(self.select_example_pattern)
+        main_window.connect_to_combo_rules(self.set_rule)
         main_window.connect_to_radio_age(self.toggle_show_cell_age)
         main_window.connect_to_slider_speed(self.set_speed)
+        main_window.connect_to_slider_timeline(self.rewind_to_generation)
         main_window.connect_to_dialog(self.display_info)
         main_window.game_grid.connect_to_cell_clicked(self.change_state)
 
-        # Timer for play pause action
-        self._timer = QTimer()
-        self._timer.timeout.connect(self.single_step)
-
         self._gol_model = gol_model
 
-        # Variables for the grid update
-        self._conv_filter = np.ones((3, 3))
-        self._conv_filter[1, 1] = 0
+        # Engine that computes the evolution of the grid. It holds the reference state of the grid, which is published
+        # to the model after every change.
+        self._engine = create_engine(config.ENGINE, self._gol_model.get_grid(), rule=self._gol_model.get_rule())
+        # Engine used to jump to a far generation, created on the first jump.
+        self._hashlife = None
+
+        # Recorder of the generations computed, to rewind the simulation. None if the recording is disabled.
+        self._recorder = RunRecorder(config.KEYFRAME_INTERVAL, config.RECORDING_MEMORY_MB, config.PATH_RECORDING,
+                                     config.RECORDING_DISK_MB, self._gol_model.get_rule()) \
+            if config.RECORDING_ENABLED else None
+        main_window.set_timeline_visible(self._recorder is not None)
+
+        # Worker thread that runs the simulation when play is pressed.
+        self._worker = SimulationWorker(self._engine, self._gol_model.get_fps(),
+                                        self._gol_model.get_generations_per_frame(), config.CYCLE_WINDOW,
+                                        config.PAUSE_ON_CYCLE, self._recorder)
+        self._worker.finished.connect(self._simulation_finished)
+        application.aboutToQuit.connect(self._worker.stop_simulation)
+        if self._recorder is not None:
+            application.aboutToQuit.connect(self._recorder.close)
+        # The time of the model when the simulation was started.
+        self._start_time = 0
+        # Flag that indicates if the cycle detected in the current run was shown.
+        self._cycle_reported = False
+
+        # Timer that shows the latest frame of the running simulation at the screen refresh rate.
+        self._frame_timer = QTimer()
+        # Some platforms report a refresh rate of 0, then the default rate is used.
+        refresh_rate = application.primaryScreen().refreshRate()
+        if refresh_rate <= 0:
+            refresh_rate = DEFAULT_REFRESH_RATE
+        self._frame_timer.setInterval(max(math.floor(1000 / refresh_rate), 1))
+        self._frame_timer.timeout.connect(self.show_latest_frame)
+
+        # Timer that shows the actual speed and the time of each phase of the frames while the simulation runs, if the
+        # phases are measured.
+        self._timings_timer = QTimer()
+        self._timings_timer.setInterval(TIMINGS_INTERVAL)
+        self._timings_timer.timeout.connect(self.show_timings)
+        main_window.set_timings_visible(timer.is_enabled())
+
+        # Checkpoint of the session written in background every few generations. It's deleted when the application is
+        # closed normally, so that it's found at the next start only if the session was interrupted.
+        self._autosaver = checkpoint.Autosaver(config.PATH_AUTOSAVE, config.AUTOSAVE_GENERATIONS)
+        self._gol_model.observe(self._autosave, GOLModel.STATS)
+        application.aboutToQuit.connect(self._autosaver.discard)
+        # Offer to resume an interrupted session once the main window is shown.
+        QTimer.singleShot(0, self._resume_interrupted_session)
 
     def clear_grid(self):
         """
@@ -49,64 +105,139 @@ class Controller:
         The initial state is the pattern chosen at the start of the simulation
         :return:
         """
-        self.select_example_pattern(self._gol_model.get_base_pattern())
+        with self._gol_model.batch():
+            self._engine.reset_time()
+            self._gol_model.reset_time()
+            self.select_example_pattern(self._gol_model.get_base_pattern())
         self._main_window.show_message_on_status_bar("Grid cleared")
-        self._gol_model.set_cells_count(0)
-        self._gol_model.reset_time()
 
     def load_custom_pattern(self):
         """
         Load a pattern from a chosen file into the current GOL state
         :return:
         """
-        file_path = QFileDialog.getOpenFileName(self._main_window,
-                                                "Load pattern ", filter="Pattern File (*.cells)")[0]
-        if file_path:
+        file_path = QFileDialog.getOpenFileName(self._main_window, "Load pattern ",
+                                                filter="Pattern File (*.cells *.rle);;Session Checkpoint (*.gol)")[0]
+        if not file_path:
+            return
+        if file_path.lower().endswith(checkpoint.CHECKPOINT_SUFFIX):
+            if self.load_checkpoint(file_path):
+                self._main_window.show_message_on_status_bar("Session restored")
+        else:
             self._main_window.reset_combo_patterns()
             if self.load_file(file_path):
                 self._main_window.show_message_on_status_bar("Pattern loaded")
 
     def load_file(self, file_path: str) -> bool:
         """
-        Method to load a pattern from a .cells file in plain text format
+        Method to load a pattern from a .cells file in plain text format or from a .rle file in run length encoded format
         :param file_path: Path of the pattern file.
         :return: False if the file is invalid or the pattern do not fit the current grid, otherwise True.
+        With an unbounded engine, a pattern bigger than the grid is loaded and only its center is shown.
         """
-        grid_pattern = pattern.read_pattern(file_path)
+        return self._load_grid_pattern(pattern.read_pattern(file_path))
 
+    def _load_grid_pattern(self, grid_pattern: np.ndarray) -> bool:
+        """
+        Load a pattern at the center of the grid.
+        :param grid_pattern: The pattern, None if it could not be read.
+        :return: False if the pattern is invalid or it does not fit the current grid, otherwise True.
+        """
         if grid_pattern is None:
             self._main_window.show_error_message("Invalid file")
             return False
+        # Check if the pattern fit in the grid. If not show an error. Unbounded engines accept any pattern.
+        elif not self._engine.load_pattern(grid_pattern):
+            self._main_window.show_error_message("The loaded pattern is bigger than the available grid")
+            return False
         else:
-            grid_height, grid_width = self._gol_model.get_grid_size()
-            pattern_height, pattern_width = grid_pattern.shape
-
-            # Check if the pattern fit in the grid. If not show an error.
-            if pattern_height > grid_height or pattern_width > grid_width:
-                self._main_window.show_error_message("The loaded pattern is bigger than the available grid")
-                return False
-            else:
-                # Copy the pattern at the center of a blank grid.
-                new_grid = np.zeros(self._gol_model.get_grid_size(), np.uint8)
-                v_margin = (grid_height - pattern_height) // 2
-                h_margin = (grid_width - pattern_width) // 2
-                new_grid[v_margin:v_margin + pattern_height, h_margin:h_margin + pattern_width] = grid_pattern
-
-                self._gol_model.set_grid_state(new_grid)
-                return True
+            self._publish_grid()
+            return True
 
     def save_pattern(self):
         """
-        Save the current grid state in a .cells file as a reloadable state
+        Save the current grid state in a .cells or .rle file as a reloadable state, or the whole session with the cell
+        ages and the settings in a .gol checkpoint
         :return:
         """
-        file_path = QFileDialog.getSaveFileName(self._main_window,
-                                                "Save pattern ", filter="Pattern File (*.cells)")[0]
-        print("filepath:"+file_path)
+        file_path, file_filter = QFileDialog.getSaveFileName(
+            self._main_window, "Save pattern ",
+            filter="Plain Text (*.cells);;Run Length Encoded (*.rle);;Session Checkpoint (*.gol)")
         if file_path:
-            pattern.save_pattern(file_path + '.cells', self._gol_model.get_grid())
+            # Add the suffix of the chosen format if it was not typed.
+            if not file_path.lower().endswith(pattern.PATTERN_SUFFIXES + (checkpoint.CHECKPOINT_SUFFIX,)):
+                if "*.gol" in file_filter:
+                    file_path += checkpoint.CHECKPOINT_SUFFIX
+                else:
+                    file_path += pattern.RLE_SUFFIX if "*.rle" in file_filter else pattern.PLAINTEXT_SUFFIX
+            if file_path.lower().endswith(checkpoint.CHECKPOINT_SUFFIX):
+                checkpoint.write_checkpoint(file_path, self._gol_model.get_grid(), self._session_metadata())
+            else:
+                # The pattern files hold only the alive cells, without the decay states of the Generations rules.
+                rule = self._gol_model.get_rule()
+                pattern.save_pattern(file_path, rule.get_alive(self._gol_model.get_grid()), str(rule))
             self._main_window.show_message_on_status_bar("Pattern saved")
 
+    def load_checkpoint(self, file_path: str) -> bool:
+        """
+        Restore a session from a checkpoint: the grid with the cell ages, the generation and the settings.
+        :param file_path: Path of the checkpoint file.
+        :return: False if the file is invalid or its grid size is different from the current one, otherwise True.
+        """
+        session = checkpoint.read_checkpoint(file_path)
+        if session is None:
+            self._main_window.show_error_message("Invalid file")
+            return False
+        grid, metadata = session
+        if grid.shape != tuple(self._gol_model.get_grid_size()):
+            self._main_window.show_error_message(f"The checkpoint grid size {grid.shape} is different from the "
+                                                 f"current one {tuple(self._gol_model.get_grid_size())}")
+            return False
+
+        # The settings missing from the checkpoint keep their current value.
+        metadata = dict(self._session_metadata(), **metadata)
+        if not self._apply_rule(metadata["rule"]):
+            return False
+        self._engine.set_grid(grid)
+        self._engine.set_time(metadata["time"])
+        self._main_window.select_combo_pattern(metadata["base_pattern"])
+        with self._gol_model.batch():
+            self._gol_model.set_base_pattern(metadata["base_pattern"])
+            self._publish_grid()
+            self._gol_model.set_time(metadata["time"])
+        self._main_window.set_session_controls(metadata["fps"], metadata["generations_per_frame"],
+                                               metadata["show_age"])
+        return True
+
+    def _session_metadata(self) -> dict:
+        """
+        :return: The settings and the state of the session, other than the grid, saved in the checkpoints.
+        """
+        return {"time": self._gol_model.get_time(), "base_pattern": self._gol_model.get_base_pattern(),
+                "fps": self._gol_model.get_fps(), "generations_per_frame": self._gol_model.get_generations_per_frame(),
+                "show_age": self._gol_model.is_show_age(), "engine": self._engine.name,
+                "rule": str(self._gol_model.get_rule())}
+
+    def _autosave(self):
+        """
+        Write the automatic checkpoint in background, if enough generations passed since the last one.
+        """
+        self._autosaver.update(self._gol_model.get_grid(), self._gol_model.get_time(), self._session_metadata())
+
+    def _resume_interrupted_session(self):
+        """
+        Offer to restore the automatic checkpoint left by a session that was not closed normally.
+        """
+        session = checkpoint.read_checkpoint(self._autosaver.get_file_path())
+        if session is None:
+            return
+        time = session[1].get("time", 0)
+        # Release the mapping of the file, which is rewritten by the next autosave.
+        del session
+        if self._main_window.ask_question(f"The previous session was interrupted at generation {time}. Resume it?"):
+            if self.load_checkpoint(self._autosaver.get_file_path()):
+                self._main_window.show_message_on_status_bar(f"Session resumed at generation {time}")
+
     def select_example_pattern(self, pattern_name: str):
         """
         Load a predefined pattern chosen from the provided list
@@ -116,25 +247,61 @@ class Controller:
         self._gol_model.set_base_pattern(pattern_name)
         # The selected pattern is the custom one: restart from a blank grid
         if pattern_name == "Custom":
-            new_grid = np.zeros(self._gol_model.get_grid_size(), np.uint8)
-            self._gol_model.set_grid_state(new_grid)
+            self._engine.set_grid(np.zeros(self._gol_model.get_grid_size(), np.uint8))
+            self._publish_grid()
         else:
-            file_path = os.path.join(config.DIR_PATTERN, pattern_name + ".cells")
-            if not self.load_file(file_path):
+            # The library parses the pattern only the first time it's chosen.
+            if not self._load_grid_pattern(library.get_pattern(pattern_name)):
                 # If something went wrong during the pattern loading, the custom pattern will be selected.
                 self._main_window.reset_combo_patterns()
 
+    def set_rule(self, text: str):
+        """
+        Change the rule of the simulation. With a Generations rule, the cells in a decay state are shown in gray.
+        :param text: The rule in B/S notation, e.g. B36/S23, or a Generations rule, e.g. B2/S/C3.
+        """
+        if self._apply_rule(text):
+            self._main_window.show_message_on_status_bar(f"Rule {self._gol_model.get_rule()}")
+
+    def _apply_rule(self, text: str) -> bool:
+        """
+        Parse a rule and set it to the engine, the recorder and the model. If the rule is invalid or the engine doesn't
+        support it, an error is shown and the current rule is kept.
+        :param text: The rule.
+        :return: True if the rule was set.
+        """
+        try:
+            rule = parse_rule(text)
+            if rule != self._engine.get_rule():
+                self._engine.set_rule(rule)
+        except ValueError as e:
+            self._main_window.show_error_message(str(e))
+            self._main_window.select_combo_rule(str(self._gol_model.get_rule()))
+            return False
+        if rule != self._gol_model.get_rule():
+            if self._recorder is not None:
+                self._recorder.set_rule(rule)
+            with self._gol_model.batch():
+                self._gol_model.set_rule(rule)
+                self._publish_grid()
+        return True
+
     def set_speed(self, speed: int):
         """
         Change the simulation's speed
-        :param speed: The simulation speed in FPS.
+        :param speed: The simulation speed in generations per second.
         :return:
         """
         self._gol_model.set_fps(speed)
-        if self._gol_model.is_running():
-            msec = (1 / self._gol_model.get_fps()) * 1000
-            msec = math.floor(msec)
-            self._timer.setInterval(msec)
+        self._worker.set_fps(speed)
+
+    def set_generations_per_frame(self, generations: int):
+        """
+        Change the number of generations computed for each frame of the simulation
+        :param generations: The number of generations per frame.
+        """
+        self._gol_model.set_generations_per_frame(generations)
+        self._worker.set_generations_per_frame(generations)
 
     def single_step(self):
         """
@@ -142,36 +309,94 @@ class Controller:
         Besides, calculating dead and living cells at the next time step, it also calculates the age of each cell, the
         time since the simulation start and the number of alive cells.
          The age ranges from 0 (dead) to 255 (ancient).
+        The next generation is computed by the engine selected in the configuration file.
         """
-        grid_curr_age = self._gol_model.get_grid()
-        grid_curr_alive = grid_curr_age.astype(np.bool).astype(np.uint8)
+        with timer.measure("step"):
+            self._engine.step()
+        # A single notification for the grid and for the statistics.
+        with self._gol_model.batch():
+            self._publish_grid()
+            self._gol_model.update_time()
 
-        # Use convolution to calculate the number of neighbors for each cell.
-        grid_neighbors = ndimage.convolve(grid_curr_alive, self._conv_filter, mode="constant", cval=0)
+    def _publish_grid(self):
+        """
+        Publish the grid state and the population statistics of the engine to the model, and record the grid.
+        The engine keeps the population up to date while stepping, so the grid is never scanned to count the cells.
+        """
+        with timer.measure("copy"):
+            grid = self._engine.get_grid()
+        with timer.measure("stats"):
+            stats = (self._engine.get_cells_count(), self._engine.get_births(), self._engine.get_deaths())
+        with self._gol_model.batch():
+            self._gol_model.set_grid_state(grid)
+            self._gol_model.set_population_stats(*stats)
+        if self._recorder is not None:
+            with timer.measure("record"):
+                self._recorder.record(grid, self._engine.get_time())
+            self._update_timeline(self._engine.get_time())
 
-        # Calculate which cells to give birth: a dead cell is born when it has exactly three neighbors.
-        grid_newborns = grid_neighbors == 3
-        grid_newborns = np.logical_and(grid_newborns, np.logical_not(grid_curr_alive))
+    def _update_timeline(self, generation: int):
+        """
+        Show the recorded generations on the timeline.
+        :param generation: The generation of the grid shown.
+        """
+        time_range = self._recorder.get_range()
+        if time_range is not None:
+            self._main_window.set_timeline(time_range[0], time_range[1], generation)
 
-        # Calculate which cells survive: a living cell survive when it has two or three neighbors.
-        # This is done with the logical AND operator.
-        # First it's done between the cells that have 2 or 3 neighbors to calculate the survived cells.
-        # Then the logical AND is applied to the current grid and the grid with the survived cells.
-        grid_survived = np.logical_and(grid_neighbors >= 2, grid_neighbors <= 3)
-        grid_survived = np.logical_and(grid_survived, grid_curr_alive)
+    def rewind_to_generation(self, position: int):
+        """
+        Show a recorded generation, decoded from the recording. The recording after it is kept until the grid changes,
+        so that the timeline can be scrubbed back and forth.
+        :param position: The position of the generation in the timeline, from the first recorded generation.
+        """
+        time_range = self._recorder.get_range() if self._recorder is not None else None
+        if time_range is None or self._gol_model.is_running():
+            return
+        generation = time_range[0] + position
+        grid = self._recorder.get_grid(generation)
+        if grid is None:
+            return
 
-        # Calculate the living cells at the next step merging survived and newborn cells, via the logical OR operation.
-        grid_next = np.logical_or(grid_newborns, grid_survived).astype(np.uint8)
+        self._engine.set_grid(grid)
+        self._engine.set_time(generation)
+        with self._gol_model.batch():
+            self._gol_model.set_grid_state(self._engine.get_grid())
+            self._gol_model.set_population_stats(self._engine.get_cells_count(), None, None)
+            self._gol_model.set_time(generation)
 
-        # Compute the age of the cells in the new grid, by self addition.
-        grid_next = grid_curr_age * grid_next + grid_next
-        np.putmask(grid_next, grid_curr_age == 255,
-                   255)  # This is necessary to avoid the overflow handling by numpy and cap the array values to 255
+    def jump_to_generation(self):
+        """
+        Jump to the generation chosen by the user using the HashLife engine, without computing the intermediate
+        generations one at a time.
+        The HashLife universe is unbounded: the cells that reach the grid border keep evolving outside of it.
+        HashLife computes only the Conway's rule: with other rules the engine runs until the generation instead.
+        """
+        generation = self._main_window.get_jump_generation()
+        if generation is None:
+            return
+        if generation < self._gol_model.get_time():
+            self._main_window.show_error_message("The chosen generation is already passed")
+            return
+        if self._engine.get_rule() != CONWAY:
+            self._start_run_until(generation, None)
+            return
 
-        self._gol_model.set_grid_state(grid_next)
-        cell_alive = np.count_nonzero(self._gol_model.get_grid())
-        self._gol_model.update_time()
-        self._gol_model.set_cells_count(cell_alive)
+        if isinstance(self._engine, HashLifeEngine):
+            self._engine.advance(generation - self._gol_model.get_time())
+        else:
+            if self._hashlife is None:
+                self._hashlife = HashLifeEngine(self._engine.get_grid())
+            else:
+                self._hashlife.set_grid(self._engine.get_grid())
+            self._hashlife.advance(generation - self._gol_model.get_time())
+            self._engine.set_grid(self._hashlife.get_grid())
+            self._engine.set_time(generation)
+
+        with self._gol_model.batch():
+            self._publish_grid()
+            self._gol_model.set_time(generation)
+        self._main_window.show_message_on_status_bar(f"Jumped to generation {generation}")
 
     def start_stop(self):
         """
@@ -179,13 +404,100 @@ class Controller:
         """
         if not self._gol_model.is_running():
             self._gol_model.set_running(True)
-            msec = (1 / self._gol_model.get_fps()) * 1000
-            msec = math.floor(msec)
-            self._timer.setInterval(msec)
-            self._timer.start()
+            self._start_time = self._gol_model.get_time()
+            self._cycle_reported = False
+            self._worker.start_simulation()
+            self._frame_timer.start()
+            if timer.is_enabled():
+                # The speed is measured on the frames of this run only.
+                timer.clear()
+                self._timings_timer.start()
         else:
-            self._gol_model.set_running(False)
-            self._timer.stop()
+            # Wait for the worker to stop before using the engine, then show the generation where it stopped.
+            self._worker.stop_simulation()
+            self._frame_timer.stop()
+            self._timings_timer.stop()
+            with self._gol_model.batch():
+                self._publish_grid()
+                self._gol_model.set_time(self._start_time + self._worker.get_steps())
+                self._gol_model.set_running(False)
+
+    def run_until(self):
+        """
+        Run the simulation as fast as possible until the generation or the population chosen by the user is reached.
+        The model is updated only at the end of the run, which can be interrupted with the pause button.
+        """
+        generation = self._main_window.get_jump_generation()
+        population = self._main_window.get_target_population()
+        if generation is None and population is None:
+            return
+        if generation is not None and generation < self._gol_model.get_time():
+            self._main_window.show_error_message("The chosen generation is already passed")
+            return
+        self._start_run_until(generation, population)
+
+    def _start_run_until(self, generation: int, population: int):
+        """
+        Start running the simulation in the worker until the generation or the population is reached.
+        :param generation: The generation to reach, None for no limit.
+        :param population: The population to reach, None for no limit.
+        """
+        self._gol_model.set_running(True)
+        self._start_time = self._gol_model.get_time()
+        self._cycle_reported = False
+        target_steps = generation - self._start_time if generation is not None else None
+        self._worker.start_run_until(target_steps, population)
+
+    def _simulation_finished(self):
+        """
+        Show the final state of a run that reached its target or that paused on a cycle. A run stopped by the user is
+        already shown by start_stop
+        """
+        if self._gol_model.is_running():
+            self._frame_timer.stop()
+            self._timings_timer.stop()
+            with self._gol_model.batch():
+                self._publish_grid()
+                self._gol_model.set_time(self._start_time + self._worker.get_steps())
+                self._gol_model.set_running(False)
+            if not self._report_cycle():
+                self._main_window.show_message_on_status_bar(f"Stopped at generation {self._gol_model.get_time()}")
+
+    def _report_cycle(self) -> bool:
+        """
+        Show on the status bar the cycle detected by the worker, once per run.
+        :return: True if a cycle was detected.
+        """
+        cycle = self._worker.get_cycle()
+        if cycle is not None and not self._cycle_reported:
+            period, steps = cycle
+            kind = "Still life" if period == 1 else f"Cycle of period {period}"
+            self._main_window.show_message_on_status_bar(f"{kind} detected at generation {self._start_time + steps}")
+            self._cycle_reported = True
+        return cycle is not None
+
+    def show_latest_frame(self):
+        """
+        Show the latest generation computed by the running simulation. The generations computed since the previous
+        frame are skipped.
+        """
+        frame = self._worker.take_frame()
+        if frame is not None:
+            timer.tick("frame")
+            with self._gol_model.batch():
+                self._gol_model.set_grid_state(frame.grid)
+                self._gol_model.set_population_stats(frame.cells_count, frame.births, frame.deaths)
+                self._gol_model.set_time(self._start_time + frame.steps)
+            self._report_cycle()
+            if self._recorder is not None:
+                self._update_timeline(self._start_time + frame.steps)
+
+    def show_timings(self):
+        """
+        Show on the status bar the frames shown per second against the target speed, and the average time of each phase
+        of the recent frames.
+        """
+        self._main_window.show_timings(timer.get_rate("frame"), self._gol_model.get_fps(), timer.get_averages())
 
     def toggle_show_cell_age(self, show_cell_age: bool):
         self._gol_model.set_show_age(show_cell_age)
@@ -198,10 +510,8 @@ class Controller:
 
         grid = self._gol_model.get_grid()
         row, col = cell_coord
-        grid[row, col] = 0 if grid[row, col] else 1
-        self._gol_model.set_grid_state(grid)
-        cell_alive = np.count_nonzero(self._gol_model.get_grid())
-        self._gol_model.set_cells_count(cell_alive)
+        self._engine.set_cell(row, col, 0 if grid[row, col] else 1)
+        self._publish_grid()
 
     def display_info(self):
         """
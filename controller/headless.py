@@ -0,0 +1,292 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from engine.cycle_detector import CycleDetector, run_detecting_cycles
+from engine.engines import ENGINES, create_engine
+from engine.ensemble import Ensemble, random_grids
+from engine.gol_engine import GOLEngine
+from engine.hashlife_engine import HashLifeEngine
+from engine.memmap_engine import MemmapEngine
+from engine.rules import Rule, parse_rule
+from utils import checkpoint, pattern
+from utils.pattern_library import library
+from utils.config import config
+
+
+def read_named_pattern(pattern_name: str) -> np.ndarray:
+    """
+    Read the initial pattern of a headless simulation.
+    :param pattern_name: Name of a pattern stored in the patterns folder, path to a .cells or .rle file or "Custom" for
+    a blank grid.
+    :return: The numpy array that represents the pattern, None for a blank grid.
+    """
+    if pattern_name == "Custom":
+        return None
+
+    if os.path.isfile(pattern_name):
+        grid_pattern = pattern.read_pattern(pattern_name)
+    else:
+        grid_pattern = library.get_pattern(pattern_name)
+    if grid_pattern is None:
+        raise ValueError(f"Invalid pattern '{pattern_name}'")
+    return grid_pattern
+
+
+def create_headless_engine(engine_name: str, grid_pattern: np.ndarray, grid_size: tuple, rule: Rule,
+                           track_age: bool = False) -> GOLEngine:
+    """
+    Create an engine with the pattern at the center of its grid.
+    :param engine_name: The name of the engine that computes the generations.
+    :param grid_pattern: The initial pattern, None for a blank grid.
+    :param grid_size: The size of the grid as (rows, columns).
+    :param rule: The rule computed by the engine.
+    :param track_age: Flag that indicates if the age of the cells is computed, which is needed only by the
+    checkpoints since otherwise only the final population is reported.
+    :return: The engine.
+    """
+    # The blank grid is a read-only view of a single dead cell, so that the engines that keep their grid out of core
+    # don't need to allocate it in memory.
+    blank_grid = np.broadcast_to(np.uint8(0), grid_size)
+    engine = create_engine(engine_name, blank_grid, track_age=track_age, rule=rule)
+    if grid_pattern is not None and not engine.load_pattern(grid_pattern):
+        raise ValueError(f"The pattern is bigger than the grid {grid_size}")
+    return engine
+
+
+def create_resumed_engine(engine_name: str, file_path: str, rule: Rule = None, track_age: bool = True) -> tuple:
+    """
+    Create an engine with the grid, the generation and the rule saved in a checkpoint.
+    :param engine_name: The name of the engine that computes the generations.
+    :param file_path: The checkpoint file.
+    :param rule: The rule computed by the engine, None to use the rule of the checkpoint.
+    :param track_age: Flag that indicates if the age of the cells is computed, so that the ages saved in the checkpoint
+    keep growing.
+    :return: The engine and the dictionary of the session metadata.
+    """
+    session = checkpoint.read_checkpoint(file_path)
+    if session is None:
+        raise ValueError(f"Invalid checkpoint '{file_path}'")
+    grid, metadata = session
+    if rule is None:
+        rule = parse_rule(metadata.get("rule", config.RULE))
+    engine = create_engine(engine_name, grid, track_age=track_age, rule=rule)
+    engine.set_time(metadata["time"])
+    return engine, metadata
+
+
+def run_engine(engine: GOLEngine, generations: int, cycle_window: int = 0,
+               autosaver: checkpoint.Autosaver = None, metadata: dict = None) -> tuple:
+    """
+    Run a simulation without the GUI.
+    :param engine: The engine that computes the generations.
+    :param generations: The number of generations to compute.
+    :param cycle_window: Number of recent generations compared to detect cycles, 0 to disable the detection.
+    :param autosaver: The autosaver that writes a checkpoint in background every few generations, None to run without
+    checkpoints.
+    :param metadata: The dictionary of the session metadata saved in the checkpoints, whose time is updated.
+    :return: The elapsed time in seconds and the period of the detected cycle, None if no cycle was detected.
+    """
+    start = time.perf_counter()
+    detector = CycleDetector(cycle_window) if cycle_window > 0 else None
+    # With the autosave, the generations are computed in chunks, with a checkpoint after each one.
+    chunk = autosaver.get_interval() if autosaver is not None and autosaver.get_interval() > 0 else generations
+    period = None
+    done = 0
+    while done < generations:
+        count = min(chunk, generations - done)
+        if detector is not None:
+            period = run_detecting_cycles(engine, count, detector)
+        else:
+            engine.run(count)
+        done += count
+        if autosaver is not None and done < generations:
+            if isinstance(engine, MemmapEngine):
+                # The file of the grid is overwritten by the next steps, so it's written before they start.
+                autosaver.write(get_checkpoint_grid(engine), dict(metadata, time=engine.get_time()))
+            else:
+                autosaver.update(engine.get_grid(), engine.get_time(), dict(metadata, time=engine.get_time()))
+    return time.perf_counter() - start, period
+
+
+def get_checkpoint_grid(engine: GOLEngine) -> np.ndarray:
+    """
+    :param engine: The engine.
+    :return: The grid to write in a checkpoint: the file of the grid of the memmap engine, which the checkpoint writer
+    reads in bands, or a copy of the grid of the other engines.
+    """
+    return engine.get_grid_map() if isinstance(engine, MemmapEngine) else engine.get_grid()
+
+
+def run_ensemble(ensemble: Ensemble, generations: int) -> float:
+    """
+    Run a batch of simulations until they all settle or the given number of generations is reached.
+    :param ensemble: The batch of simulations.
+    :param generations: The maximum number of generations to compute.
+    :return: The elapsed time in seconds.
+    """
+    start = time.perf_counter()
+    ensemble.run(generations)
+    return time.perf_counter() - start
+
+
+def print_ensemble_summary(ensemble: Ensemble, elapsed: float) -> None:
+    """
+    Print the statistics of a batch of simulations: how many settled and when, the periods of their cycles and their
+    final population.
+    :param ensemble: The batch of simulations.
+    :param elapsed: The time taken to run it, in seconds.
+    """
+    settled_times = ensemble.get_settled_times()
+    settled = settled_times >= 0
+    populations = ensemble.get_populations()
+    print(f"Generations: {ensemble.get_time()}")
+    print(f"Settled: {np.count_nonzero(settled)} of {ensemble.get_batch_size()} "
+          f"({np.count_nonzero(settled & (populations == 0))} died out)")
+    if settled.any():
+        lifespans = settled_times[settled]
+        print(f"Settled in: {lifespans.mean():.1f} generations on average, median {np.median(lifespans):.0f}, "
+              f"max {lifespans.max()}")
+        periods = np.bincount(ensemble.get_periods()[settled])
+        print("Periods: " + ", ".join(f"{period}: {count}" for period, count in enumerate(periods) if count))
+    print(f"Final population: {populations.mean():.1f} on average, max {populations.max()}")
+    # The throughput counts only the generations of the members that were still active.
+    member_generations = int(np.where(settled, settled_times, ensemble.get_time()).sum())
+    speed = member_generations / elapsed if elapsed > 0 else float("inf")
+    print(f"Elapsed: {elapsed:.3f} s ({speed:.1f} member generations/s)")
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a Game of Life simulation without the GUI.")
+    parser.add_argument("-p", "--pattern", default=config.BASE_PATTERN,
+                        help="Name of a pattern in the patterns folder or path to a .cells or .rle file.")
+    parser.add_argument("-n", "--generations", type=int, default=1000, help="Number of generations to compute.")
+    parser.add_argument("-s", "--grid-size", type=int, nargs=2, default=config.GRID_SIZE, metavar=("ROWS", "COLUMNS"),
+                        help="Size of the grid.")
+    parser.add_argument("-e", "--engine", default=config.ENGINE, choices=list(ENGINES), help="Stepping engine.")
+    parser.add_argument("-r", "--rule",
+                        help="Rule in B/S notation, e.g. B36/S23, or a Generations rule, e.g. B2/S/C3. By default the "
+                             "configured rule, or the rule of the resumed checkpoint.")
+    parser.add_argument("-c", "--compare", choices=list(ENGINES),
+                        help="Run the same simulation with a second engine and check that the results match.")
+    parser.add_argument("-w", "--cycle-window", type=int, default=0,
+                        help="Number of recent generations compared to detect cycles, whose whole periods are then "
+                             "skipped. 0 disables the detection.")
+    parser.add_argument("--checkpoint", metavar="FILE",
+                        help="Checkpoint file written at the end of the run and, in background, every "
+                             f"{config.AUTOSAVE_GENERATIONS} generations (see the autosave_generations setting).")
+    parser.add_argument("--resume", metavar="FILE",
+                        help="Checkpoint file from which the run starts, instead of the pattern and the grid size.")
+    parser.add_argument("--ensemble", type=int, metavar="BATCH",
+                        help="Run a batch of random soups of the grid size together, until they settle or the number "
+                             "of generations is reached, and print their statistics instead of running a pattern.")
+    parser.add_argument("--density", type=float, default=0.5, help="Density of the alive cells of the random soups.")
+    parser.add_argument("--seed", type=int, help="Seed of the random soups.")
+    args = parser.parse_args(argv)
+
+    if args.ensemble:
+        try:
+            rule = parse_rule(args.rule or config.RULE)
+        except ValueError as e:
+            parser.error(str(e))
+        # The settled soups are detected with the cycle window, which is needed even if the option disables it.
+        ensemble = Ensemble(random_grids(args.ensemble, tuple(args.grid_size), args.density, args.seed), rule=rule,
+                            window=args.cycle_window or config.CYCLE_WINDOW)
+        elapsed = run_ensemble(ensemble, args.generations)
+        print(f"Ensemble: {args.ensemble} soups of {args.grid_size[0]}x{args.grid_size[1]} with density "
+              f"{args.density}")
+        print(f"Rule: {rule}")
+        print_ensemble_summary(ensemble, elapsed)
+        return 0
+
+    try:
+        rule = parse_rule(args.rule) if args.rule else None
+        if args.resume:
+            engine, metadata = create_resumed_engine(args.engine, args.resume, rule)
+            compare_engine = create_resumed_engine(args.compare, args.resume, rule)[0] if args.compare else None
+            args.pattern = metadata.get("base_pattern", args.pattern)
+        else:
+            rule = rule or parse_rule(config.RULE)
+            grid_pattern = read_named_pattern(args.pattern)
+            # The ages are saved in the checkpoints, so they are computed only if the run is checkpointed.
+            track_age = args.checkpoint is not None
+            engine = create_headless_engine(args.engine, grid_pattern, tuple(args.grid_size), rule, track_age)
+            compare_engine = create_headless_engine(args.compare, grid_pattern, tuple(args.grid_size), rule,
+                                                    track_age) if args.compare else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    autosaver = checkpoint.Autosaver(args.checkpoint, config.AUTOSAVE_GENERATIONS) if args.checkpoint else None
+    # The settings saved with the checkpoints, used by the GUI when the session is resumed.
+    metadata = {"time": engine.get_time(), "base_pattern": args.pattern, "fps": config.SPEED,
+                "generations_per_frame": config.GENERATIONS_PER_FRAME, "show_age": False, "engine": args.engine,
+                "rule": str(engine.get_rule())}
+    elapsed, period = run_engine(engine, args.generations, args.cycle_window, autosaver, metadata)
+    if autosaver is not None:
+        # The last checkpoint goes through the writer of the autosaves, into the slot that is not valid.
+        autosaver.write(get_checkpoint_grid(engine), dict(metadata, time=engine.get_time()))
+        autosaver.close()
+
+    print(f"Pattern: {args.pattern}")
+    print(f"Rule: {engine.get_rule()}")
+    print(f"Generations: {args.generations}")
+    if args.resume:
+        print(f"Final generation: {engine.get_time()}")
+    print(f"Population: {engine.get_cells_count()}")
+    print(f"Elapsed: {elapsed:.3f} s ({_speed(args.generations, elapsed)}) with the {args.engine} engine")
+    if args.cycle_window > 0:
+        print(f"Cycle period: {period if period is not None else 'none detected'}")
+
+    if compare_engine is not None:
+        compare_elapsed, _ = run_engine(compare_engine, args.generations)
+        # The population is compared too, since unbounded engines have cells outside the grid.
+        match = _grids_match(engine, compare_engine) and engine.get_cells_count() == compare_engine.get_cells_count()
+        print(f"Elapsed: {compare_elapsed:.3f} s ({_speed(args.generations, compare_elapsed)}) "
+              f"with the {args.compare} engine")
+        print(f"Results match: {'yes' if match else 'NO'}")
+        return 0 if match else 1
+    return 0
+
+
+def _grids_match(engine: GOLEngine, other: GOLEngine) -> bool:
+    """
+    :param engine: An engine.
+    :param other: Another engine.
+    :return: True if the grids of the engines are the same. The ages are compared only if both engines track them:
+    HashLife doesn't. The grids of the memmap engines are compared in bands, so that they are never loaded as a whole.
+    """
+    if engine.get_grid_size() != other.get_grid_size():
+        return False
+    rows = engine.get_grid_size()[0]
+    band_rows = min([rows] + [e.get_band_rows() for e in (engine, other) if isinstance(e, MemmapEngine)])
+    readers = [_band_reader(e) for e in (engine, other)]
+    for start in range(0, rows, max(band_rows, 1)):
+        band, other_band = (read(start, band_rows) for read in readers)
+        if HashLifeEngine.name in (engine.name, other.name):
+            band, other_band = band != 0, other_band != 0
+        if not np.array_equal(band, other_band):
+            return False
+    return True
+
+
+def _band_reader(engine: GOLEngine):
+    """
+    :param engine: The engine.
+    :return: A function that reads the given number of rows of the grid from the given one.
+    """
+    if isinstance(engine, MemmapEngine):
+        cols = engine.get_grid_size()[1]
+        return lambda start, rows: engine.get_region(start, 0, rows, cols)
+    grid = engine.get_grid()
+    return lambda start, rows: grid[start:start + rows]
+
+
+def _speed(generations: int, elapsed: float) -> str:
+    speed = generations / elapsed if elapsed > 0 else float("inf")
+    return f"{speed:.1f} generations/s"
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,224 @@
+import threading
+import time
+from collections import namedtuple
+
+from PyQt5.QtCore import QThread
+
+from engine.cycle_detector import CycleDetector
+from engine.gol_engine import GOLEngine
+from utils.profiler import session_profiler, timer
+from utils.run_recorder import RunRecorder
+
+# Maximum number of generations computed in a single call of the engine by run_until, so that it can be stopped.
+RUN_BATCH = 1024
+
+# Snapshot of the simulation taken by the worker: the grid, the steps taken since the simulation started and the
+# population statistics.
+Frame = namedtuple("Frame", ["grid", "steps", "cells_count", "births", "deaths"])
+
+
+class SimulationWorker(QThread):
+    """
+    Thread that steps the engine while the simulation is running, so that neither a slow render slows the simulation
+    down nor a heavy step freezes the GUI.
+    The GUI samples the latest frame at its own refresh rate: the worker copies the grid only when the previous frame
+    was taken, so the generations computed in between are never copied nor drawn.
+    The worker can also run in a tight loop until a target generation or population is reached, without producing any
+    frame: the caller reads the final state from the engine when the finished signal is emitted.
+    When the cycle detection is enabled, the worker can pause as soon as the grid settles into a cycle, and a run until a
+    generation skips the whole periods left without computing them.
+    When a recorder is given, every generation of the paced simulation is recorded, so that it can be rewound.
+    The phases of the paced simulation are measured by the phase timer.
+    """
+
+    def __init__(self, engine: GOLEngine, fps: int, generations_per_frame: int, cycle_window: int = 0,
+                 pause_on_cycle: bool = False, recorder: RunRecorder = None):
+        super().__init__()
+        self._engine = engine
+        self._recorder = recorder
+        # Detector of the cycles, None if the detection is disabled.
+        self._detector = CycleDetector(cycle_window) if cycle_window > 0 else None
+        self._pause_on_cycle = pause_on_cycle
+        # The detected cycle as (period, steps when it was detected), None if no cycle was detected.
+        self._cycle = None
+        # The target speed in frames per second, and the generations computed for each frame.
+        self._fps = fps
+        self._generations_per_frame = generations_per_frame
+        # The targets of run_until: the steps to take and the population to reach. None if the worker runs paced.
+        self._target_steps = None
+        self._target_population = None
+        self._run_until = False
+        # Flag that keeps the worker loop alive.
+        self._running = False
+        # The number of steps taken since the simulation started.
+        self._steps = 0
+
+        # Latest frame, protected by the lock since it is exchanged between the threads.
+        self._lock = threading.Lock()
+        self._frame = None
+        self._frame_requested = True
+
+    def get_steps(self) -> int:
+        return self._steps
+
+    def get_cycle(self) -> tuple:
+        """
+        :return: The cycle detected in the current run as (period, steps when it was detected), None if no cycle was
+        detected.
+        """
+        return self._cycle
+
+    def set_fps(self, fps: int) -> None:
+        self._fps = fps
+
+    def set_generations_per_frame(self, generations: int) -> None:
+        self._generations_per_frame = generations
+
+    def start_simulation(self) -> None:
+        """
+        Start stepping the engine in the worker thread.
+        """
+        self._steps = 0
+        self._frame = None
+        self._frame_requested = True
+        self._run_until = False
+        self._running = True
+        self.start()
+
+    def start_run_until(self, target_steps: int = None, target_population: int = None) -> None:
+        """
+        Step the engine in the worker thread as fast as possible until one of the targets is reached or the worker is
+        stopped.
+        :param target_steps: The number of steps to take, None for no limit.
+        :param target_population: The population to reach, from above or below, None for no limit.
+        """
+        self._steps = 0
+        self._target_steps = target_steps
+        self._target_population = target_population
+        self._run_until = True
+        self._running = True
+        self.start()
+
+    def stop_simulation(self) -> None:
+        """
+        Stop stepping the engine and wait for the current step to end, so that the engine can be used by the caller.
+        """
+        self._running = False
+        self.wait()
+
+    def take_frame(self) -> Frame:
+        """
+        Take the latest frame computed by the worker.
+        :return: The frame, None if no new frame is available since the last call.
+        """
+        with self._lock:
+            frame = self._frame
+            self._frame = None
+            self._frame_requested = True
+        return frame
+
+    def run(self) -> None:
+        # The thread is profiled with the rest of the session, if it is.
+        with session_profiler.profile_thread():
+            self._cycle = None
+            if self._detector is not None:
+                self._detector.reset()
+                self._detector.update(self._engine.get_state_hash(), 0)
+
+            if self._run_until:
+                self._run_to_target()
+            else:
+                self._run_paced()
+        self._running = False
+
+    def _run_paced(self) -> None:
+        next_step = time.perf_counter()
+        while self._running:
+            generations = self._generations_per_frame
+            with timer.measure("step"):
+                if self._recorder is not None or (self._detector is not None and self._cycle is None):
+                    # Record the generations and look for cycles one generation at a time.
+                    for _ in range(generations):
+                        if self._step_generation() and self._pause_on_cycle:
+                            break
+                else:
+                    self._engine.run(generations)
+                    self._steps += generations
+            if self._cycle is not None and self._pause_on_cycle:
+                break
+
+            if self._frame_requested:
+                with timer.measure("copy"):
+                    grid = self._engine.get_grid()
+                with timer.measure("stats"):
+                    frame = Frame(grid, self._steps, self._engine.get_cells_count(), self._engine.get_births(),
+                                  self._engine.get_deaths())
+                with self._lock:
+                    self._frame = frame
+                    self._frame_requested = False
+
+            # Wait to keep the target speed. If the simulation is late, it doesn't try to catch up.
+            next_step += 1 / max(self._fps, 1)
+            delay = next_step - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_step = time.perf_counter()
+
+    def _run_to_target(self) -> None:
+        target_population = self._target_population
+        if target_population is not None:
+            # The population must reach the target from the side where it starts.
+            from_above = self._engine.get_cells_count() > target_population
+
+        while self._running:
+            if self._target_steps is not None and self._steps >= self._target_steps:
+                break
+            if self._cycle is not None:
+                if target_population is not None or self._target_steps is None:
+                    # The population of a cycle doesn't change anymore: the target won't be reached.
+                    break
+                # The whole periods left bring the grid back to the same state: skip them.
+                period = self._cycle[0]
+                left = self._target_steps - self._steps
+                self._engine.skip_generations(left - left % period, period)
+                self._engine.run(left % period)
+                self._steps = self._target_steps
+                break
+            if self._detector is not None:
+                if target_population is not None and self._population_reached(target_population, from_above):
+                    break
+                self._step_generation()
+            elif target_population is None:
+                # Without a population to check, the engine computes many generations at once.
+                generations = min(RUN_BATCH, self._target_steps - self._steps) if self._target_steps is not None \
+                    else RUN_BATCH
+                self._engine.run(generations)
+                self._steps += generations
+            else:
+                if self._population_reached(target_population, from_above):
+                    break
+                self._engine.step()
+                self._steps += 1
+
+    def _population_reached(self, target_population: int, from_above: bool) -> bool:
+        population = self._engine.get_cells_count()
+        return population <= target_population if from_above else population >= target_population
+
+    def _step_generation(self) -> bool:
+        """
+        Compute a generation, record it and check if the grid entered a cycle.
+        :return: True if a cycle was detected by this generation.
+        """
+        self._engine.step()
+        self._steps += 1
+        if self._recorder is not None and not self._run_until:
+            with timer.measure("record"):
+                self._recorder.record(self._engine.get_grid(), self._engine.get_time())
+        if self._detector is None or self._cycle is not None:
+            return False
+        with timer.measure("cycles"):
+            period = self._detector.update(self._engine.get_state_hash(), self._steps)
+        if period is not None:
+            self._cycle = (period, self._steps)
+        return period is not None
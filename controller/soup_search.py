@@ -0,0 +1,240 @@
+import argparse
+import json
+import os
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+from engine.census import SPACESHIP, ObjectClassifier, build_catalogue, locate_objects
+from engine.ensemble import Ensemble
+from engine.rules import Rule, parse_rule
+from utils import pattern
+from utils.pattern_library import library
+from utils.config import config
+
+# Width of the band along the edges of the grid in which the spaceships are removed before they hit the edge, and
+# number of generations between two checks of the band. A spaceship as fast as the light can't cross the band between
+# two checks.
+_ESCAPE_BAND = 8
+_ESCAPE_INTERVAL = _ESCAPE_BAND // 2
+# Longest period of the spaceships removed. The objects in the band are mostly debris that is still evolving, so they
+# are classified with a short period to give up on them quickly.
+_ESCAPE_MAX_PERIOD = 16
+# Largest side of the patterns of the library classified to name the objects of the census.
+_CATALOGUE_MAX_SIDE = 64
+
+# Settings of a search, sent to the workers: the rule, the seed of the soups, their side, their density, the margin
+# around them, the generations after which an unsettled soup is given up and the longest period classified.
+SearchSettings = namedtuple("SearchSettings", ["rule", "seed", "soup_size", "density", "margin", "max_generations",
+                                               "max_period"])
+
+# The classifier of each worker, kept between the chunks so that the objects already classified are memoized.
+_classifiers = {}
+
+
+def make_soups(start: int, count: int, settings: SearchSettings) -> np.ndarray:
+    """
+    Create the grids of consecutive soups of a search. Each soup depends only on the seed and on its index, so a search
+    gives the same census whatever the chunks and the workers.
+    :param start: The index of the first soup.
+    :param count: The number of soups.
+    :param settings: The settings of the search.
+    :return: The uint8 (count, rows, columns) array of the grids, with each soup at the center of its margin.
+    """
+    size, margin = settings.soup_size, settings.margin
+    grids = np.zeros((count, size + 2 * margin, size + 2 * margin), np.uint8)
+    for index in range(count):
+        rng = np.random.RandomState([settings.seed, start + index])
+        grids[index, margin:margin + size, margin:margin + size] = rng.random_sample((size, size)) < settings.density
+    return grids
+
+
+def search_soups(start: int, count: int, settings: SearchSettings) -> tuple:
+    """
+    Run consecutive soups of a search together until they settle, and take the census of the objects they settle into.
+    The spaceships they emit are counted and removed when they approach the edges of the grid, since the cells beyond
+    the edges are dead and a spaceship hitting them would turn into debris.
+    :param start: The index of the first soup.
+    :param count: The number of soups.
+    :param settings: The settings of the search.
+    :return: A tuple with the counter of the codes of the objects found, the number of soups run and the number of
+    soups that didn't settle within the maximum generations.
+    """
+    classifier = _get_classifier(settings.rule, settings.max_period)
+    escape_classifier = _get_classifier(settings.rule, min(settings.max_period, _ESCAPE_MAX_PERIOD))
+    # The window must cover the longest period, so that the soups that settle into any classified oscillator settle.
+    ensemble = Ensemble(make_soups(start, count, settings), rule=settings.rule,
+                        window=max(config.CYCLE_WINDOW, settings.max_period))
+
+    census = Counter()
+    while ensemble.get_time() < settings.max_generations and ensemble.get_active_count():
+        ensemble.run(min(_ESCAPE_INTERVAL, settings.max_generations - ensemble.get_time()))
+        census.update(_remove_spaceships(ensemble, escape_classifier))
+
+    settled = np.flatnonzero(ensemble.get_settled_times() >= 0)
+    for member in settled:
+        census.update(classifier.census(ensemble.get_grid(member)))
+    return census, count, count - settled.size
+
+
+def _get_classifier(rule: Rule, max_period: int) -> ObjectClassifier:
+    if (rule, max_period) not in _classifiers:
+        _classifiers[rule, max_period] = ObjectClassifier(rule, max_period)
+    return _classifiers[rule, max_period]
+
+
+def _remove_spaceships(ensemble: Ensemble, classifier: ObjectClassifier) -> list:
+    """
+    Remove the spaceships in the band along the edges of the grids of the active soups.
+    :param ensemble: The soups.
+    :param classifier: The classifier of the objects.
+    :return: The codes of the spaceships removed.
+    """
+    grids = ensemble.get_active_grids()
+    band = _ESCAPE_BAND
+    occupied = grids != 0
+    near_edge = occupied[:, :band].any(axis=(1, 2)) | occupied[:, -band:].any(axis=(1, 2)) | \
+        occupied[:, :, :band].any(axis=(1, 2)) | occupied[:, :, -band:].any(axis=(1, 2))
+
+    codes = []
+    rows, cols = ensemble.get_grid_size()
+    for member, grid in zip(ensemble.get_active_members()[near_edge], grids[near_edge]):
+        removed = False
+        for (row_slice, col_slice), grid_object in locate_objects(grid):
+            if band <= row_slice.start and row_slice.stop <= rows - band and \
+                    band <= col_slice.start and col_slice.stop <= cols - band:
+                continue
+            found = classifier.classify(grid_object)
+            if found is not None and found.kind == SPACESHIP:
+                codes.append(found.code)
+                grid[row_slice, col_slice][grid_object != 0] = 0
+                removed = True
+        if removed:
+            ensemble.set_grid(member, grid)
+    return codes
+
+
+def build_census(census: Counter, catalogue: dict, settings: SearchSettings, soups: int, unsettled: int,
+                 elapsed: float) -> dict:
+    """
+    :param census: The counter of the codes of the objects found.
+    :param catalogue: The names of the known objects, indexed by code.
+    :param settings: The settings of the search.
+    :param soups: The number of soups run.
+    :param unsettled: The number of soups that didn't settle.
+    :param elapsed: The time taken by the search, in seconds.
+    :return: The dictionary of the census, with the objects sorted from the most common.
+    """
+    return {"rule": str(settings.rule), "seed": settings.seed, "soup_size": settings.soup_size,
+            "density": settings.density, "soups": soups, "unsettled": unsettled, "elapsed": round(elapsed, 3),
+            "soups_per_second": round(soups / elapsed, 1) if elapsed > 0 else None,
+            "objects": [{"code": code, "name": catalogue.get(code), "count": count}
+                        for code, count in sorted(census.items(), key=lambda item: (-item[1], item[0]))]}
+
+
+def write_census(file_path: Path, census: dict) -> None:
+    """
+    Write the census into a JSON file. The file is replaced at once, so a reader never finds it partially written.
+    :param file_path: The census file.
+    :param census: The dictionary of the census.
+    """
+    temporary_path = file_path.with_name(file_path.name + ".tmp")
+    with open(temporary_path, "w") as file:
+        json.dump(census, file, indent=2)
+    os.replace(temporary_path, file_path)
+
+
+def make_catalogue(rule: Rule, max_period: int) -> dict:
+    """
+    :param rule: The rule of the search.
+    :param max_period: The longest period classified.
+    :return: The names of the periodic reference objects of the census folder and of the small periodic patterns of
+    the library, indexed by code. The names of the reference objects take precedence.
+    """
+    patterns = {}
+    for name in library.get_names():
+        grid_pattern = library.get_pattern(name)
+        if grid_pattern is not None and max(grid_pattern.shape) <= _CATALOGUE_MAX_SIDE:
+            patterns[name] = grid_pattern
+    references = {}
+    for file_path in sorted(config.DIR_CENSUS.glob("*")):
+        if file_path.suffix in pattern.PATTERN_SUFFIXES:
+            grid_pattern = pattern.read_pattern(file_path)
+            if grid_pattern is not None:
+                references[file_path.stem] = grid_pattern
+
+    classifier = ObjectClassifier(rule, max_period)
+    catalogue = build_catalogue(classifier, patterns)
+    catalogue.update(build_catalogue(classifier, references))
+    return catalogue
+
+
+def run_search(soups: int, settings: SearchSettings, workers: int, chunk_size: int, file_path: Path) -> dict:
+    """
+    Run a search over a process pool. The soups are split in chunks run by the workers, and the census file is
+    rewritten with the aggregated census after each chunk.
+    :param soups: The number of soups.
+    :param settings: The settings of the search.
+    :param workers: The number of worker processes, 0 to use one per CPU.
+    :param chunk_size: The number of soups of each chunk.
+    :param file_path: The census file.
+    :return: The dictionary of the final census.
+    """
+    catalogue = make_catalogue(settings.rule, settings.max_period)
+    census = Counter()
+    done = unsettled = 0
+    result = build_census(census, catalogue, settings, 0, 0, 0)
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(workers if workers > 0 else os.cpu_count()) as executor:
+        futures = [executor.submit(search_soups, start, min(chunk_size, soups - start), settings)
+                   for start in range(0, soups, chunk_size)]
+        for future in as_completed(futures):
+            chunk_census, chunk_soups, chunk_unsettled = future.result()
+            census.update(chunk_census)
+            done += chunk_soups
+            unsettled += chunk_unsettled
+            result = build_census(census, catalogue, settings, done, unsettled, time.perf_counter() - start_time)
+            write_census(file_path, result)
+            print(f"Soups: {done} of {soups} ({result['soups_per_second']} soups/s), objects: {sum(census.values())}")
+    return result
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Search random soups and take the census of the still lifes, "
+                                                 "oscillators and spaceships they settle into.")
+    parser.add_argument("-n", "--soups", type=int, default=10000, help="Number of soups to run.")
+    parser.add_argument("-r", "--rule", default=config.RULE,
+                        help="Rule in B/S notation, e.g. B36/S23, or a Generations rule, e.g. B2/S/C3.")
+    parser.add_argument("--seed", type=int, help="Seed of the soups, random by default.")
+    parser.add_argument("--workers", type=int, default=config.SEARCH_WORKERS,
+                        help="Number of worker processes, 0 to use one per CPU.")
+    parser.add_argument("--chunk-size", type=int, default=config.SEARCH_CHUNK_SIZE,
+                        help="Number of soups run together by a worker.")
+    parser.add_argument("-o", "--output", type=Path, default=config.PATH_CENSUS, help="Census file.")
+    args = parser.parse_args(argv)
+
+    try:
+        rule = parse_rule(args.rule)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.soups <= 0 or args.chunk_size <= 0:
+        parser.error("The number of soups and the chunk size must be positive")
+    # The seed is drawn and reported, so that a search can be repeated.
+    seed = args.seed if args.seed is not None else int(np.random.randint(2 ** 31))
+    settings = SearchSettings(rule, seed, config.SEARCH_SOUP_SIZE, config.SEARCH_DENSITY, config.SEARCH_MARGIN,
+                              config.SEARCH_MAX_GENERATIONS, config.SEARCH_MAX_PERIOD)
+    print(f"Rule: {rule}, seed: {seed}")
+    result = run_search(args.soups, settings, args.workers, args.chunk_size, args.output)
+
+    print(f"Unsettled soups: {result['unsettled']}")
+    for found in result["objects"][:10]:
+        print(f"{found['count']:>10} {found['code']} {found['name'] or ''}")
+    print(f"Census written in {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,153 @@
+import numpy as np
+
+from engine.gol_engine import GOLEngine, age_cells
+
+# Number of cells stored in each word of the packed grid.
+WORD_BITS = 64
+
+_ONE = np.uint64(1)
+_LAST = np.uint64(WORD_BITS - 1)
+
+
+def pack_grid(grid: np.ndarray) -> np.ndarray:
+    """
+    Pack the alive cells of a grid into 64 bit words: the cell at column c is stored in the bit c % 64 of the word
+    c // 64 of its row. The columns that exceed the grid width are dead.
+    :param grid: The grid to pack, every non zero cell is alive.
+    :return: The uint64 array of shape (rows, ceil(columns / 64)).
+    """
+    rows, cols = grid.shape
+    words = -(-cols // WORD_BITS)
+    bits = np.zeros((rows, words * WORD_BITS), dtype=bool)
+    bits[:, :cols] = grid
+    packed = np.packbits(bits, axis=1, bitorder="little")
+    return packed.view("<u8").astype(np.uint64)
+
+
+def unpack_grid(words: np.ndarray, cols: int) -> np.ndarray:
+    """
+    Unpack a grid packed with pack_grid.
+    :param words: The packed grid.
+    :param cols: The number of columns of the grid.
+    :return: The uint8 grid where alive cells are 1 and dead cells are 0.
+    """
+    packed = words.astype("<u8").view(np.uint8)
+    return np.unpackbits(packed, axis=1, bitorder="little")[:, :cols]
+
+
+def popcount(words: np.ndarray) -> int:
+    """
+    Count the bits set in an array of words.
+    :param words: The uint64 array.
+    :return: The number of bits set.
+    """
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(words).sum())
+    return int(np.count_nonzero(np.unpackbits(words.view(np.uint8))))
+
+
+def _shift_west(words: np.ndarray) -> np.ndarray:
+    # Each bit receives the value of the cell on its left (column - 1).
+    shifted = words << _ONE
+    shifted[:, 1:] |= words[:, :-1] >> _LAST
+    return shifted
+
+
+def _shift_east(words: np.ndarray) -> np.ndarray:
+    # Each bit receives the value of the cell on its right (column + 1).
+    shifted = words >> _ONE
+    shifted[:, :-1] |= words[:, 1:] << _LAST
+    return shifted
+
+
+class BitPackedEngine(GOLEngine):
+    """
+    Engine that stores 64 cells per uint64 word and counts the neighbors with bit-sliced adders, so that a single
+    bitwise operation updates 64 cells at once.
+    Cells outside the grid are considered dead, as in the ConvolutionEngine.
+    The ages are kept in a separate uint8 grid only when they are tracked.
+    """
+
+    name = "bitpacked"
+
+    def get_grid(self) -> np.ndarray:
+        if self._track_age:
+            return self._ages.copy()
+        return unpack_grid(self._words, self._cols)
+
+    def get_grid_size(self) -> tuple:
+        return self._words.shape[0], self._cols
+
+    def get_state_hash(self) -> int:
+        return hash(self._words.tobytes())
+
+    def _set_grid(self, grid: np.ndarray) -> None:
+        grid = np.asarray(grid)
+        self._cols = grid.shape[1]
+        self._words = pack_grid(grid)
+
+        # Mask of the bits of the last word that belong to the grid.
+        tail = self._cols % WORD_BITS
+        self._tail_mask = np.uint64((1 << tail) - 1) if tail else ~np.uint64(0)
+
+        self._ages = np.array(grid, dtype=np.uint8) if self._track_age else None
+
+    def _is_alive(self, row: int, col: int) -> bool:
+        word, bit = divmod(col, WORD_BITS)
+        return bool((self._words[row, word] >> np.uint64(bit)) & _ONE)
+
+    def _set_cell(self, row: int, col: int, age: int) -> None:
+        word, bit = divmod(col, WORD_BITS)
+        mask = _ONE << np.uint64(bit)
+        if age:
+            self._words[row, word] |= mask
+        else:
+            self._words[row, word] &= ~mask
+        if self._track_age:
+            self._ages[row, col] = age
+
+    def _step(self) -> tuple:
+        alive = self._words
+        west = _shift_west(alive)
+        east = _shift_east(alive)
+
+        # Horizontal sums of each row, as 2 bit numbers (sum, carry).
+        # The sum of three cells (west, center, east) is used for the rows above and below.
+        row_xor = west ^ east
+        row_and = west & east
+        sum3 = row_xor ^ alive
+        carry3 = row_and | (row_xor & alive)
+
+        # Align the rows above and below with the current row. Rows outside the grid are dead.
+        rows = alive.shape[0]
+        sum3_pad = np.zeros((rows + 2, alive.shape[1]), dtype=np.uint64)
+        carry3_pad = np.zeros_like(sum3_pad)
+        sum3_pad[1:-1] = sum3
+        carry3_pad[1:-1] = carry3
+        sum_up, sum_down = sum3_pad[:-2], sum3_pad[2:]
+        carry_up, carry_down = carry3_pad[:-2], carry3_pad[2:]
+
+        # Full adder of the unit bits: the neighbors count is sum0 + 2 * (number of bits set in the twos bits).
+        sum0 = sum_up ^ row_xor ^ sum_down
+        carry0 = (sum_up & row_xor) | (sum_down & (sum_up ^ row_xor))
+
+        # Half adders of the four twos bits (carry_up, row_and, carry_down, carry0).
+        twos_a = carry_up ^ row_and
+        fours_a = carry_up & row_and
+        twos_b = carry_down ^ carry0
+        fours_b = carry_down & carry0
+
+        # The count is 2 or 3 when exactly one of the twos bits is set.
+        one_two = (twos_a ^ twos_b) & ~(twos_a & twos_b) & ~(fours_a | fours_b)
+
+        # A cell is alive with 3 neighbors (sum0 set) or with 2 neighbors if it was already alive.
+        next_words = one_two & (sum0 | alive)
+        next_words[:, -1] &= self._tail_mask
+        self._words = next_words
+        births = popcount(next_words & ~alive)
+        deaths = self._population - popcount(next_words & alive)
+
+        if self._track_age:
+            self._ages = age_cells(self._ages, unpack_grid(next_words, self._cols))
+
+        return births, deaths
@@ -0,0 +1,175 @@
+from collections import namedtuple
+
+import numpy as np
+from scipy import ndimage
+
+from engine.gol_engine import ConvolutionEngine
+from engine.rules import CONWAY, Rule
+
+# Kinds of objects, used as the prefix of their codes like in apgsearch: still lifes, oscillators and spaceships.
+STILL_LIFE = "xs"
+OSCILLATOR = "xp"
+SPACESHIP = "xq"
+# Code of the objects that are not periodic within the maximum period, e.g. the debris of a soup that didn't settle.
+UNCLASSIFIED = "unclassified"
+
+# Cells closer than this distance may affect each other in a generation, so they are grouped in the same object.
+_INTERACTION_DISTANCE = 2
+
+# An object of the census: its canonical code, its kind, its period and its population (in its first phase).
+CensusObject = namedtuple("CensusObject", ["code", "kind", "period", "population"])
+
+
+def locate_objects(grid: np.ndarray) -> list:
+    """
+    Split the ash of a soup into separate objects.
+    The cells closer than the interaction distance are grouped, so that the objects made of several islands, like the
+    aircraft carrier, are kept whole. The census splits a group into its islands (the groups of touching cells) only if
+    they are all periodic on their own, like the two blocks of a bi-block.
+    :param grid: The grid.
+    :return: The objects as tuples with the slices of their bounding box in the grid and the object cropped to it.
+    """
+    objects = []
+    # Each cell is grown into a square with the side of the interaction distance, so that the squares of two cells
+    # touch if and only if the cells are close enough to interact.
+    occupied = grid != 0
+    grown = ndimage.binary_dilation(occupied, np.ones((_INTERACTION_DISTANCE, _INTERACTION_DISTANCE), bool))
+    groups, count = ndimage.label(grown, np.ones((3, 3), bool))
+    groups[~occupied] = 0
+    for index, box in enumerate(ndimage.find_objects(groups)):
+        objects.append((box, np.where(groups[box] == index + 1, grid[box], 0).astype(np.uint8)))
+    return objects
+
+
+def split_objects(grid: np.ndarray) -> list:
+    """
+    :param grid: The grid.
+    :return: The objects of the grid (see locate_objects), each cropped to its bounding box.
+    """
+    return [grid_object for _, grid_object in locate_objects(grid)]
+
+
+def split_islands(grid_object: np.ndarray) -> list:
+    """
+    :param grid_object: An object.
+    :return: The islands of the object, the groups of touching cells, each cropped to its bounding box.
+    """
+    islands, count = ndimage.label(grid_object != 0, np.ones((3, 3), bool))
+    if count == 1:
+        return [grid_object]
+    return [np.where(islands[box] == index + 1, grid_object[box], 0).astype(np.uint8)
+            for index, box in enumerate(ndimage.find_objects(islands))]
+
+
+def canonical_code(phases: list) -> str:
+    """
+    Compute a code that identifies an object whatever its phase, orientation and position.
+    :param phases: The phases of the object, each cropped to its bounding box.
+    :return: The smallest encoding of all the phases in all the 8 orientations, as rows, columns and hexadecimal
+    cells, e.g. "2x2_f0" for the block.
+    """
+    keys = []
+    for phase in phases:
+        for flipped in (phase, phase[::-1]):
+            for turns in range(4):
+                oriented = np.rot90(flipped, turns)
+                # The cells of a Life-like rule are packed in bits, the states of a Generations rule are kept whole.
+                cells = np.packbits(oriented) if oriented.max() <= 1 else np.ascontiguousarray(oriented)
+                keys.append((oriented.shape, cells.tobytes()))
+    (rows, cols), cells = min(keys)
+    return f"{rows}x{cols}_{cells.hex()}"
+
+
+class ObjectClassifier:
+    """
+    Class that classifies the objects of the ash of a soup by running them in isolation until they return to their
+    initial phase: a still life has period 1, an oscillator returns in the same place and a spaceship moved.
+    The results are memoized by the shape and the cells of the phase, since the same few objects make most of the
+    ash.
+    """
+
+    def __init__(self, rule: Rule = CONWAY, max_period: int = 64):
+        self._rule = rule
+        self._max_period = max_period
+        self._cache = {}
+
+    def get_rule(self) -> Rule:
+        return self._rule
+
+    def classify(self, grid_object: np.ndarray) -> CensusObject:
+        """
+        :param grid_object: The object, which may be in any phase.
+        :return: The object of the census, None if the object is not periodic within the maximum period.
+        """
+        grid_object = _crop(grid_object)[0]
+        key = (grid_object.shape, grid_object.tobytes())
+        if key not in self._cache:
+            self._cache[key] = self._run(grid_object)
+        return self._cache[key]
+
+    def census(self, grid: np.ndarray) -> list:
+        """
+        :param grid: The ash of a soup.
+        :return: The codes of the objects found in the grid, UNCLASSIFIED for the objects that are not periodic.
+        """
+        codes = []
+        for grid_object in split_objects(grid):
+            islands = split_islands(grid_object)
+            found = [self.classify(island) for island in islands] if len(islands) > 1 else [None]
+            if None in found:
+                found = [self.classify(grid_object)]
+            codes.extend(UNCLASSIFIED if found_object is None else found_object.code for found_object in found)
+        return codes
+
+    def _run(self, grid_object: np.ndarray) -> CensusObject:
+        # The margin leaves room for a spaceship as fast as the light to move for the whole maximum period.
+        rows, cols = grid_object.shape
+        margin = self._max_period + 1
+        grid = np.zeros((rows + 2 * margin, cols + 2 * margin), np.uint8)
+        grid[margin:margin + rows, margin:margin + cols] = grid_object
+        engine = ConvolutionEngine(grid, track_age=False, rule=self._rule)
+        population = engine.get_cells_count()
+
+        phases = [grid_object]
+        for period in range(1, self._max_period + 1):
+            engine.step()
+            phase, top, left = _crop(engine.get_grid())
+            if phase.size == 0:
+                return None
+            if phase.shape == grid_object.shape and np.array_equal(phase, grid_object):
+                if (top, left) != (margin, margin):
+                    kind = SPACESHIP
+                else:
+                    kind = STILL_LIFE if period == 1 else OSCILLATOR
+                prefix = population if kind == STILL_LIFE else period
+                return CensusObject(f"{kind}{prefix}_{canonical_code(phases)}", kind, period, population)
+            phases.append(phase)
+        return None
+
+
+def _crop(grid: np.ndarray) -> tuple:
+    """
+    :param grid: A grid.
+    :return: The grid cropped to the bounding box of its cells that are not dead (empty if there are none), with its
+    first row and column in the grid.
+    """
+    rows = np.flatnonzero(grid.any(axis=1))
+    if rows.size == 0:
+        return grid[:0, :0], 0, 0
+    cols = np.flatnonzero(grid.any(axis=0))
+    return grid[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1], rows[0], cols[0]
+
+
+def build_catalogue(classifier: ObjectClassifier, patterns: dict) -> dict:
+    """
+    Find the codes of the known patterns, to name the objects of the census.
+    :param classifier: The classifier of the objects.
+    :param patterns: The known patterns, indexed by name.
+    :return: The names of the periodic patterns, indexed by code.
+    """
+    catalogue = {}
+    for name, grid_pattern in sorted(patterns.items()):
+        found = classifier.classify(grid_pattern)
+        if found is not None:
+            catalogue.setdefault(found.code, name)
+    return catalogue
@@ -0,0 +1,66 @@
+from collections import deque
+
+from engine.gol_engine import GOLEngine
+
+
+class CycleDetector:
+    """
+    Class that detects when the grid returns to a state seen in a window of recent generations, i.e. when the pattern
+    settled into still lifes (period 1) or oscillators. Only the alive cells are compared, through a hash of the
+    state computed by the engine.
+    """
+
+    def __init__(self, window: int):
+        # The number of recent generations remembered.
+        self._window = window
+        self._history = deque()
+        # The last generation of each remembered state, indexed by the state hash.
+        self._seen = {}
+
+    def is_empty(self) -> bool:
+        return not self._history
+
+    def reset(self) -> None:
+        self._history.clear()
+        self._seen.clear()
+
+    def update(self, state_hash: int, time: int) -> int:
+        """
+        Record the state of a generation.
+        :param state_hash: The hash of the alive cells.
+        :param time: The generation.
+        :return: The period of the cycle if the state was already seen in the window, otherwise None.
+        """
+        previous = self._seen.get(state_hash)
+        self._seen[state_hash] = time
+        self._history.append((state_hash, time))
+        if len(self._history) > self._window:
+            old_hash, old_time = self._history.popleft()
+            if self._seen.get(old_hash) == old_time:
+                del self._seen[old_hash]
+        return time - previous if previous is not None else None
+
+
+def run_detecting_cycles(engine: GOLEngine, generations: int, detector: CycleDetector) -> int:
+    """
+    Compute the given number of generations, checking at every step if the grid entered a cycle. Once it did, the
+    whole periods left are skipped without computing them and only the remaining generations are computed.
+    :param engine: The engine that computes the generations.
+    :param generations: The number of generations to compute.
+    :param detector: The detector, which must already contain the previous generations or be empty.
+    :return: The period of the cycle, None if no cycle was found.
+    """
+    period = None
+    if detector.is_empty():
+        period = detector.update(engine.get_state_hash(), engine.get_time())
+    done = 0
+    while done < generations:
+        if period is not None:
+            left = generations - done
+            engine.skip_generations(left - left % period, period)
+            engine.run(left % period)
+            break
+        engine.step()
+        done += 1
+        period = detector.update(engine.get_state_hash(), engine.get_time())
+    return period
@@ -0,0 +1,34 @@
+import numpy as np
+
+from engine.bitpacked_engine import BitPackedEngine
+from engine.gol_engine import GOLEngine, ConvolutionEngine
+from engine.hashlife_engine import HashLifeEngine
+from engine.memmap_engine import MemmapEngine
+from engine.parallel_engine import ParallelEngine
+from engine.rules import CONWAY, Rule
+from engine.sparse_engine import SparseEngine
+from engine.tiled_engine import TiledEngine
+
+# Engines that can be selected through the configuration file, indexed by name.
+ENGINES = {engine.name: engine for engine in [ConvolutionEngine, BitPackedEngine, HashLifeEngine, SparseEngine,
+                                                TiledEngine, ParallelEngine, MemmapEngine]}
+
+
+def create_engine(name: str, grid: np.ndarray, track_age: bool = True, rule: Rule = CONWAY) -> GOLEngine:
+    """
+    Create the engine registered with the given name.
+    :param name: The name of the engine.
+    :param grid: The initial age grid of the engine.
+    :param track_age: Flag that indicates if the engine computes the age of the cells.
+    :param rule: The rule computed by the engine. The engines that don't support rules compute only the Conway's rule.
+    :return: The engine initialized with the given grid.
+    """
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine '{name}'. Available engines: {', '.join(ENGINES)}")
+    engine_class = ENGINES[name]
+    if engine_class.supports_rules:
+        return engine_class(grid, track_age, rule)
+    if rule != CONWAY:
+        raise ValueError(f"The {name} engine computes only the {CONWAY} rule. Rules are supported by: "
+                         f"{', '.join(engine.name for engine in ENGINES.values() if engine.supports_rules)}")
+    return engine_class(grid, track_age)
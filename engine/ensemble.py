@@ -0,0 +1,213 @@
+import numpy as np
+
+from engine.gol_engine import lookup_generation, make_step_buffers
+from engine.rules import CONWAY, Rule, make_lookup_table
+from utils.config import config
+
+# Seed of the weights of the state hashes, fixed so that the hashes are reproducible.
+_HASH_SEED = 0x5EED
+
+
+def random_grids(batch: int, grid_size: tuple, density: float, seed: int = None) -> np.ndarray:
+    """
+    Create a batch of random soups.
+    :param batch: The number of grids.
+    :param grid_size: The size of each grid as (rows, columns).
+    :param density: The probability of each cell to be alive.
+    :param seed: The seed of the random generator, None for a random seed.
+    :return: The uint8 (batch, rows, columns) array of the grids.
+    """
+    rng = np.random.RandomState(seed)
+    return (rng.random_sample((batch,) + tuple(grid_size)) < density).astype(np.uint8)
+
+
+class Ensemble:
+    """
+    Batch of independent grids of the same size, stacked in a (batch, rows, columns) array and stepped together: a
+    generation of the whole batch is a single vectorized lookup, as in the ConvolutionEngine, so the cost of small grids
+    is not dominated by the overhead of the Python calls.
+    The population of each member is tracked, and a member settles when it dies out or returns to a state seen in the
+    window of recent generations, i.e. when it settled into still lifes and oscillators. The states are compared
+    through a hash computed for the whole batch at once. The settled members are dropped from the active batch, so the
+    cost of a generation follows the number of members that are still evolving.
+    Cells outside the grids are considered dead.
+    """
+
+    def __init__(self, grids: np.ndarray, track_age: bool = False, rule: Rule = CONWAY,
+                 window: int = config.CYCLE_WINDOW):
+        grids = np.asarray(grids, np.uint8)
+        if grids.ndim != 3:
+            raise ValueError(f"The grids must be stacked in a (batch, rows, columns) array, not {grids.shape}")
+        batch, rows, cols = grids.shape
+        self._rule = rule
+        # The table of the next states, built for the rule.
+        self._table = make_lookup_table(rule, track_age)
+        # The number of recent generations compared to detect the cycles, at least 1.
+        self._window = max(window, 1)
+        self._time = 0
+
+        # The grids of the active members are packed at the start of the two buffers, the current one is
+        # self._grids[self._current].
+        self._grids = [grids.copy(), np.empty_like(grids)]
+        self._current = 0
+        # The member of each active grid.
+        self._members = np.arange(batch)
+        self._padded = np.zeros((batch, rows + 2, cols + 2), np.uint8)
+        self._buffers = make_step_buffers(grids.shape)
+
+        # The state of each member: its population, the generation in which it settled and the period of its cycle,
+        # -1 and 0 while it's active, and its grid once it settled.
+        self._population = np.array([rule.count_alive(grid) for grid in grids], np.int64)
+        self._settled_time = np.full(batch, -1, np.int64)
+        self._period = np.zeros(batch, np.int64)
+        self._final_grids = np.zeros_like(grids)
+
+        # Ring buffer of the state hashes of the recent generations of each member, with the generation of each slot
+        # (-1 if the slot is empty).
+        weights = np.random.RandomState(_HASH_SEED).randint(1, 2 ** 62, self._hash_length(rows, cols), np.int64)
+        self._hash_weights = weights.astype(np.uint64) * np.uint64(2) + np.uint64(1)
+        self._history = np.zeros((self._window, batch), np.uint64)
+        self._history_time = np.full(self._window, -1, np.int64)
+        self._settle(self._hash(self._grids[0][:batch]))
+
+    def get_batch_size(self) -> int:
+        return self._population.size
+
+    def get_grid_size(self) -> tuple:
+        return self._grids[0].shape[1:]
+
+    def get_time(self) -> int:
+        return self._time
+
+    def get_rule(self) -> Rule:
+        return self._rule
+
+    def get_active_count(self) -> int:
+        return self._members.size
+
+    def get_active_members(self) -> np.ndarray:
+        return self._members.copy()
+
+    def get_populations(self) -> np.ndarray:
+        """
+        :return: The number of alive cells of each member, at its last generation.
+        """
+        return self._population.copy()
+
+    def get_settled_times(self) -> np.ndarray:
+        """
+        :return: The generation in which each member settled, -1 for the active members.
+        """
+        return self._settled_time.copy()
+
+    def get_periods(self) -> np.ndarray:
+        """
+        :return: The period of the cycle of each settled member, 1 for the members that died out or became still
+        lifes, 0 for the active members.
+        """
+        return self._period.copy()
+
+    def get_grid(self, member: int) -> np.ndarray:
+        """
+        :param member: The index of the member in the batch.
+        :return: A copy of the current grid of an active member, or of the grid in which a settled member settled.
+        """
+        position = np.flatnonzero(self._members == member)
+        if position.size:
+            return self._grids[self._current][position[0]].copy()
+        return self._final_grids[member].copy()
+
+    def get_active_grids(self) -> np.ndarray:
+        """
+        :return: A copy of the current grids of the active members, in the order of get_active_members.
+        """
+        return self._grids[self._current][:self._members.size].copy()
+
+    def set_grid(self, member: int, grid: np.ndarray) -> None:
+        """
+        Replace the current grid of an active member, e.g. to remove the spaceships that are about to leave it.
+        :param member: The index of the member in the batch.
+        :param grid: The new grid, of the grid size.
+        """
+        position = np.flatnonzero(self._members == member)
+        if position.size == 0:
+            raise ValueError(f"The member {member} is not active")
+        self._grids[self._current][position[0]] = grid
+        self._population[member] = self._rule.count_alive(grid)
+
+    def step(self) -> None:
+        """
+        Compute the next generation of the active members and drop the ones that settled.
+        """
+        active = self._members.size
+        if active == 0:
+            return
+        grids_curr = self._grids[self._current][:active]
+        grids_next = self._grids[1 - self._current][:active]
+        padded = self._padded[:active]
+        self._rule.get_alive(grids_curr, out=padded[:, 1:-1, 1:-1].view(bool))
+        lookup_generation(grids_curr, padded, self._table, grids_next, self._buffers)
+        self._current = 1 - self._current
+        self._time += 1
+
+        alive = self._rule.get_alive(grids_next)
+        self._population[self._members] = np.count_nonzero(alive.reshape(active, -1), axis=1)
+        self._settle(self._hash(grids_next, alive))
+
+    def run(self, generations: int) -> int:
+        """
+        Compute the given number of generations, or less if all the members settle before.
+        :param generations: The maximum number of generations to compute.
+        :return: The number of generations computed.
+        """
+        start = self._time
+        while self._time - start < generations and self._members.size:
+            self.step()
+        return self._time - start
+
+    def _hash_length(self, rows: int, cols: int) -> int:
+        # The alive cells of a Life-like rule are hashed in packed bits, the states of a Generations rule in bytes.
+        return rows * cols if self._rule.is_generations() else rows * -(-cols // 8)
+
+    def _hash(self, grids: np.ndarray, alive: np.ndarray = None) -> np.ndarray:
+        """
+        :param grids: The grids of the active members.
+        :param alive: The alive cells of the grids, None to compute them.
+        :return: A 64 bit hash of the state of each grid: a weighted sum of its bytes, with random odd weights.
+        """
+        if self._rule.is_generations():
+            data = grids
+        else:
+            data = np.packbits(self._rule.get_alive(grids) if alive is None else alive, axis=-1)
+        return np.dot(data.reshape(grids.shape[0], -1).astype(np.uint64), self._hash_weights)
+
+    def _settle(self, hashes: np.ndarray) -> None:
+        """
+        Record the state hashes of the current generation, find the members that died out or returned to a recent
+        state and drop them from the active batch.
+        :param hashes: The hash of each active member.
+        """
+        members = self._members
+        # Compare the hashes with the ones of the recent generations of the same members.
+        history = self._history[:, members]
+        matches = (history == hashes) & (self._history_time >= 0)[:, np.newaxis]
+        periods = np.where(matches, self._time - self._history_time[:, np.newaxis], np.iinfo(np.int64).max).min(axis=0)
+        settled = matches.any(axis=0)
+        periods[self._population[members] == 0] = 1
+        settled |= self._population[members] == 0
+
+        slot = self._time % self._window
+        self._history[slot, members] = hashes
+        self._history_time[slot] = self._time
+        if not settled.any():
+            return
+
+        grids = self._grids[self._current][:members.size]
+        settled_members = members[settled]
+        self._settled_time[settled_members] = self._time
+        self._period[settled_members] = periods[settled]
+        self._final_grids[settled_members] = grids[settled]
+        # Pack the grids of the members left at the start of the buffer.
+        keep = ~settled
+        self._members = members[keep]
+        grids[:self._members.size] = grids[keep]
@@ -0,0 +1,338 @@
+from collections import namedtuple
+
+import numpy as np
+
+from engine.rules import CONWAY, NEIGHBOR_COUNTS, Rule, make_lookup_table
+from utils import pattern
+
+
+def age_cells(grid_curr_age: np.ndarray, grid_next_alive: np.ndarray) -> np.ndarray:
+    """
+    Compute the age grid of the next generation from the current ages and the next alive cells.
+    A surviving cell grows one step older (up to 255), a newborn cell has age 1 and a dead cell has age 0.
+    :param grid_curr_age: The uint8 age grid of the current generation.
+    :param grid_next_alive: The grid of the cells alive at the next generation (boolean or 0/1 values).
+    :return: The uint8 age grid of the next generation.
+    """
+    grid_next_alive = grid_next_alive.astype(np.uint8)
+    # Survived cells keep their age. The cap at 254 avoids the uint8 overflow when the unit is added.
+    grid_next = np.minimum(grid_curr_age, 254) * grid_next_alive
+    grid_next += grid_next_alive
+    return grid_next
+
+
+def skip_ages(grid_age: np.ndarray, generations: int, period: int) -> None:
+    """
+    Update in place the ages of a grid in a cycle, as if the given number of generations were computed.
+    The cells at least as old as the period were alive in every state of the cycle, so they stay alive and grow older
+    (up to 255). The younger cells die and are born again in each period, so they are back to the same age.
+    :param grid_age: The uint8 age grid.
+    :param generations: The number of generations skipped, a multiple of the period.
+    :param period: The period of the cycle.
+    """
+    settled = grid_age >= period
+    grid_age[settled] = np.minimum(grid_age[settled].astype(np.int64) + generations, 255)
+
+
+# Work arrays of lookup_generation: the sums along the rows of the padded grid, the neighbor counts and the index of
+# the lookup, computed as uint16 and then widened to the native integer type of numpy.
+StepBuffers = namedtuple("StepBuffers", ["row_sums", "neighbors", "small_index", "index"])
+
+
+def make_step_buffers(shape: tuple) -> StepBuffers:
+    """
+    Allocate the work arrays of lookup_generation.
+    :param shape: The largest grid stepped with the arrays as (rows, columns), or the largest batch of grids as (batch,
+    rows, columns). Grids with fewer rows, or batches with fewer grids, use a part of them.
+    :return: The work arrays.
+    """
+    shape = tuple(shape)
+    return StepBuffers(np.empty(shape[:-2] + (shape[-2] + 2, shape[-1]), np.uint8), np.empty(shape, np.uint8),
+                       np.empty(shape, np.uint16), np.empty(shape, np.intp))
+
+
+def lookup_generation(grid_curr: np.ndarray, padded_alive: np.ndarray, table: np.ndarray, out: np.ndarray = None,
+                      buffers: StepBuffers = None) -> np.ndarray:
+    """
+    Compute the next generation of a grid, or of a batch of grids stacked along the first axis, with a lookup table of
+    the next states. With the output grid and the work arrays given, nothing is allocated.
+    :param grid_curr: The uint8 grid of the current states.
+    :param padded_alive: The uint8 grid of the current alive cells surrounded by a border of one cell, which holds the
+    neighbors beyond the edges of grid_curr.
+    :param table: The table of the next states built by make_lookup_table.
+    :param out: The uint8 grid into which write the next states, None to allocate it.
+    :param buffers: The work arrays made by make_step_buffers, None to allocate them.
+    :return: The uint8 grid of the next states.
+    """
+    if buffers is None:
+        buffers = make_step_buffers(grid_curr.shape)
+    # The work arrays are sliced along the first axis: the rows of a grid or the grids of a batch.
+    count = grid_curr.shape[0]
+    row_sums = buffers.row_sums[:count + 2 if grid_curr.ndim == 2 else count]
+    grid_neighbors, small_index, index = buffers.neighbors[:count], buffers.small_index[:count], buffers.index[:count]
+
+    # Sum the alive cells of each 3x3 block, first along the rows then along the columns, and remove the cell itself to
+    # count its neighbors.
+    np.add(padded_alive[..., :-2], padded_alive[..., 1:-1], out=row_sums)
+    row_sums += padded_alive[..., 2:]
+    np.add(row_sums[..., :-2, :], row_sums[..., 1:-1, :], out=grid_neighbors)
+    grid_neighbors += row_sums[..., 2:, :]
+    grid_neighbors -= padded_alive[..., 1:-1, 1:-1]
+
+    # Look up the next state of each cell: the births, the deaths, the decay and the age of the cells are all in the
+    # table, so the whole generation is a single gather. The index is computed on 16 bits, which is faster, then
+    # widened to the integer type that take would otherwise convert it to in a temporary array. It's always within the
+    # table, so it's not checked.
+    np.multiply(grid_curr, NEIGHBOR_COUNTS, out=small_index, dtype=np.uint16)
+    small_index += grid_neighbors
+    np.copyto(index, small_index)
+    return table.take(index, out=out, mode="clip")
+
+
+class GOLEngine:
+    """
+    Base class of the engines that compute the evolution of the Game of Life grid.
+    An engine holds its own grid and does not depend on Qt, so it can run headless and at full speed.
+    The grid exchanged with the engine is the uint8 age grid used by the GOLModel.
+    The population is kept up to date incrementally: every step returns the number of births and deaths it caused and
+    every edit changes it by one, so the grid never needs to be scanned to count the alive cells.
+    """
+
+    # Name used to select the engine in the configuration file.
+    name = None
+    # Flag that indicates if the universe extends beyond the grid. When it does, the grid is a window over the
+    # universe and the cells that leave it keep evolving.
+    unbounded = False
+    # Flag that indicates if the engine computes any Life-like or Generations rule. When it does not, it computes only
+    # the Conway's rule.
+    supports_rules = False
+    # The rule computed by the engine.
+    _rule = CONWAY
+
+    def __init__(self, grid: np.ndarray, track_age: bool = True):
+        # Flag that indicates if the age of the cells is computed. When it is not, every alive cell has age 1.
+        self._track_age = track_age
+        # The number of steps taken.
+        self._time = 0
+        # The number of alive cells, and the cells born and dead in the last generation.
+        self._population = 0
+        self._births = 0
+        self._deaths = 0
+        self.set_grid(grid)
+
+    def get_grid(self) -> np.ndarray:
+        return self._grid.copy()
+
+    def get_grid_size(self) -> tuple:
+        return self._grid.shape
+
+    def get_time(self) -> int:
+        return self._time
+
+    def get_cells_count(self) -> int:
+        return self._population
+
+    def get_rule(self) -> Rule:
+        return self._rule
+
+    def get_births(self) -> int:
+        """
+        :return: The number of cells born in the last generation, None if the engine doesn't compute it.
+        """
+        return self._births
+
+    def get_deaths(self) -> int:
+        """
+        :return: The number of cells dead in the last generation, None if the engine doesn't compute it.
+        """
+        return self._deaths
+
+    def get_state_hash(self) -> int:
+        """
+        :return: A hash of the alive cells, which doesn't depend on the age of the cells.
+        """
+        return hash(np.packbits(self.get_grid()).tobytes())
+
+    def set_grid(self, grid: np.ndarray) -> None:
+        self._set_grid(grid)
+        self._reset_stats(self._rule.count_alive(grid))
+
+    def set_rule(self, rule: Rule) -> None:
+        """
+        Change the rule computed by the engine.
+        :param rule: The new rule.
+        """
+        if rule != CONWAY:
+            raise ValueError(f"The {self.name} engine computes only the {CONWAY} rule")
+
+    def set_cell(self, row: int, col: int, age: int) -> None:
+        """
+        Change the state of a single cell of the grid.
+        :param row: The row of the cell.
+        :param col: The column of the cell.
+        :param age: The new age of the cell, 0 if the cell is dead.
+        """
+        was_alive = self._is_alive(row, col)
+        self._set_cell(row, col, age)
+        self._population += int(self._rule.is_alive(age)) - int(was_alive)
+
+    def load_pattern(self, grid_pattern: np.ndarray) -> bool:
+        """
+        Replace the grid state with a pattern placed at the center of the grid.
+        :param grid_pattern: Numpy array representing the pattern.
+        :return: False if the pattern doesn't fit the grid, otherwise True.
+        """
+        grid = pattern.place_pattern(grid_pattern, self.get_grid_size())
+        if grid is None:
+            return False
+        self.set_grid(grid)
+        return True
+
+    def reset_time(self) -> None:
+        self._time = 0
+
+    def set_time(self, value: int) -> None:
+        """
+        Set the number of steps taken, e.g. when a session is restored from a checkpoint.
+        :param value: The generation of the current grid.
+        """
+        self._time = value
+
+    def step(self) -> None:
+        """
+        Compute the next generation of the grid.
+        """
+        self._update_stats(*self._step())
+        self._time += 1
+
+    def skip_generations(self, generations: int, period: int) -> None:
+        """
+        Advance the time without computing the generations. It's valid only when the grid is in a cycle whose period
+        divides the number of generations, since the alive cells are the same at the end of the skipped generations.
+        The ages of the cells alive for the whole cycle are increased by the skipped generations.
+        :param generations: The number of generations to skip.
+        :param period: The period of the cycle.
+        """
+        if self._track_age and not self._rule.is_generations() and generations > 0:
+            self._skip_ages(generations, period)
+        self._time += generations
+
+    def _skip_ages(self, generations: int, period: int) -> None:
+        # The ages are updated on a copy of the grid, which then replaces the grid keeping the statistics.
+        grid = self.get_grid()
+        if (grid >= period).any():
+            skip_ages(grid, generations, period)
+            self._set_grid(grid)
+
+    def run(self, generations: int) -> None:
+        """
+        Compute the given number of generations without any intermediate notification.
+        :param generations: The number of generations to compute.
+        """
+        for _ in range(generations):
+            self._update_stats(*self._step())
+        self._time += generations
+
+    def _reset_stats(self, population: int) -> None:
+        self._population = population
+        self._births = 0
+        self._deaths = 0
+
+    def _update_stats(self, births: int, deaths: int) -> None:
+        self._births = births
+        self._deaths = deaths
+        self._population += births - deaths
+
+    def _set_grid(self, grid: np.ndarray) -> None:
+        self._grid = np.array(grid, dtype=np.uint8)
+
+    def _is_alive(self, row: int, col: int) -> bool:
+        return self._rule.is_alive(self._grid[row, col])
+
+    def _set_cell(self, row: int, col: int, age: int) -> None:
+        self._grid[row, col] = age
+
+    def _step(self) -> tuple:
+        """
+        Compute the next generation of the grid.
+        :return: A tuple with the number of births and deaths.
+        """
+        raise NotImplementedError
+
+
+class ConvolutionEngine(GOLEngine):
+    """
+    Engine that counts the neighbors of each cell with a 3x3 convolution, computed as a separable sum of shifted views,
+    then finds the next state of every cell with a single lookup in a table indexed by its current state and its number
+    of neighbors.
+    The step doesn't allocate any array: the grid is double buffered, the next generation is written into the other
+    buffer, which then becomes the current one, and the neighbor counts and the other work arrays are preallocated.
+    It computes any Life-like or Generations rule. Cells outside the grid are considered dead.
+    """
+
+    name = "convolution"
+    supports_rules = True
+
+    def __init__(self, grid: np.ndarray, track_age: bool = True, rule: Rule = CONWAY):
+        self._rule = rule
+        # The table of the next states, built for the rule.
+        self._table = make_lookup_table(rule, track_age)
+        # The two grids, the current one is self._grids[self._current].
+        self._grids = None
+        self._current = 0
+        super().__init__(grid, track_age)
+
+    @property
+    def _grid(self) -> np.ndarray:
+        return self._grids[self._current]
+
+    def get_grid_size(self) -> tuple:
+        return self._grids[0].shape
+
+    def get_state_hash(self) -> int:
+        # The cells in a decay state are part of the state of a Generations rule.
+        if self._rule.is_generations():
+            return hash(self._grid.tobytes())
+        return super().get_state_hash()
+
+    def set_rule(self, rule: Rule) -> None:
+        """
+        Change the rule computed by the engine. If the previous or the new rule is a Generations rule, the cells in a
+        decay state are cleared and the alive cells start again from age 1.
+        :param rule: The new rule.
+        """
+        grid = self._grid
+        if self._rule.is_generations() or rule.is_generations():
+            grid = self._rule.get_alive(grid).astype(np.uint8)
+        self._rule = rule
+        self._table = make_lookup_table(rule, self._track_age)
+        self.set_grid(grid)
+
+    def _set_grid(self, grid: np.ndarray) -> None:
+        grid = np.asarray(grid)
+        if self._grids is None or self.get_grid_size() != grid.shape:
+            self._allocate(grid.shape)
+        self._current = 0
+        self._grids[0][:] = grid
+
+    def _allocate(self, shape: tuple) -> None:
+        rows, cols = shape
+        self._grids = [np.zeros(shape, np.uint8) for _ in range(2)]
+        # The alive cells of the current generation surrounded by a border of dead cells, which is never written.
+        self._padded = np.zeros((rows + 2, cols + 2), np.uint8)
+        self._buffers = make_step_buffers(shape)
+        # The alive cells of the next generation, and the cells born in it.
+        self._next_alive = np.empty(shape, bool)
+        self._born = np.empty(shape, bool)
+
+    def _step(self) -> tuple:
+        grid_curr = self._grids[self._current]
+        grid_next = self._grids[1 - self._current]
+        grid_curr_alive = self._rule.get_alive(grid_curr, out=self._padded[1:-1, 1:-1].view(bool))
+        lookup_generation(grid_curr, self._padded, self._table, grid_next, self._buffers)
+        self._current = 1 - self._current
+
+        # The alive cells are compared as uint8, which is faster than as booleans.
+        grid_next_alive = self._rule.get_alive(grid_next, out=self._next_alive).view(np.uint8)
+        births = int(np.count_nonzero(np.greater(grid_next_alive, grid_curr_alive.view(np.uint8), out=self._born)))
+        return births, self._population + births - int(np.count_nonzero(grid_next_alive))
@@ -0,0 +1,336 @@
+import numpy as np
+
+from engine.gol_engine import GOLEngine
+from utils.config import config
+
+# Rough estimate of the memory taken by a node and its cache entry, used to convert the memory cap in a node count.
+NODE_BYTES = 256
+
+
+class _Node:
+    """
+    Node of the HashLife quadtree.
+    A node of level k represents a square of 2^k x 2^k cells, split in the four quadrants a (north-west),
+    b (north-east), c (south-west) and d (south-east) of level k - 1. The nodes of level 0 are the single cells.
+    Nodes are canonical: two nodes with the same content are the same object, so they are compared by identity.
+    """
+
+    __slots__ = ("k", "a", "b", "c", "d", "n", "h", "results")
+
+    def __init__(self, k: int, a, b, c, d, n: int):
+        self.k = k
+        self.a = a
+        self.b = b
+        self.c = c
+        self.d = d
+        # The population of the node.
+        self.n = n
+        # Hash of the content of the node, which doesn't depend on the identity of the nodes.
+        self.h = n if k == 0 else hash((k, a.h, b.h, c.h, d.h))
+        # Memoised RESULT nodes, indexed by the exponent j of the 2^j generations computed.
+        self.results = {}
+
+
+class HashLifeEngine(GOLEngine):
+    """
+    Engine that implements the HashLife algorithm, which memoises the evolution of the quadtree nodes and can jump
+    2^k generations ahead in a single step on regular patterns.
+    The universe is unbounded: the grid is a window over the universe, so the cells that leave the grid are not
+    shown but they keep evolving, unlike in the other engines where the cells outside the grid are dead.
+    The age of the cells is not tracked: every alive cell has age 1.
+    """
+
+    name = "hashlife"
+    unbounded = True
+
+    def __init__(self, grid: np.ndarray, track_age: bool = True, max_memory_mb: int = config.HASHLIFE_MEMORY_MB):
+        # Canonical nodes, indexed by their four children.
+        self._cache = {}
+        # The maximum number of nodes in the cache before the unreachable ones are evicted.
+        self._max_nodes = max_memory_mb * 1024 * 1024 // NODE_BYTES
+        # The number of nodes in the cache that triggers the next eviction. It grows beyond the maximum when the nodes
+        # reachable from the root alone fill most of the cache, so that they are not collected again at every node.
+        self._collect_threshold = self._max_nodes
+
+        self._off = _Node(0, None, None, None, None, 0)
+        self._on = _Node(0, None, None, None, None, 1)
+        # Canonical empty nodes, indexed by level.
+        self._empty = [self._off]
+
+        super().__init__(grid, track_age)
+
+    def get_grid(self) -> np.ndarray:
+        rows, cols = self._grid_size
+        grid = np.zeros((rows, cols), dtype=np.uint8)
+        # The root is centered at the origin of the universe, the grid window starts at its top left corner.
+        half = 1 << (self._root.k - 1)
+        self._fill(self._root, -half - self._origin[0], -half - self._origin[1], grid)
+        return grid
+
+    def get_grid_size(self) -> tuple:
+        return self._grid_size
+
+    def get_cells_count(self) -> int:
+        # The population of the whole universe, including the cells outside the grid, is stored in the root.
+        return self._root.n
+
+    def get_births(self) -> int:
+        # The generations are computed in jumps, the intermediate births and deaths are unknown.
+        return None
+
+    def get_deaths(self) -> int:
+        return None
+
+    def get_state_hash(self) -> int:
+        # Strip the empty border around the pattern: the center doesn't move, so the same pattern in the same position
+        # always gives the same node.
+        node = self._root
+        while self._is_padded(node) and node.k > 2:
+            node = self._join(node.a.d, node.b.c, node.c.b, node.d.a)
+        return node.h
+
+    def get_cache_size(self) -> int:
+        return len(self._cache)
+
+    def load_pattern(self, grid_pattern: np.ndarray) -> bool:
+        # The pattern is placed at the center of the grid even when it is bigger than the grid.
+        rows, cols = self._grid_size
+        top = (rows - grid_pattern.shape[0]) // 2
+        left = (cols - grid_pattern.shape[1]) // 2
+        self._set_cells(grid_pattern, top, left)
+        return True
+
+    def _set_grid(self, grid: np.ndarray) -> None:
+        self._grid_size = np.shape(grid)
+        self._set_cells(np.asarray(grid), 0, 0)
+
+    def _skip_ages(self, generations: int, period: int) -> None:
+        # The age of the cells is not tracked.
+        pass
+
+    def _is_alive(self, row: int, col: int) -> bool:
+        half = 1 << (self._root.k - 1)
+        row, col = self._origin[0] + row + half, self._origin[1] + col + half
+        if not (0 <= row < 2 * half and 0 <= col < 2 * half):
+            return False
+        node = self._root
+        while node.k > 0:
+            half = 1 << (node.k - 1)
+            node = (node.a, node.b, node.c, node.d)[2 * (row >= half) + (col >= half)]
+            row, col = row % half, col % half
+        return node.n > 0
+
+    def _set_cell(self, row: int, col: int, age: int) -> None:
+        # Grow the root until it contains the cell.
+        half = 1 << (self._root.k - 1)
+        while not (-half <= self._origin[0] + row < half and -half <= self._origin[1] + col < half):
+            self._root = self._centre(self._root)
+            half = 1 << (self._root.k - 1)
+        self._root = self._set_leaf(self._root, self._origin[0] + row + half, self._origin[1] + col + half, age > 0)
+
+    def _set_cells(self, cells: np.ndarray, top: int, left: int) -> None:
+        # Replace the universe with the given cells, whose top left corner is at (top, left) in grid coordinates.
+        # The root is large enough to contain both the cells and the grid.
+        rows, cols = self._grid_size
+        root_top = min(top, 0)
+        root_left = min(left, 0)
+        height = max(rows, top + cells.shape[0]) - root_top
+        width = max(cols, left + cells.shape[1]) - root_left
+        k = max(1, int(np.ceil(np.log2(max(height, width)))))
+        side = 1 << k
+        padded = np.zeros((side, side), dtype=bool)
+        padded[top - root_top:top - root_top + cells.shape[0], left - root_left:left - root_left + cells.shape[1]] = \
+            cells
+        self._root = self._build(padded, k)
+        # Universe coordinates of the top left cell of the grid: the root is centered at the origin.
+        self._origin = (-(side // 2) - root_top, -(side // 2) - root_left)
+
+    def step(self) -> None:
+        self.advance_pow2(0)
+
+    def run(self, generations: int) -> None:
+        self.advance(generations)
+
+    def advance(self, generations: int) -> None:
+        """
+        Compute the given number of generations, jumping by the powers of two that compose it.
+        :param generations: The number of generations to compute.
+        """
+        if generations < 0:
+            raise ValueError("The number of generations can't be negative")
+        j = 0
+        while generations:
+            if generations & 1:
+                self.advance_pow2(j)
+            generations >>= 1
+            j += 1
+
+    def advance_pow2(self, j: int) -> None:
+        """
+        Compute 2^j generations in a single HashLife step.
+        :param j: The exponent of the number of generations.
+        """
+        root = self._root
+        # Pad the root until it can be advanced by 2^j generations and the pattern can't escape the result.
+        while root.k < j + 2 or not self._is_padded(root):
+            root = self._centre(root)
+        root = self._centre(root)
+
+        self._root = self._successor(root, j)
+        self._time += 1 << j
+
+        if len(self._cache) > self._max_nodes:
+            self._collect()
+
+    def advance_to(self, generation: int) -> None:
+        """
+        Compute the generations needed to reach the given one.
+        :param generation: The generation to reach. It can't be lower than the current one.
+        """
+        if generation < self._time:
+            raise ValueError(f"The generation {generation} is already passed")
+        self.advance(generation - self._time)
+
+    def _join(self, a: _Node, b: _Node, c: _Node, d: _Node) -> _Node:
+        key = (a, b, c, d)
+        node = self._cache.get(key)
+        if node is None:
+            node = _Node(a.k + 1, a, b, c, d, a.n + b.n + c.n + d.n)
+            self._cache[key] = node
+        return node
+
+    def _get_empty(self, k: int) -> _Node:
+        while len(self._empty) <= k:
+            e = self._empty[-1]
+            self._empty.append(self._join(e, e, e, e))
+        return self._empty[k]
+
+    def _build(self, cells: np.ndarray, k: int) -> _Node:
+        # Build the quadtree of a 2^k x 2^k boolean array, sharing the empty subtrees.
+        if not cells.any():
+            return self._get_empty(k)
+        if k == 0:
+            return self._on
+        half = 1 << (k - 1)
+        return self._join(self._build(cells[:half, :half], k - 1), self._build(cells[:half, half:], k - 1),
+                          self._build(cells[half:, :half], k - 1), self._build(cells[half:, half:], k - 1))
+
+    def _set_leaf(self, node: _Node, row: int, col: int, alive: bool) -> _Node:
+        # Return a copy of the node with the cell at (row, col), relative to its top left corner, changed.
+        if node.k == 0:
+            return self._on if alive else self._off
+        half = 1 << (node.k - 1)
+        a, b, c, d = node.a, node.b, node.c, node.d
+        if row < half and col < half:
+            a = self._set_leaf(a, row, col, alive)
+        elif row < half:
+            b = self._set_leaf(b, row, col - half, alive)
+        elif col < half:
+            c = self._set_leaf(c, row - half, col, alive)
+        else:
+            d = self._set_leaf(d, row - half, col - half, alive)
+        return self._join(a, b, c, d)
+
+    def _fill(self, node: _Node, row: int, col: int, grid: np.ndarray) -> None:
+        # Write the alive cells of the node, whose top left corner is at (row, col) in grid coordinates.
+        size = 1 << node.k
+        if node.n == 0 or row >= grid.shape[0] or col >= grid.shape[1] or row + size <= 0 or col + size <= 0:
+            return
+        if node.k == 0:
+            grid[row, col] = 1
+            return
+        half = size // 2
+        self._fill(node.a, row, col, grid)
+        self._fill(node.b, row, col + half, grid)
+        self._fill(node.c, row + half, col, grid)
+        self._fill(node.d, row + half, col + half, grid)
+
+    def _centre(self, node: _Node) -> _Node:
+        # Return the node of the next level that has the given node at its center.
+        e = self._get_empty(node.k - 1)
+        return self._join(self._join(e, e, e, node.a), self._join(e, e, node.b, e),
+                          self._join(e, node.c, e, e), self._join(node.d, e, e, e))
+
+    @staticmethod
+    def _is_padded(node: _Node) -> bool:
+        # True if all the alive cells are in the central half of the node.
+        return node.k >= 2 and node.n == node.a.d.n + node.b.c.n + node.c.b.n + node.d.a.n
+
+    def _life_4x4(self, node: _Node) -> _Node:
+        # Compute one generation of the 2x2 center of a node of level 2.
+        cells = [[node.a.a.n, node.a.b.n, node.b.a.n, node.b.b.n],
+                 [node.a.c.n, node.a.d.n, node.b.c.n, node.b.d.n],
+                 [node.c.a.n, node.c.b.n, node.d.a.n, node.d.b.n],
+                 [node.c.c.n, node.c.d.n, node.d.c.n, node.d.d.n]]
+        center = []
+        for row in (1, 2):
+            for col in (1, 2):
+                neighbors = sum(cells[r][c] for r in (row - 1, row, row + 1) for c in (col - 1, col, col + 1)) - \
+                            cells[row][col]
+                alive = neighbors == 3 or (neighbors == 2 and cells[row][col])
+                center.append(self._on if alive else self._off)
+        return self._join(*center)
+
+    def _successor(self, node: _Node, j: int) -> _Node:
+        """
+        Compute the RESULT of a node: its center, of level k - 1, after 2^j generations.
+        :param node: A node of level k >= 2.
+        :param j: The exponent of the number of generations, capped to k - 2.
+        :return: The RESULT node.
+        """
+        j = min(j, node.k - 2)
+        result = node.results.get(j)
+        if result is not None:
+            return result
+        # The cache is also collected during the recursion, so that a single large jump can't grow it without bound.
+        # The nodes being advanced are kept alive by the recursion: only the memoised results are lost, and the nodes
+        # built afterwards may duplicate them, which is harmless since the content of a node never changes.
+        if len(self._cache) > self._collect_threshold:
+            self._collect()
+
+        if node.n == 0:
+            result = node.a
+        elif node.k == 2:
+            result = self._life_4x4(node)
+        else:
+            a, b, c, d = node.a, node.b, node.c, node.d
+            # The nine overlapping sub-nodes of level k - 1, advanced by 2^j generations.
+            c1 = self._successor(a, j)
+            c2 = self._successor(self._join(a.b, b.a, a.d, b.c), j)
+            c3 = self._successor(b, j)
+            c4 = self._successor(self._join(a.c, a.d, c.a, c.b), j)
+            c5 = self._successor(self._join(a.d, b.c, c.b, d.a), j)
+            c6 = self._successor(self._join(b.c, b.d, d.a, d.b), j)
+            c7 = self._successor(c, j)
+            c8 = self._successor(self._join(c.b, d.a, c.d, d.c), j)
+            c9 = self._successor(d, j)
+
+            if j < node.k - 2:
+                # The sub-nodes already reached the requested generation: assemble their centers.
+                result = self._join(self._join(c1.d, c2.c, c4.b, c5.a), self._join(c2.d, c3.c, c5.b, c6.a),
+                                    self._join(c4.d, c5.c, c7.b, c8.a), self._join(c5.d, c6.c, c8.b, c9.a))
+            else:
+                # The sub-nodes are halfway: advance the four overlapping quadrants again.
+                result = self._join(self._successor(self._join(c1, c2, c4, c5), j),
+                                    self._successor(self._join(c2, c3, c5, c6), j),
+                                    self._successor(self._join(c4, c5, c7, c8), j),
+                                    self._successor(self._join(c5, c6, c8, c9), j))
+
+        node.results[j] = result
+        return result
+
+    def _collect(self) -> None:
+        # Evict the nodes that are not reachable from the root, together with all the memoised results.
+        self._cache = {}
+        self._empty = [self._off]
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node.k == 0:
+                continue
+            node.results = {}
+            key = (node.a, node.b, node.c, node.d)
+            if key not in self._cache:
+                self._cache[key] = node
+                stack.extend(key)
+        self._collect_threshold = max(self._max_nodes, 2 * len(self._cache))
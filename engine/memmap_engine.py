@@ -0,0 +1,221 @@
+import hashlib
+import os
+import tempfile
+import weakref
+
+import numpy as np
+
+from engine.gol_engine import GOLEngine, lookup_generation, make_step_buffers, skip_ages
+from engine.rules import CONWAY, Rule, make_lookup_table
+from utils.config import config
+
+# Bytes of memory used for each cell of a band while it's stepped: the band read from the file, the padded alive
+# cells, the row sums, the neighbor counts, the 16 and 64 bit lookup index, the next alive cells and the births or
+# deaths.
+BAND_BYTES_PER_CELL = 16
+
+
+def _remove_files(paths: list) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class MemmapEngine(GOLEngine):
+    """
+    Engine that keeps the grid out of core: the grids of the current and of the next generation are memory-mapped
+    files, and a generation is computed in bands of rows that are read with their halo rows (the rows just above and
+    below the band, which hold the neighbors of its border cells), stepped in memory and written to the other file.
+    The size of the bands is chosen so that the memory used by the step stays within a budget, whatever the size of
+    the grid, and the files are read and written sequentially. The pages of the files are cached by the operating
+    system, which reclaims them when the memory is needed.
+    The grid is never held in memory as a whole, except by get_grid: use get_region to read a part of a large grid.
+    It computes any Life-like or Generations rule, with the same results as the ConvolutionEngine.
+    """
+
+    name = "memmap"
+    supports_rules = True
+
+    def __init__(self, grid: np.ndarray, track_age: bool = True, rule: Rule = CONWAY,
+                 budget_mb: float = config.MEMMAP_BUDGET_MB, directory: str = config.MEMMAP_DIR):
+        self._rule = rule
+        # The table of the next states, built for the rule.
+        self._table = make_lookup_table(rule, track_age)
+        self._budget = int(budget_mb * 2 ** 20)
+        self._directory = directory
+        self._finalizer = None
+        # The two grids, the current one is self._grids[self._current].
+        self._grids = None
+        self._current = 0
+        super().__init__(grid, track_age)
+
+    @property
+    def _grid(self) -> np.memmap:
+        return self._grids[self._current]
+
+    def get_grid(self) -> np.ndarray:
+        return np.array(self._grid)
+
+    def get_grid_size(self) -> tuple:
+        return self._grids[0].shape
+
+    def get_grid_map(self) -> np.memmap:
+        """
+        :return: The memory-mapped file of the current grid, to read a large grid in bands without loading it. It must
+        not be modified, and it's overwritten by the second next step.
+        """
+        return self._grid
+
+    def get_band_rows(self) -> int:
+        """
+        :return: The number of rows stepped at once, derived from the memory budget.
+        """
+        return self._band_rows
+
+    def get_region(self, top: int, left: int, rows: int, cols: int) -> np.ndarray:
+        """
+        Read a rectangular region of the grid. The region is clipped to the grid.
+        :param top: The first row of the region.
+        :param left: The first column of the region.
+        :param rows: The number of rows of the region.
+        :param cols: The number of columns of the region.
+        :return: A copy of the states of the cells in the region.
+        """
+        return np.array(self._grid[max(top, 0):max(top + rows, 0), max(left, 0):max(left + cols, 0)])
+
+    def get_state_hash(self) -> int:
+        digest = hashlib.blake2b(digest_size=16)
+        for start, end in self._bands():
+            band = self._grid[start:end]
+            # The cells in a decay state are part of the state of a Generations rule.
+            digest.update(band.tobytes() if self._rule.is_generations() else
+                          np.packbits(self._rule.get_alive(band)).tobytes())
+        return hash(digest.digest())
+
+    def set_grid(self, grid: np.ndarray) -> None:
+        grid = np.asanyarray(grid)
+        if self._grids is None or self.get_grid_size() != grid.shape:
+            self._allocate(grid.shape)
+        self._current = 0
+        # The grid is copied and counted in bands, so that a memory-mapped grid (e.g. a checkpoint) is never loaded
+        # as a whole.
+        population = 0
+        for start, end in self._bands():
+            band = grid[start:end]
+            self._grid[start:end] = band
+            population += self._rule.count_alive(band)
+        self._reset_stats(population)
+
+    def _skip_ages(self, generations: int, period: int) -> None:
+        for start, end in self._bands():
+            band = np.array(self._grid[start:end])
+            skip_ages(band, generations, period)
+            self._grid[start:end] = band
+
+    def set_region(self, top: int, left: int, region: np.ndarray) -> None:
+        """
+        Replace a rectangular region of the grid.
+        :param top: The first row of the region.
+        :param left: The first column of the region.
+        :param region: The new states of the cells in the region, which must fit the grid.
+        """
+        rows, cols = region.shape
+        target = self._grid[top:top + rows, left:left + cols]
+        if top < 0 or left < 0 or target.shape != region.shape:
+            raise ValueError(f"The region {region.shape} at ({top}, {left}) doesn't fit the grid "
+                             f"{self.get_grid_size()}")
+        self._population += self._rule.count_alive(region) - self._rule.count_alive(target)
+        target[:] = region
+
+    def set_rule(self, rule: Rule) -> None:
+        """
+        Change the rule computed by the engine. If the previous or the new rule is a Generations rule, the cells in a
+        decay state are cleared and the alive cells start again from age 1.
+        :param rule: The new rule.
+        """
+        if self._rule.is_generations() or rule.is_generations():
+            for start, end in self._bands():
+                self._grid[start:end] = self._rule.get_alive(self._grid[start:end])
+        self._rule = rule
+        self._table = make_lookup_table(rule, self._track_age)
+        self.set_grid(self._grid)
+
+    def load_pattern(self, grid_pattern: np.ndarray) -> bool:
+        rows, cols = self.get_grid_size()
+        pattern_rows, pattern_cols = grid_pattern.shape
+        if pattern_rows > rows or pattern_cols > cols:
+            return False
+        for start, end in self._bands():
+            self._grid[start:end] = 0
+        self._reset_stats(0)
+        self.set_region((rows - pattern_rows) // 2, (cols - pattern_cols) // 2, grid_pattern.astype(np.uint8))
+        return True
+
+    def close(self) -> None:
+        """
+        Unmap and delete the files of the grids.
+        """
+        if self._finalizer is not None:
+            self._grids = None
+            self._finalizer()
+            self._finalizer = None
+
+    def _allocate(self, shape: tuple) -> None:
+        self.close()
+        paths = []
+        grids = []
+        for _ in range(2):
+            handle, path = tempfile.mkstemp(suffix=".grid", prefix="gol_", dir=self._directory)
+            os.close(handle)
+            paths.append(path)
+            # An empty grid can't be mapped, so it's kept in memory.
+            grids.append(np.memmap(path, np.uint8, "w+", shape=shape) if min(shape) > 0 else
+                         np.zeros(shape, np.uint8))
+        self._grids = grids
+        # Delete the files when the engine is garbage collected or at exit.
+        self._finalizer = weakref.finalize(self, _remove_files, paths)
+        rows, cols = shape
+        self._band_rows = band_rows = max(self._budget // (max(cols, 1) * BAND_BYTES_PER_CELL), 1)
+        # The work arrays of the step, allocated once for the largest band. The band is read with its halo rows, and
+        # the border of the padded alive cells is never written.
+        self._band = np.empty((band_rows + 2, cols), np.uint8)
+        self._padded = np.zeros((band_rows + 2, cols + 2), np.uint8)
+        self._buffers = make_step_buffers((band_rows, cols))
+        self._next_alive = np.empty((band_rows, cols), bool)
+        self._changed = np.empty((band_rows, cols), bool)
+
+    def _bands(self) -> list:
+        """
+        :return: The first and the last row (excluded) of each band.
+        """
+        rows = self.get_grid_size()[0]
+        return [(start, min(start + self._band_rows, rows)) for start in range(0, rows, self._band_rows)]
+
+    def _step(self) -> tuple:
+        rows = self.get_grid_size()[0]
+        grid_curr = self._grids[self._current]
+        grid_next = self._grids[1 - self._current]
+        births = deaths = 0
+        for start, end in self._bands():
+            band_rows = end - start
+            # Read the band with its halo rows. The cells beyond the edges of the grid are dead.
+            top, bottom = max(start - 1, 0), min(end + 1, rows)
+            band = self._band[:bottom - top]
+            band[:] = grid_curr[top:bottom]
+            padded = self._padded[:band_rows + 2]
+            padded[0] = 0
+            padded[-1] = 0
+            self._rule.get_alive(band, out=padded[top - start + 1:bottom - start + 1, 1:-1].view(bool))
+            band_next = lookup_generation(band[start - top:end - top], padded, self._table, grid_next[start:end],
+                                          self._buffers)
+
+            # The alive cells are compared as uint8, which is faster than as booleans.
+            band_curr_alive = padded[1:-1, 1:-1]
+            band_next_alive = self._rule.get_alive(band_next, out=self._next_alive[:band_rows]).view(np.uint8)
+            changed = self._changed[:band_rows]
+            births += int(np.count_nonzero(np.greater(band_next_alive, band_curr_alive, out=changed)))
+            deaths += int(np.count_nonzero(np.greater(band_curr_alive, band_next_alive, out=changed)))
+        self._current = 1 - self._current
+        return births, deaths
@@ -0,0 +1,157 @@
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from engine.gol_engine import GOLEngine, age_cells
+from utils.config import config
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Before Python 3.8 there is no shared memory: only the thread backend is available.
+    shared_memory = None
+
+# Age grids shared with the process of a worker, attached by _init_worker.
+_worker_buffers = None
+
+
+def step_band(grid_curr_age: np.ndarray, grid_next_age: np.ndarray, start: int, end: int, track_age: bool) -> tuple:
+    """
+    Compute the next generation of the rows [start, end) of a grid.
+    The band reads one halo row above and below from the current grid, and writes only its own rows of the next grid,
+    so bands can be computed concurrently. Cells outside the grid are considered dead.
+    :param grid_curr_age: The age grid of the current generation.
+    :param grid_next_age: The age grid of the next generation, written in place.
+    :param start: The first row of the band.
+    :param end: The row after the last one of the band.
+    :param track_age: Flag that indicates if the age of the cells is computed.
+    :return: A tuple with the number of births and deaths in the band.
+    """
+    rows, cols = grid_curr_age.shape
+    top, bottom = max(start - 1, 0), min(end + 1, rows)
+
+    # The band with its halo rows and a border of dead cells.
+    alive = np.zeros((end - start + 2, cols + 2), dtype=np.uint8)
+    alive[top - start + 1:bottom - start + 1, 1:-1] = grid_curr_age[top:bottom] > 0
+
+    # Count the neighbors of each cell summing the eight shifted views of the band.
+    grid_neighbors = np.zeros((end - start, cols), dtype=np.uint8)
+    for dr in (0, 1, 2):
+        for dc in (0, 1, 2):
+            if dr != 1 or dc != 1:
+                grid_neighbors += alive[dr:dr + end - start, dc:dc + cols]
+
+    grid_curr_alive = alive[1:-1, 1:-1].astype(bool)
+    grid_next = (grid_neighbors == 3) | (grid_curr_alive & (grid_neighbors == 2))
+
+    if track_age:
+        grid_next_age[start:end] = age_cells(grid_curr_age[start:end], grid_next)
+    else:
+        grid_next_age[start:end] = grid_next
+
+    return int(np.count_nonzero(grid_next & ~grid_curr_alive)), int(np.count_nonzero(grid_curr_alive & ~grid_next))
+
+
+def _init_worker(names: list, shape: tuple) -> None:
+    # Attach the worker process to the shared age grids.
+    global _worker_buffers
+    memories = [shared_memory.SharedMemory(name=name) for name in names]
+    _worker_buffers = memories, [np.ndarray(shape, dtype=np.uint8, buffer=memory.buf) for memory in memories]
+
+
+def _step_band_in_worker(current: int, start: int, end: int, track_age: bool) -> tuple:
+    grids = _worker_buffers[1]
+    return step_band(grids[current], grids[1 - current], start, end, track_age)
+
+
+def _release(executor, memories: list) -> None:
+    executor.shutdown(wait=True)
+    for memory in memories:
+        memory.close()
+        memory.unlink()
+
+
+class ParallelEngine(GOLEngine):
+    """
+    Engine that splits the grid into horizontal bands and computes them concurrently on a pool of workers.
+    With the process backend, the two age grids (current and next generation) live in shared memory: every worker
+    updates its own band and reads only the halo rows at the band borders from the other bands.
+    With the thread backend, the workers rely on numpy releasing the GIL.
+    The result is the same as the one of the ConvolutionEngine, ages included.
+    """
+
+    name = "parallel"
+
+    def __init__(self, grid: np.ndarray, track_age: bool = True, workers: int = config.PARALLEL_WORKERS,
+                 backend: str = config.PARALLEL_BACKEND):
+        if backend not in ("process", "thread"):
+            raise ValueError(f"Unknown parallel backend '{backend}'")
+        self._workers = workers if workers > 0 else os.cpu_count()
+        self._backend = backend if shared_memory is not None else "thread"
+        self._executor = None
+        self._finalizer = None
+        self._grids = None
+        super().__init__(grid, track_age)
+
+    def get_grid(self) -> np.ndarray:
+        return self._grids[self._current].copy()
+
+    def get_grid_size(self) -> tuple:
+        return self._grids[0].shape
+
+    def get_state_hash(self) -> int:
+        return hash(np.packbits(self._grids[self._current]).tobytes())
+
+    def _set_grid(self, grid: np.ndarray) -> None:
+        grid = np.asarray(grid)
+        if self._grids is None or self._grids[0].shape != grid.shape:
+            self._allocate(grid.shape)
+        self._current = 0
+        self._grids[0][:] = grid
+
+    def _is_alive(self, row: int, col: int) -> bool:
+        return bool(self._grids[self._current][row, col])
+
+    def _set_cell(self, row: int, col: int, age: int) -> None:
+        self._grids[self._current][row, col] = age
+
+    def close(self) -> None:
+        """
+        Stop the workers and release the shared memory.
+        """
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+
+    def _allocate(self, shape: tuple) -> None:
+        self.close()
+        if self._backend == "process":
+            size = max(int(np.prod(shape)), 1)
+            memories = [shared_memory.SharedMemory(create=True, size=size) for _ in range(2)]
+            self._grids = [np.ndarray(shape, dtype=np.uint8, buffer=memory.buf) for memory in memories]
+            self._executor = ProcessPoolExecutor(self._workers, initializer=_init_worker,
+                                                 initargs=([memory.name for memory in memories], shape))
+        else:
+            memories = []
+            self._grids = [np.zeros(shape, dtype=np.uint8) for _ in range(2)]
+            self._executor = ThreadPoolExecutor(self._workers)
+        # Release the workers and the shared memory when the engine is garbage collected or at exit.
+        self._finalizer = weakref.finalize(self, _release, self._executor, memories)
+
+        # Split the rows in one band per worker.
+        bounds = np.linspace(0, shape[0], min(self._workers, shape[0]) + 1).astype(int)
+        self._bands = list(zip(bounds[:-1], bounds[1:]))
+
+    def _step(self) -> tuple:
+        if self._backend == "process":
+            futures = [self._executor.submit(_step_band_in_worker, self._current, start, end, self._track_age)
+                       for start, end in self._bands]
+        else:
+            futures = [self._executor.submit(step_band, self._grids[self._current], self._grids[1 - self._current],
+                                             start, end, self._track_age) for start, end in self._bands]
+        # Wait for all the bands, propagating the errors of the workers, and sum their births and deaths.
+        stats = [future.result() for future in futures]
+        self._current = 1 - self._current
+        return sum(births for births, _ in stats), sum(deaths for _, deaths in stats)
@@ -0,0 +1,131 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Number of possible neighbor counts of a cell, from 0 to 8.
+NEIGHBOR_COUNTS = 9
+# Number of possible states of a cell in the uint8 grid.
+CELL_STATES = 256
+
+# Notable rules offered by the GUI, by name.
+NAMED_RULES = {
+    "Conway's Life": "B3/S23",
+    "HighLife": "B36/S23",
+    "Day & Night": "B3678/S34678",
+    "Seeds": "B2/S",
+    "Life without Death": "B3/S012345678",
+    "Maze": "B3/S12345",
+    "Replicator": "B1357/S1357",
+    "Morley": "B368/S245",
+    "Brian's Brain": "B2/S/C3",
+    "Star Wars": "B2/S345/C4",
+}
+
+
+class Rule(namedtuple("Rule", ["birth", "survival", "states"])):
+    """
+    A Life-like rule: a dead cell is born if its number of alive neighbors is in birth, and an alive cell survives if it
+    is in survival.
+    A Generations rule has more than 2 states: an alive cell that doesn't survive doesn't die at once but goes through
+    the decay states 2, 3, ... states - 1, then dies. The cells in a decay state are not alive: they are neither counted
+    as neighbors nor born again. The decay state of a cell is stored in the age channel of the grid, so the cells of a
+    Generations rule have no age.
+    """
+
+    __slots__ = ()
+
+    def __str__(self) -> str:
+        text = "B{}/S{}".format("".join(map(str, self.birth)), "".join(map(str, self.survival)))
+        return text + f"/C{self.states}" if self.is_generations() else text
+
+    def is_generations(self) -> bool:
+        return self.states > 2
+
+    def is_alive(self, state: int) -> bool:
+        """
+        :param state: The value of a cell in the grid.
+        :return: True if the cell is alive, False if it's dead or in a decay state.
+        """
+        return state == 1 if self.is_generations() else state != 0
+
+    def get_alive(self, grid: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        :param grid: The grid.
+        :param out: The boolean grid into which write the result, None to allocate it.
+        :return: The boolean grid of the alive cells.
+        """
+        return np.equal(grid, 1, out=out) if self.is_generations() else np.not_equal(grid, 0, out=out)
+
+    def count_alive(self, grid: np.ndarray) -> int:
+        return int(np.count_nonzero(self.get_alive(grid)))
+
+
+CONWAY = Rule((3,), (2, 3), 2)
+
+
+def parse_rule(text: str) -> Rule:
+    """
+    Parse a rule in B/S notation, like "B36/S23", or in the S/B notation, like "23/36". A third part sets the number of
+    states of a Generations rule, like "B2/S/C3" or "/2/3".
+    :param text: The rule.
+    :return: The parsed rule.
+    """
+    parts = text.strip().upper().replace(" ", "").split("/")
+    if len(parts) not in (2, 3):
+        raise ValueError(f"Invalid rule '{text}'")
+
+    birth = survival = states = None
+    if any(part[:1].isalpha() for part in parts):
+        for part in parts:
+            values = part[1:]
+            if part[:1] == "B" and birth is None:
+                birth = values
+            elif part[:1] == "S" and survival is None:
+                survival = values
+            elif part[:1] in ("C", "G") and states is None:
+                states = values
+            else:
+                raise ValueError(f"Invalid rule '{text}'")
+    else:
+        survival, birth = parts[:2]
+        states = parts[2] if len(parts) == 3 else None
+    if birth is None or survival is None:
+        raise ValueError(f"Invalid rule '{text}'")
+
+    if any(count not in "012345678" for count in birth + survival):
+        raise ValueError(f"Invalid rule '{text}': the neighbor counts must be between 0 and 8")
+    if states is None:
+        states = 2
+    elif states.isdigit() and 2 <= int(states) <= CELL_STATES:
+        states = int(states)
+    else:
+        raise ValueError(f"Invalid rule '{text}': the number of states must be between 2 and {CELL_STATES}")
+    return Rule(tuple(sorted(set(map(int, birth)))), tuple(sorted(set(map(int, survival)))), states)
+
+
+def make_lookup_table(rule: Rule, track_age: bool) -> np.ndarray:
+    """
+    Build the table of the next state of a cell, indexed by its current state and its number of alive neighbors: the
+    next state of a cell is table[state * NEIGHBOR_COUNTS + neighbors].
+    With a Life-like rule the state of an alive cell is its age, so the table makes the surviving cells grow older.
+    :param rule: The rule.
+    :param track_age: Flag that indicates if the age of the cells is computed. When it is not, every alive cell has
+    age 1.
+    :return: The flattened uint8 table.
+    """
+    table = np.zeros((CELL_STATES, NEIGHBOR_COUNTS), np.uint8)
+    born = np.isin(np.arange(NEIGHBOR_COUNTS), rule.birth)
+    survive = np.isin(np.arange(NEIGHBOR_COUNTS), rule.survival)
+    table[0, born] = 1
+
+    if rule.is_generations():
+        # An alive cell that doesn't survive starts to decay, and a decaying cell moves to the next state whatever its
+        # neighbors. The values beyond the last state are dead.
+        table[1] = np.where(survive, 1, 2)
+        for state in range(2, rule.states - 1):
+            table[state] = state + 1
+    else:
+        # The age is capped at 255.
+        ages = np.minimum(np.arange(1, CELL_STATES), 254) + 1 if track_age else np.ones(CELL_STATES - 1, np.uint8)
+        table[1:] = np.where(survive, ages[:, np.newaxis], 0)
+    return table.ravel()
@@ -0,0 +1,142 @@
+import numpy as np
+
+from engine.gol_engine import GOLEngine, age_cells, skip_ages
+
+# Side of the square chunks in which the universe is split.
+CHUNK_SIZE = 64
+
+# Offsets of a chunk and of its eight neighbors, in row-major order.
+_NEIGHBOR_OFFSETS = [(dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)]
+
+
+class SparseEngine(GOLEngine):
+    """
+    Engine that stores only the chunks of the universe that contain alive cells, in a hash map indexed by the chunk
+    coordinates. The memory and the cost of a step scale with the population instead of the grid area.
+    The universe is unbounded: the grid is a window over the universe, so patterns like spaceships and guns can run
+    indefinitely without hitting a border.
+    """
+
+    name = "sparse"
+    unbounded = True
+
+    def get_grid(self) -> np.ndarray:
+        rows, cols = self._grid_size
+        grid = np.zeros((rows, cols), dtype=np.uint8)
+        for (chunk_row, chunk_col), index in self._index.items():
+            top = chunk_row * CHUNK_SIZE
+            left = chunk_col * CHUNK_SIZE
+            if top >= rows or left >= cols or top + CHUNK_SIZE <= 0 or left + CHUNK_SIZE <= 0:
+                continue
+            # Intersection between the chunk and the grid.
+            row_start, col_start = max(top, 0), max(left, 0)
+            row_end, col_end = min(top + CHUNK_SIZE, rows), min(left + CHUNK_SIZE, cols)
+            grid[row_start:row_end, col_start:col_end] = \
+                self._chunks[index, row_start - top:row_end - top, col_start - left:col_end - left]
+        return grid
+
+    def get_grid_size(self) -> tuple:
+        return self._grid_size
+
+    def get_chunks_count(self) -> int:
+        return len(self._index)
+
+    def get_state_hash(self) -> int:
+        # The cells of the whole universe, including the ones outside the grid.
+        return hash(tuple((key, np.packbits(self._chunks[index]).tobytes())
+                          for key, index in sorted(self._index.items())))
+
+    def load_pattern(self, grid_pattern: np.ndarray) -> bool:
+        # The pattern is placed at the center of the grid even when it is bigger than the grid.
+        rows, cols = self._grid_size
+        self._set_cells(grid_pattern, (rows - grid_pattern.shape[0]) // 2, (cols - grid_pattern.shape[1]) // 2)
+        self._reset_stats(int(np.count_nonzero(grid_pattern)))
+        return True
+
+    def _set_grid(self, grid: np.ndarray) -> None:
+        self._grid_size = np.shape(grid)
+        self._set_cells(np.asarray(grid), 0, 0)
+
+    def _skip_ages(self, generations: int, period: int) -> None:
+        # The ages of the whole universe, including the cells outside the grid.
+        skip_ages(self._chunks, generations, period)
+
+    def _is_alive(self, row: int, col: int) -> bool:
+        index = self._index.get((row // CHUNK_SIZE, col // CHUNK_SIZE))
+        return index is not None and bool(self._chunks[index, row % CHUNK_SIZE, col % CHUNK_SIZE])
+
+    def _set_cell(self, row: int, col: int, age: int) -> None:
+        key = (row // CHUNK_SIZE, col // CHUNK_SIZE)
+        index = self._index.get(key)
+        if index is None:
+            if not age:
+                return
+            index = len(self._index)
+            self._index[key] = index
+            self._chunks = np.concatenate([self._chunks, np.zeros((1, CHUNK_SIZE, CHUNK_SIZE), np.uint8)])
+        self._chunks[index, row % CHUNK_SIZE, col % CHUNK_SIZE] = age
+
+    def _set_cells(self, cells: np.ndarray, top: int, left: int) -> None:
+        # Replace the universe with the given cells, whose top left corner is at (top, left) in grid coordinates.
+        first_row, first_col = top // CHUNK_SIZE, left // CHUNK_SIZE
+        pad_top, pad_left = top - first_row * CHUNK_SIZE, left - first_col * CHUNK_SIZE
+        chunk_rows = -(-(pad_top + cells.shape[0]) // CHUNK_SIZE)
+        chunk_cols = -(-(pad_left + cells.shape[1]) // CHUNK_SIZE)
+
+        # Align the cells to the chunks and split them.
+        padded = np.zeros((chunk_rows * CHUNK_SIZE, chunk_cols * CHUNK_SIZE), dtype=np.uint8)
+        padded[pad_top:pad_top + cells.shape[0], pad_left:pad_left + cells.shape[1]] = cells
+        blocks = padded.reshape(chunk_rows, CHUNK_SIZE, chunk_cols, CHUNK_SIZE).swapaxes(1, 2)
+
+        # Keep only the chunks with alive cells.
+        alive_rows, alive_cols = np.nonzero(blocks.any(axis=(2, 3)))
+        self._chunks = blocks[alive_rows, alive_cols]
+        self._index = {(first_row + int(r), first_col + int(c)): i
+                       for i, (r, c) in enumerate(zip(alive_rows, alive_cols))}
+
+    def _step(self) -> tuple:
+        # The chunks that can contain alive cells at the next step: the current ones and their neighbors.
+        candidates = list({(row + dr, col + dc) for row, col in self._index for dr, dc in _NEIGHBOR_OFFSETS})
+        if not candidates:
+            return 0, 0
+
+        # Index of each candidate and of its neighbors in the chunk stack. Missing chunks point to an empty chunk.
+        empty = len(self._index)
+        neighbors = np.array([[self._index.get((row + dr, col + dc), empty) for dr, dc in _NEIGHBOR_OFFSETS]
+                              for row, col in candidates]).reshape(-1, 3, 3)
+        alive = np.concatenate([self._chunks, np.zeros((1, CHUNK_SIZE, CHUNK_SIZE), np.uint8)]).astype(bool)
+
+        # Chunks surrounded by a one cell halo taken from the neighbor chunks.
+        padded = np.zeros((len(candidates), CHUNK_SIZE + 2, CHUNK_SIZE + 2), dtype=np.uint8)
+        padded[:, 1:-1, 1:-1] = alive[neighbors[:, 1, 1]]
+        padded[:, 0, 1:-1] = alive[neighbors[:, 0, 1], -1, :]
+        padded[:, -1, 1:-1] = alive[neighbors[:, 2, 1], 0, :]
+        padded[:, 1:-1, 0] = alive[neighbors[:, 1, 0], :, -1]
+        padded[:, 1:-1, -1] = alive[neighbors[:, 1, 2], :, 0]
+        padded[:, 0, 0] = alive[neighbors[:, 0, 0], -1, -1]
+        padded[:, 0, -1] = alive[neighbors[:, 0, 2], -1, 0]
+        padded[:, -1, 0] = alive[neighbors[:, 2, 0], 0, -1]
+        padded[:, -1, -1] = alive[neighbors[:, 2, 2], 0, 0]
+
+        # Count the neighbors of each cell summing the eight shifted views of the padded chunks.
+        grid_neighbors = np.zeros((len(candidates), CHUNK_SIZE, CHUNK_SIZE), dtype=np.uint8)
+        for dr, dc in _NEIGHBOR_OFFSETS:
+            if dr or dc:
+                grid_neighbors += padded[:, 1 + dr:1 + dr + CHUNK_SIZE, 1 + dc:1 + dc + CHUNK_SIZE]
+
+        grid_curr_alive = padded[:, 1:-1, 1:-1].astype(bool)
+        grid_next = (grid_neighbors == 3) | (grid_curr_alive & (grid_neighbors == 2))
+        births = int(np.count_nonzero(grid_next & ~grid_curr_alive))
+        deaths = self._population - int(np.count_nonzero(grid_next & grid_curr_alive))
+
+        if self._track_age:
+            chunks = np.concatenate([self._chunks, np.zeros((1, CHUNK_SIZE, CHUNK_SIZE), np.uint8)])
+            grid_next = age_cells(chunks[neighbors[:, 1, 1]], grid_next)
+        else:
+            grid_next = grid_next.astype(np.uint8)
+
+        # Drop the chunks that became empty.
+        keep = np.nonzero(grid_next.any(axis=(1, 2)))[0]
+        self._chunks = grid_next[keep]
+        self._index = {candidates[k]: i for i, k in enumerate(keep)}
+        return births, deaths
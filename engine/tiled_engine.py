@@ -0,0 +1,138 @@
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+from scipy import ndimage
+
+from engine.gol_engine import GOLEngine, age_cells
+from utils.config import config
+
+
+def _catch_up_ages(ages: np.ndarray, stale: np.ndarray) -> np.ndarray:
+    # Age the alive cells by the generations in which their tile was skipped, capping the age to 255.
+    return np.where(ages > 0, np.minimum(ages.astype(np.int64) + stale, 255), 0).astype(np.uint8)
+
+
+class TiledEngine(GOLEngine):
+    """
+    Engine that splits the grid into square tiles and recomputes only the tiles that changed in the last generation,
+    together with their neighbors. Stable tiles (empty or made of still lifes) are skipped, so the cost of a step is
+    proportional to the activity rather than to the grid area.
+    The ages of the skipped tiles are brought up to date lazily, when the tile becomes active again or when the grid is
+    read. Cells outside the grid are considered dead, as in the ConvolutionEngine.
+    """
+
+    name = "tiled"
+
+    def __init__(self, grid: np.ndarray, track_age: bool = True, tile_size: int = config.TILE_SIZE):
+        self._tile_size = tile_size
+        super().__init__(grid, track_age)
+
+    def get_grid(self) -> np.ndarray:
+        self._catch_up()
+        rows, cols = self._grid_size
+        return self._ages[:rows, :cols].copy()
+
+    def get_grid_size(self) -> tuple:
+        return self._grid_size
+
+    def get_active_tiles_count(self) -> int:
+        return int(np.count_nonzero(self._changed))
+
+    def get_state_hash(self) -> int:
+        return hash(self._alive.tobytes())
+
+    def _set_grid(self, grid: np.ndarray) -> None:
+        grid = np.asarray(grid)
+        self._grid_size = rows, cols = grid.shape
+        size = self._tile_size
+        self._tiles_shape = tile_rows, tile_cols = -(-rows // size), -(-cols // size)
+
+        # The grid is padded to a whole number of tiles. The padding cells are always dead.
+        self._ages = np.zeros((tile_rows * size, tile_cols * size), dtype=np.uint8)
+        self._ages[:rows, :cols] = grid
+        valid = np.zeros(self._ages.shape, dtype=bool)
+        valid[:rows, :cols] = True
+        self._valid_tiles = self._tiles(valid)
+
+        # Alive cells surrounded by a border of dead cells, so that every tile has a one cell halo.
+        self._alive = np.zeros((tile_rows * size + 2, tile_cols * size + 2), dtype=np.uint8)
+        self._alive[1:rows + 1, 1:cols + 1] = grid > 0
+
+        # Generations in which each tile was skipped since its ages were last updated.
+        self._stale = np.zeros(self._tiles_shape, dtype=np.int64)
+        # Tiles changed in the last generation: at first every tile must be computed.
+        self._changed = np.ones(self._tiles_shape, dtype=bool)
+
+    def _is_alive(self, row: int, col: int) -> bool:
+        return bool(self._alive[row + 1, col + 1])
+
+    def _set_cell(self, row: int, col: int, age: int) -> None:
+        tile = row // self._tile_size, col // self._tile_size
+        self._catch_up()
+        self._ages[row, col] = age
+        self._alive[row + 1, col + 1] = age > 0
+        self._changed[tile] = True
+
+    def _tiles(self, array: np.ndarray) -> np.ndarray:
+        # View of a padded grid as an array of tiles with shape (tile rows, tile columns, size, size).
+        size = self._tile_size
+        tile_rows, tile_cols = self._tiles_shape
+        return array.reshape(tile_rows, size, tile_cols, size).swapaxes(1, 2)
+
+    def _windows(self, halo: int) -> np.ndarray:
+        # View of the alive cells as an array of tiles, each one extended by the given halo on every side.
+        size = self._tile_size
+        start = 1 - halo
+        array = self._alive[start:, start:]
+        stride_row, stride_col = array.strides
+        return as_strided(array, shape=self._tiles_shape + (size + 2 * halo, size + 2 * halo),
+                          strides=(size * stride_row, size * stride_col, stride_row, stride_col), writeable=halo == 0)
+
+    def _catch_up(self) -> None:
+        # Bring the ages of all the skipped tiles up to date.
+        if self._track_age and self._stale.any():
+            stale = np.repeat(np.repeat(self._stale, self._tile_size, axis=0), self._tile_size, axis=1)
+            self._ages = _catch_up_ages(self._ages, stale)
+            self._stale[:] = 0
+
+    def _step(self) -> tuple:
+        # A tile can change only if it or one of its neighbors changed in the last generation.
+        active = ndimage.binary_dilation(self._changed, structure=np.ones((3, 3), dtype=bool))
+        tile_rows, tile_cols = np.nonzero(active)
+        self._changed = np.zeros(self._tiles_shape, dtype=bool)
+        if self._track_age:
+            self._stale += 1
+        if len(tile_rows) == 0:
+            return 0, 0
+
+        # Gather the active tiles with their halo and count the neighbors summing the eight shifted views.
+        size = self._tile_size
+        windows = self._windows(1)[tile_rows, tile_cols]
+        grid_neighbors = np.zeros((len(tile_rows), size, size), dtype=np.uint8)
+        for dr in (0, 1, 2):
+            for dc in (0, 1, 2):
+                if dr != 1 or dc != 1:
+                    grid_neighbors += windows[:, dr:dr + size, dc:dc + size]
+
+        grid_curr_alive = windows[:, 1:-1, 1:-1].astype(bool)
+        grid_next = (grid_neighbors == 3) | (grid_curr_alive & (grid_neighbors == 2))
+        grid_next &= self._valid_tiles[tile_rows, tile_cols]
+
+        # Only the active tiles can have births and deaths.
+        births = int(np.count_nonzero(grid_next & ~grid_curr_alive))
+        deaths = int(np.count_nonzero(grid_curr_alive & ~grid_next))
+
+        self._changed[tile_rows, tile_cols] = (grid_next != grid_curr_alive).any(axis=(1, 2))
+
+        # Write back the active tiles.
+        self._windows(0)[tile_rows, tile_cols] = grid_next
+        age_tiles = self._tiles(self._ages)
+        if self._track_age:
+            # The stale counter already includes the current generation, which is computed by age_cells.
+            stale = self._stale[tile_rows, tile_cols, np.newaxis, np.newaxis] - 1
+            grid_curr_age = _catch_up_ages(age_tiles[tile_rows, tile_cols], stale)
+            age_tiles[tile_rows, tile_cols] = age_cells(grid_curr_age, grid_next)
+            self._stale[tile_rows, tile_cols] = 0
+        else:
+            age_tiles[tile_rows, tile_cols] = grid_next
+
+        return births, deaths
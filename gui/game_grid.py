@@ -1,15 +1,29 @@
-import math
-
 from PyQt5 import QtGui
-from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QPixmap
+from PyQt5.QtCore import QPoint, Qt, pyqtSignal
+from PyQt5.QtGui import QPainter, QPixmap
 from PyQt5.QtWidgets import QLabel, QSizePolicy, QWidget
 
+import utils.colors as colors
+from gui.viewport import Mipmap, Viewport
 from model.gol_model import GOLModel
-from utils.utils import np_to_qimage
+from utils.profiler import timer
+from utils.utils import create_grid_image, qimage_to_np_view
+
+# Zoom factor of a step of the mouse wheel.
+WHEEL_ZOOM = 1.25
+# Angle of a step of the mouse wheel, in eighths of a degree.
+WHEEL_STEP = 120
+# Mouse buttons that drag the view.
+PAN_BUTTONS = Qt.RightButton | Qt.MiddleButton
 
 
 class GameGrid(QLabel):
+    """
+    Widget that shows the grid and lets the user edit its cells with the left mouse button.
+    The view can be zoomed with the mouse wheel and dragged with the right or middle button; a double click with them
+    shows the whole grid again. Only the visible cells are drawn, and a zoomed out view is drawn from a reduced copy of
+    the grid (see Mipmap), so the cost of a frame depends on the size of the widget rather than of the grid.
+    """
 
     changeCellState = pyqtSignal(object)
 
@@ -22,18 +36,22 @@ class GameGrid(QLabel):
         self.setMinimumSize(1, 1)
         self.setStyleSheet("border: 0px;")
 
-        # Coordinates of the pixmap.
-        self.x_pixmap = 0
-        self.y_pixmap = 0
-
         # Keep track of the last tile drawn to handle continuous drawing through mouse dragging.
         self._last_drawn_row = -1
         self._last_drawn_col = -1
         # Flag that indicates whether we are drawing on the grid.
         self._drawing = False
+        # Last mouse position while the view is dragged, None when it's not.
+        self._pan_position = None
+
+        self._viewport = Viewport()
+        # Copies of the grid at decreasing levels of detail.
+        self._mipmap = Mipmap()
+        # The grid version, colors and view of the pixmap currently shown.
+        self._pixmap_key = None
 
         self._gol_model = model
-        self._gol_model.observe(self.update_grid)
+        self._gol_model.observe(self.update_grid, GOLModel.GRID)
         self.update_grid()
 
         QWidget.setMouseTracking(self, True)
@@ -41,102 +59,163 @@ class GameGrid(QLabel):
     def connect_to_cell_clicked(self, slot) -> None:
         self.changeCellState.connect(slot)
 
+    def get_viewport(self) -> Viewport:
+        return self._viewport
+
     def update_grid(self) -> None:
         """
         Method that update the QImage representing the grid.
         :return:
         """
 
-        # Transform the numpy array of the grid in to an image.
-        image = np_to_qimage(self._gol_model.get_grid(), self._gol_model.is_show_age())
-        pixmap = QPixmap.fromImage(image)
-
-        self.setPixmap(pixmap.scaled(self.width(), self.height()))
-
-        self.x_pixmap = (self.width() - self.pixmap().width()) // 2
-        self.y_pixmap = (self.height() - self.pixmap().height()) // 2
+        show_age = self._gol_model.is_show_age()
+        rule = self._gol_model.get_rule()
+        grid = self._gol_model.get_grid()
+        self._viewport.set_grid_size(grid.shape)
+        self._viewport.set_widget_size(self.width(), self.height())
+        key = (self._gol_model.get_grid_version(), show_age, rule, self._viewport.get_state())
+        # Nothing to do if the same grid is already shown with the same colors and view.
+        if key == self._pixmap_key:
+            return
+
+        with timer.measure("render"):
+            self._mipmap.update(grid)
+            cells, factor = self._mipmap.get_level(self._viewport.get_level())
+
+            # Copy into an image only the visible part of the level, aligned to its cells.
+            top, left, bottom, right = self._viewport.get_visible_cells()
+            top, left, bottom, right = top // factor, left // factor, -(-bottom // factor), -(-right // factor)
+            image = create_grid_image((bottom - top, right - left))
+            qimage_to_np_view(image)[:] = cells[top:bottom, left:right]
+            # The image is indexed: changing the colors doesn't require to redraw the pixels.
+            if show_age:
+                image.setColorTable(colors.COLOR_TABLE)
+            elif rule.is_generations():
+                image.setColorTable(colors.decay_color_table(rule.states))
+            else:
+                image.setColorTable(colors.BW_COLOR_TABLE)
+
+        # Scale the visible part directly to its place in the widget, without converting the full size image. The last
+        # cells of a reduced level may extend beyond the grid: they are pooled with dead cells.
+        with timer.measure("scale"):
+            x_start, y_start = map(round, self._viewport.grid_to_widget(top * factor, left * factor))
+            x_end, y_end = map(round, self._viewport.grid_to_widget(bottom * factor, right * factor))
+            image = image.scaled(max(x_end - x_start, 1), max(y_end - y_start, 1))
+            if (x_start, y_start, x_end, y_end) == (0, 0, self.width(), self.height()):
+                pixmap = QPixmap.fromImage(image)
+            else:
+                pixmap = QPixmap(max(self.width(), 1), max(self.height(), 1))
+                pixmap.fill(Qt.transparent)
+                painter = QPainter(pixmap)
+                painter.drawImage(QPoint(x_start, y_start), image)
+                painter.end()
+            self.setPixmap(pixmap)
+        self._pixmap_key = key
+
+    def paintEvent(self, event: QtGui.QPaintEvent) -> None:
+        """
+        Slot for the paint event of the widget. It draws the scaled pixmap on the screen, measuring the time it takes
+        :param event: The paint event.
+        :return:
+        """
+        with timer.measure("paint"):
+            super().paintEvent(event)
 
     def resizeEvent(self, event: QtGui.QResizeEvent) -> None:
         """
-        Slot for the resize event of the widget. It updates the QPixmap coordinates to handle mouse events on the grid
-        and repaints the new grid
+        Slot for the resize event of the widget. It repaints the grid in the new view
         :param event: The resize event.
         :return:
         """
-        self.x_pixmap = (self.width() - self.pixmap().width()) // 2
-        self.y_pixmap = (self.height() - self.pixmap().height()) // 2
         self.update_grid()
 
+    def wheelEvent(self, ev: QtGui.QWheelEvent) -> None:
+        """
+        Slot for the mouse wheel event on the widget. It zooms the view around the mouse position
+        :param ev: The wheel event.
+        :return:
+        """
+        steps = ev.angleDelta().y() / WHEEL_STEP
+        if steps:
+            self._viewport.zoom_at(WHEEL_ZOOM ** steps, ev.pos().x(), ev.pos().y())
+            self.update_grid()
+
     def mouseMoveEvent(self, ev: QtGui.QMouseEvent) -> None:
         """
         Slot for the mouse move event on the widget.
-        When the application is in a drawing session, change the state of all the cells where the mouse pass over
+        When the view is dragged, move it with the mouse. When the application is in a drawing session, change the state
+        of all the cells where the mouse pass over
         :param ev: The mouse event.
         :return:
         """
-        x_pos = ev.pos().x()
-        y_pos = ev.pos().y()
-
-        # Check if the mouse position is inside the grid image.
-        x_grid = x_pos - self.x_pixmap
-        y_grid = y_pos - self.y_pixmap
-        if 0 <= x_grid < self.pixmap().width() and 0 <= y_grid < self.pixmap().height() and \
-                not self._gol_model.is_running():
+        if self._pan_position is not None:
+            self._viewport.pan(ev.pos().x() - self._pan_position.x(), ev.pos().y() - self._pan_position.y())
+            self._pan_position = ev.pos()
+            self.update_grid()
+            return
+
+        # Check if the mouse position is inside the grid.
+        cell = self._viewport.widget_to_cell(ev.pos().x(), ev.pos().y())
+        if cell is not None and not self._gol_model.is_running():
             self.setCursor(Qt.CrossCursor)
 
-            # Check if we are drawing (the mouse is pressed and dragged).
-            if self._drawing:
-                # Converts the widget coordinates into grid coordinates.
-                grid_size = self._gol_model.get_grid_size()
-                row = math.floor(y_grid * grid_size[0] / self.pixmap().height())
-                col = math.floor(x_grid * grid_size[1] / self.pixmap().width())
-
-                # Check if the event was already handled for this tile.
-                if row != self._last_drawn_row or col != self._last_drawn_col:
-                    self.changeCellState.emit((row, col))
-                    self._last_drawn_row = row
-                    self._last_drawn_col = col
+            # Check if we are drawing (the mouse is pressed and dragged) and if the event was already handled for this
+            # tile.
+            if self._drawing and cell != (self._last_drawn_row, self._last_drawn_col):
+                self.changeCellState.emit(cell)
+                self._last_drawn_row, self._last_drawn_col = cell
         else:
             self.unsetCursor()
 
     def mousePressEvent(self, ev: QtGui.QMouseEvent) -> None:
         """
-        Slot for the mouse press event on the widget. It allows the user to edit the grid cells only when the simulation
-        is not running.
+        Slot for the mouse press event on the widget. The right and middle buttons start dragging the view. The left
+        button allows the user to edit the grid cells only when the simulation is not running.
         Emits the changeCellState signal sending to the connected slots the coordinates (row, column) of the clicked
         cell and starts a drawing session
         :param ev: The mouse event.
         :return:
         """
+        if ev.button() & PAN_BUTTONS:
+            self._pan_position = ev.pos()
+            self.setCursor(Qt.ClosedHandCursor)
+            return
 
         # Ignore the mouse click if the simulation is running (the grid is not editable).
-        if not self._gol_model.is_running():
-            x_click = ev.pos().x()
-            y_click = ev.pos().y()
-
-            # Converts the widget coordinates into grid coordinates
-            x_grid = x_click - self.x_pixmap
-            y_grid = y_click - self.y_pixmap
-            if 0 <= x_grid < self.pixmap().width() and 0 <= y_grid < self.pixmap().height():
-                # Converts the widget coordinates into grid coordinates
-                grid_size = self._gol_model.get_grid_size()
-                row = math.floor(y_grid * grid_size[0] / self.pixmap().height())
-                col = math.floor(x_grid * grid_size[1] / self.pixmap().width())
-
-                self.changeCellState.emit((row, col))
-                self._last_drawn_row = row
-                self._last_drawn_col = col
+        if ev.button() == Qt.LeftButton and not self._gol_model.is_running():
+            # Converts the widget coordinates into grid coordinates through the view.
+            cell = self._viewport.widget_to_cell(ev.pos().x(), ev.pos().y())
+            if cell is not None:
+                self.changeCellState.emit(cell)
+                self._last_drawn_row, self._last_drawn_col = cell
 
                 # Start continuous drawing
                 self._drawing = True
 
+    def mouseDoubleClickEvent(self, ev: QtGui.QMouseEvent) -> None:
+        """
+        Slot for the mouse double click event on the widget. With the right or middle button, it shows the whole grid
+        again. With the left button, it's handled as a second click.
+        :param ev: The mouse event.
+        :return:
+        """
+        if ev.button() & PAN_BUTTONS:
+            self._viewport.reset()
+            self.update_grid()
+        else:
+            self.mousePressEvent(ev)
+
     def mouseReleaseEvent(self, ev: QtGui.QMouseEvent) -> None:
         """
         Slot for the mouse release event on the widget.
-        Ends the drawing session
+        Ends the drawing session or the dragging of the view
         :param ev: The mouse event.
         :return:
         """
+        if ev.button() & PAN_BUTTONS:
+            self._pan_position = None
+            self.unsetCursor()
+            return
 
         self._drawing = False
         self._last_drawn_row = -1
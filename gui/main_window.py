@@ -1,9 +1,13 @@
-from PyQt5.QtWidgets import QMainWindow, QMessageBox, QStyle
+import numpy as np
+from PyQt5.QtCore import QRegExp, Qt
+from PyQt5.QtGui import QIcon, QImage, QPixmap, QRegExpValidator
+from PyQt5.QtWidgets import QLabel, QMainWindow, QMessageBox, QStyle
+from engine.rules import NAMED_RULES
 from gui.game_grid import GameGrid
 from gui.ui_main_window import Ui_MainWindow
 from model.gol_model import GOLModel
 from utils.config import config
-from utils import pattern
+from utils.pattern_library import library
 
 
 class MainWindow(QMainWindow):
@@ -22,25 +26,55 @@ class MainWindow(QMainWindow):
         self.ui.button_info.setIcon(icon)
         self.ui.button_info.setAutoRaise(True)
 
-        # Set the value of the slider.
+        # Allow only non negative integers as the generation to jump to and as the population to reach.
+        self.ui.line_generation.setValidator(QRegExpValidator(QRegExp("[0-9]{1,18}")))
+        self.ui.line_population.setValidator(QRegExpValidator(QRegExp("[0-9]{1,18}")))
+
+        # Set the value of the slider and of the generations per frame.
         self.ui.slider_speed.setValue(gol_model.get_fps())
+        self.ui.spinbox_turbo.setValue(gol_model.get_generations_per_frame())
 
         # Add the custom widget to the central QFrame to display the current state of the GOL grid.
         self.game_grid = GameGrid(gol_model)
         self.ui.game_frame.setSpacing(0)
         self.ui.game_frame.addWidget(self.game_grid)
 
+        # Label on the right of the status bar that shows the speed and the time of each phase of the frames.
+        self._lbl_timings = QLabel()
+        self.statusBar().addPermanentWidget(self._lbl_timings)
+        self._lbl_timings.setVisible(False)
+
         # Load the available patterns into the QComboBox.
         self.ui.combobox_configurations.insertItem(0, config.BASE_PATTERN)
-        self.ui.combobox_configurations.insertItems(1, pattern.get_pattern())
+        self._add_library_patterns()
+
+        # Load the notable rules into the QComboBox, which accepts any other rule typed by the user.
+        for name, rule in NAMED_RULES.items():
+            self.ui.combobox_rules.addItem(f"{rule} ({name})", rule)
 
-        # Register the UI as observer of the GOLSettingsModel to update the controls with its values.
+        # Register the UI as observer of the GOLSettingsModel to update the controls with its values. Each method
+        # observes only the fields it shows.
         self._gol_model = gol_model
-        self._gol_model.observe(self.update_controls)
-        self._gol_model.observe(self.update_game_state)
+        self._gol_model.observe(self.update_controls, GOLModel.STATE)
+        self._gol_model.observe(self.update_game_state, GOLModel.STATS)
         self.update_controls()
         self.update_game_state()
 
+    def _add_library_patterns(self):
+        """
+        Add the patterns of the library to the QComboBox, with their thumbnail and their size read from the index.
+        """
+        combobox = self.ui.combobox_configurations
+        for name in library.get_names():
+            info = library.get_info(name)
+            thumbnail = library.get_thumbnail(name)
+            # Draw the alive cells in black on a white background.
+            pixels = np.ascontiguousarray(np.where(thumbnail != 0, 0, 255).astype(np.uint8))
+            image = QImage(pixels.data, pixels.shape[1], pixels.shape[0], pixels.strides[0], QImage.Format_Grayscale8)
+            combobox.addItem(QIcon(QPixmap.fromImage(image)), name)
+            combobox.setItemData(combobox.count() - 1,
+                                 f"{info.cols}x{info.rows}, {info.population} cells", Qt.ToolTipRole)
+
     # Methods to connect slots to the GUI controls signals.
     def connect_to_button_clear(self, slot):
         self.ui.button_clear.clicked.connect(slot)
@@ -57,21 +91,117 @@ class MainWindow(QMainWindow):
     def connect_to_button_step(self, slot):
         self.ui.button_singlestep.clicked.connect(slot)
 
+    def connect_to_button_jump(self, slot):
+        self.ui.button_jump.clicked.connect(slot)
+        self.ui.line_generation.returnPressed.connect(slot)
+
+    def connect_to_button_run_until(self, slot):
+        self.ui.button_run_until.clicked.connect(slot)
+        self.ui.line_population.returnPressed.connect(slot)
+
     def connect_to_combo_patterns(self, slot):
         self.ui.combobox_configurations.currentTextChanged.connect(slot)
 
+    def connect_to_combo_rules(self, slot):
+        """
+        Connect a slot that receives the text of the rule chosen from the list or typed by the user.
+        """
+        combobox = self.ui.combobox_rules
+        combobox.activated.connect(lambda index: slot(combobox.itemData(index)))
+        combobox.lineEdit().returnPressed.connect(lambda: slot(self.get_typed_rule()))
+
     def connect_to_radio_age(self, slot):
         self.ui.checkbox_age.toggled.connect(slot)
 
     def connect_to_slider_speed(self, slot):
         self.ui.slider_speed.valueChanged.connect(slot)
 
+    def connect_to_slider_timeline(self, slot):
+        self.ui.slider_timeline.valueChanged.connect(slot)
+
+    def connect_to_spinbox_turbo(self, slot):
+        self.ui.spinbox_turbo.valueChanged.connect(slot)
+
     def connect_to_dialog(self, slot):
         self.ui.button_info.clicked.connect(slot)
 
     def reset_combo_patterns(self):
         self.ui.combobox_configurations.setCurrentIndex(0)
 
+    def select_combo_pattern(self, pattern_name: str):
+        """
+        Show a pattern as the selected one without loading it, e.g. when the grid is restored from a checkpoint.
+        :param pattern_name: The name of the pattern.
+        """
+        combobox = self.ui.combobox_configurations
+        combobox.blockSignals(True)
+        combobox.setCurrentIndex(max(combobox.findText(pattern_name), 0))
+        combobox.blockSignals(False)
+
+    def set_session_controls(self, fps: int, generations_per_frame: int, show_age: bool):
+        """
+        Set the values of the simulation settings controls, which notify the change as if the user made it.
+        :param fps: The simulation speed.
+        :param generations_per_frame: The number of generations computed for each frame.
+        :param show_age: Flag that indicates if the cell age is shown.
+        """
+        self.ui.slider_speed.setValue(fps)
+        self.ui.spinbox_turbo.setValue(generations_per_frame)
+        self.ui.checkbox_age.setChecked(show_age)
+
+    def set_timeline(self, first: int, last: int, current: int):
+        """
+        Show the range of the recorded generations on the timeline, without notifying a change of its position.
+        :param first: The first recorded generation.
+        :param last: The last recorded generation.
+        :param current: The generation shown.
+        """
+        slider = self.ui.slider_timeline
+        slider.blockSignals(True)
+        slider.setMaximum(last - first)
+        slider.setValue(min(max(current - first, 0), last - first))
+        slider.blockSignals(False)
+        self.ui.lbl_timeline.setText(f"Timeline: {first}-{last}")
+
+    def set_timeline_visible(self, visible: bool):
+        self.ui.lbl_timeline.setVisible(visible)
+        self.ui.slider_timeline.setVisible(visible)
+
+    def set_timings_visible(self, visible: bool):
+        self._lbl_timings.setVisible(visible)
+
+    def show_timings(self, fps: float, target_fps: int, timings: dict):
+        """
+        Show on the status bar the actual speed of the simulation and the time of each phase of the frames
+        :param fps: The frames shown per second.
+        :param target_fps: The target speed in frames per second.
+        :param timings: The average time in milliseconds of each phase, by phase name.
+        """
+        text = " | ".join([f"{fps:.1f}/{target_fps} FPS"] + [f"{phase} {ms:.2f} ms" for phase, ms in timings.items()])
+        self._lbl_timings.setText(text)
+
+    def get_typed_rule(self) -> str:
+        """
+        :return: The rule typed by the user, or the rule of the notable rule whose text was left in the QComboBox.
+        """
+        combobox = self.ui.combobox_rules
+        index = combobox.findText(combobox.currentText())
+        return combobox.itemData(index) if index >= 0 else combobox.currentText()
+
+    def get_jump_generation(self) -> int:
+        """
+        :return: The generation to jump to typed by the user, None if it's missing.
+        """
+        text = self.ui.line_generation.text()
+        return int(text) if text else None
+
+    def get_target_population(self) -> int:
+        """
+        :return: The population to reach typed by the user, None if it's missing.
+        """
+        text = self.ui.line_population.text()
+        return int(text) if text else None
+
     def show_error_message(self, message: str):
         """
         Show an error message into a popup dialog
@@ -79,6 +209,14 @@ class MainWindow(QMainWindow):
         """
         QMessageBox.critical(self, "Error", message)
 
+    def ask_question(self, message: str) -> bool:
+        """
+        Ask a yes or no question into a popup dialog
+        :param message: The question to ask
+        :return: True if the user answered yes
+        """
+        return QMessageBox.question(self, "Question", message) == QMessageBox.Yes
+
     def show_message_on_status_bar(self, message: str):
         """
         Show a message on the status bar at the bottom of the window
@@ -98,18 +236,51 @@ class MainWindow(QMainWindow):
             self.ui.button_load.setEnabled(False)
             self.ui.button_save.setEnabled(False)
             self.ui.button_singlestep.setEnabled(False)
+            self.ui.button_jump.setEnabled(False)
+            self.ui.line_generation.setEnabled(False)
+            self.ui.button_run_until.setEnabled(False)
+            self.ui.line_population.setEnabled(False)
             self.ui.combobox_configurations.setEnabled(False)
+            self.ui.combobox_rules.setEnabled(False)
+            self.ui.slider_timeline.setEnabled(False)
         else:
             self.ui.button_start.setText("Play")
             self.ui.button_clear.setEnabled(True)
             self.ui.button_load.setEnabled(True)
             self.ui.button_save.setEnabled(True)
             self.ui.button_singlestep.setEnabled(True)
+            self.ui.button_jump.setEnabled(True)
+            self.ui.line_generation.setEnabled(True)
+            self.ui.button_run_until.setEnabled(True)
+            self.ui.line_population.setEnabled(True)
             self.ui.combobox_configurations.setEnabled(True)
+            self.ui.combobox_rules.setEnabled(True)
+            self.ui.slider_timeline.setEnabled(True)
 
         self.ui.lbl_fps.setText(f"{self._gol_model.get_fps()} FPS")
+        self.select_combo_rule(str(self._gol_model.get_rule()))
+
+    def select_combo_rule(self, rule: str):
+        """
+        Show the rule in the QComboBox, selecting it if it's a notable rule, without notifying a change.
+        :param rule: The rule in B/S notation.
+        """
+        combobox = self.ui.combobox_rules
+        if self.get_typed_rule() == rule:
+            return
+        combobox.blockSignals(True)
+        index = combobox.findData(rule)
+        if index >= 0:
+            combobox.setCurrentIndex(index)
+        else:
+            combobox.setEditText(rule)
+        combobox.blockSignals(False)
 
     def update_game_state(self):
         self.ui.lbl_time.setText(f"Time: {self._gol_model.get_time()}")
-        self.ui.lbl_population.setText(f"Population: {self._gol_model.get_cells_count()}")
+        population = f"Population: {self._gol_model.get_cells_count()}"
+        # Show the births and deaths of the last generation, when the engine computes them.
+        if self._gol_model.get_births() is not None:
+            population += f" (+{self._gol_model.get_births()} -{self._gol_model.get_deaths()})"
+        self.ui.lbl_population.setText(population)
 
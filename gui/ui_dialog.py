@@ -120,6 +120,8 @@ class Ui_Info(object):
 " \n"
 "Clicking with the mouse on one point of the grid will create or delete a cell in that position. While the simulation is running is not possible to add or remove cells.\n"
 "\n"
+"Use the mouse wheel to zoom the grid and drag it with the right or middle button. Double click with the right or middle button to show the whole grid again.\n"
+"\n"
 "You can start/stop the simulation with the Play/Pause button, or perform a single iteration of the simulation using the button Single Step.\n"
 "\n"
 "The slider allows you to speed up or slow down the pace of the simulation.\n"
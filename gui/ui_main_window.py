@@ -53,6 +53,15 @@ class Ui_MainWindow(object):
         self.combobox_configurations.setSizeAdjustPolicy(QtWidgets.QComboBox.AdjustToMinimumContentsLength)
         self.combobox_configurations.setObjectName("combobox_configurations")
         self.gridLayout_11.addWidget(self.combobox_configurations, 1, 0, 1, 1)
+        self.lbl_rule = QtWidgets.QLabel(self.widget_5)
+        self.lbl_rule.setObjectName("lbl_rule")
+        self.gridLayout_11.addWidget(self.lbl_rule, 2, 0, 1, 1)
+        self.combobox_rules = QtWidgets.QComboBox(self.widget_5)
+        self.combobox_rules.setEditable(True)
+        self.combobox_rules.setInsertPolicy(QtWidgets.QComboBox.NoInsert)
+        self.combobox_rules.setSizeAdjustPolicy(QtWidgets.QComboBox.AdjustToMinimumContentsLength)
+        self.combobox_rules.setObjectName("combobox_rules")
+        self.gridLayout_11.addWidget(self.combobox_rules, 3, 0, 1, 1)
         self.gridLayout_6.addWidget(self.widget_5, 1, 0, 1, 2)
         self.widget_4 = QtWidgets.QWidget(self.frame_2)
         self.widget_4.setObjectName("widget_4")
@@ -118,6 +127,18 @@ class Ui_MainWindow(object):
         self.button_singlestep = QtWidgets.QPushButton(self.widget_7)
         self.button_singlestep.setObjectName("button_singlestep")
         self.gridLayout_10.addWidget(self.button_singlestep, 0, 1, 1, 1)
+        self.line_generation = QtWidgets.QLineEdit(self.widget_7)
+        self.line_generation.setObjectName("line_generation")
+        self.gridLayout_10.addWidget(self.line_generation, 2, 0, 1, 1)
+        self.button_jump = QtWidgets.QPushButton(self.widget_7)
+        self.button_jump.setObjectName("button_jump")
+        self.gridLayout_10.addWidget(self.button_jump, 2, 1, 1, 1)
+        self.line_population = QtWidgets.QLineEdit(self.widget_7)
+        self.line_population.setObjectName("line_population")
+        self.gridLayout_10.addWidget(self.line_population, 3, 0, 1, 1)
+        self.button_run_until = QtWidgets.QPushButton(self.widget_7)
+        self.button_run_until.setObjectName("button_run_until")
+        self.gridLayout_10.addWidget(self.button_run_until, 3, 1, 1, 1)
         self.gridLayout_4.addWidget(self.widget_7, 3, 0, 1, 1)
         self.widget_3 = QtWidgets.QWidget(self.frame)
         self.widget_3.setObjectName("widget_3")
@@ -141,6 +162,14 @@ class Ui_MainWindow(object):
         self.lbl_fps = QtWidgets.QLabel(self.widget_6)
         self.lbl_fps.setObjectName("lbl_fps")
         self.gridLayout_9.addWidget(self.lbl_fps, 2, 0, 1, 1)
+        self.lbl_turbo = QtWidgets.QLabel(self.widget_6)
+        self.lbl_turbo.setObjectName("lbl_turbo")
+        self.gridLayout_9.addWidget(self.lbl_turbo, 3, 0, 1, 1)
+        self.spinbox_turbo = QtWidgets.QSpinBox(self.widget_6)
+        self.spinbox_turbo.setMinimum(1)
+        self.spinbox_turbo.setMaximum(1000000)
+        self.spinbox_turbo.setObjectName("spinbox_turbo")
+        self.gridLayout_9.addWidget(self.spinbox_turbo, 4, 0, 1, 1)
         self.gridLayout_4.addWidget(self.widget_6, 2, 0, 1, 2)
         self.gridLayout_2.addWidget(self.frame, 3, 0, 1, 1)
         self.gridLayout_3.addLayout(self.gridLayout_2, 0, 1, 1, 1)
@@ -170,6 +199,14 @@ class Ui_MainWindow(object):
         self.lbl_population = QtWidgets.QLabel(self.frame_11)
         self.lbl_population.setObjectName("lbl_population")
         self.gridLayout_13.addWidget(self.lbl_population, 0, 1, 1, 1)
+        self.lbl_timeline = QtWidgets.QLabel(self.frame_11)
+        self.lbl_timeline.setObjectName("lbl_timeline")
+        self.gridLayout_13.addWidget(self.lbl_timeline, 1, 0, 1, 1)
+        self.slider_timeline = QtWidgets.QSlider(self.frame_11)
+        self.slider_timeline.setMaximum(0)
+        self.slider_timeline.setOrientation(QtCore.Qt.Horizontal)
+        self.slider_timeline.setObjectName("slider_timeline")
+        self.gridLayout_13.addWidget(self.slider_timeline, 1, 1, 1, 1)
         self.gridLayout_5.addWidget(self.frame_11, 1, 0, 1, 1)
         self.frame_gamegrid = QtWidgets.QFrame(self.widget_10)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
@@ -199,6 +236,7 @@ class Ui_MainWindow(object):
         _translate = QtCore.QCoreApplication.translate
         MainWindow.setWindowTitle(_translate("MainWindow", "Conoway\'s Game of Life"))
         self.lbl_selectconf.setText(_translate("MainWindow", "Select a configuration:"))
+        self.lbl_rule.setText(_translate("MainWindow", "Rule:"))
         self.button_load.setText(_translate("MainWindow", "Load"))
         self.button_save.setText(_translate("MainWindow", "Save"))
         self.lbl_config.setText(_translate("MainWindow", "Configuration Settings"))
@@ -206,9 +244,16 @@ class Ui_MainWindow(object):
         self.button_start.setText(_translate("MainWindow", "Start"))
         self.button_clear.setText(_translate("MainWindow", "Reset"))
         self.button_singlestep.setText(_translate("MainWindow", "Single Step"))
+        self.line_generation.setPlaceholderText(_translate("MainWindow", "Generation"))
+        self.button_jump.setText(_translate("MainWindow", "Jump"))
+        self.line_population.setPlaceholderText(_translate("MainWindow", "Population"))
+        self.button_run_until.setText(_translate("MainWindow", "Run Until"))
         self.checkbox_age.setText(_translate("MainWindow", "Show Cell Age"))
         self.lbl_speed.setText(_translate("MainWindow", "Speed:"))
         self.lbl_fps.setText(_translate("MainWindow", "FPS"))
+        self.lbl_turbo.setText(_translate("MainWindow", "Generations per frame:"))
         self.lbl_time.setText(_translate("MainWindow", "Time:"))
         self.lbl_population.setText(_translate("MainWindow", "Population:"))
+        self.lbl_timeline.setText(_translate("MainWindow", "Timeline:"))
+        self.slider_timeline.setToolTip(_translate("MainWindow", "Rewind to a recorded generation"))
 
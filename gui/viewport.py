@@ -0,0 +1,191 @@
+import math
+
+import numpy as np
+
+
+class Viewport:
+    """
+    Class that maps the grid onto the widget that shows it, with zoom and pan.
+    The view is described by the scale of the grid, in pixels per cell along each axis, and by the cell shown at the
+    center of the widget. In the fit mode, the default one, the whole grid is stretched to fill the widget as before
+    zooming; the zoom then multiplies both scales by the same factor, so the cells keep the aspect ratio of the fit.
+    """
+
+    # Maximum scale, in pixels per cell.
+    MAX_SCALE = 64.0
+
+    def __init__(self):
+        self._grid_size = (1, 1)
+        self._widget_size = (1, 1)
+        # Zoom factor over the fit scale, and center of the view as (row, column) in cells.
+        self._zoom = 1.0
+        self._center = (0.5, 0.5)
+        self._fit = True
+
+    def get_state(self) -> tuple:
+        """
+        :return: A tuple that changes whenever the view changes.
+        """
+        return self._grid_size, self._widget_size, self.get_scale(), self.get_center()
+
+    def get_scale(self) -> tuple:
+        """
+        :return: The pixels per cell along the rows and along the columns.
+        """
+        rows, cols = self._grid_size
+        height, width = self._widget_size
+        return height / rows * self._zoom, width / cols * self._zoom
+
+    def get_center(self) -> tuple:
+        if self._fit:
+            return self._grid_size[0] / 2, self._grid_size[1] / 2
+        return self._center
+
+    def get_level(self) -> int:
+        """
+        :return: The level of detail of the view: the grid is drawn from a copy reduced 2^level times, the smallest one
+        whose cells cover at least a pixel along both axes, so that no cell is lost when it's scaled down.
+        """
+        scale = min(self.get_scale())
+        return int(math.ceil(math.log2(1 / scale))) if scale < 1 else 0
+
+    def get_visible_cells(self) -> tuple:
+        """
+        :return: The bounds of the cells at least partially visible as (top, left, bottom, right), bottom and right
+        excluded.
+        """
+        top, left = self.widget_to_grid(0, 0)
+        bottom, right = self.widget_to_grid(self._widget_size[1], self._widget_size[0])
+        rows, cols = self._grid_size
+        return (min(max(int(math.floor(top)), 0), rows), min(max(int(math.floor(left)), 0), cols),
+                min(max(int(math.ceil(bottom)), 0), rows), min(max(int(math.ceil(right)), 0), cols))
+
+    def set_grid_size(self, grid_size: tuple) -> None:
+        if tuple(grid_size) != self._grid_size:
+            self._grid_size = tuple(grid_size)
+            self.reset()
+
+    def set_widget_size(self, width: int, height: int) -> None:
+        self._widget_size = (max(height, 1), max(width, 1))
+
+    def reset(self) -> None:
+        """
+        Go back to the fit mode, which shows the whole grid.
+        """
+        self._zoom = 1.0
+        self._fit = True
+
+    def zoom_at(self, factor: float, x: float, y: float) -> None:
+        """
+        Zoom the view keeping still the point under the given widget position. The view can't zoom out beyond the
+        whole grid.
+        :param factor: The zoom factor, greater than 1 to zoom in.
+        :param x: The horizontal position in the widget.
+        :param y: The vertical position in the widget.
+        """
+        row, col = self.widget_to_grid(x, y)
+        center_row, center_col = self.get_center()
+        max_zoom = max(self.MAX_SCALE / min(self.get_scale()) * self._zoom, 1.0)
+        zoom = min(max(self._zoom * factor, 1.0), max_zoom)
+        if zoom == 1.0:
+            self.reset()
+            return
+        ratio = self._zoom / zoom
+        self._zoom = zoom
+        self._fit = False
+        self._set_center(row + (center_row - row) * ratio, col + (center_col - col) * ratio)
+
+    def pan(self, dx: float, dy: float) -> None:
+        """
+        Move the view by the given pixels, as if the grid was dragged.
+        :param dx: The horizontal displacement in pixels.
+        :param dy: The vertical displacement in pixels.
+        """
+        if self._fit:
+            return
+        scale_row, scale_col = self.get_scale()
+        center_row, center_col = self.get_center()
+        self._set_center(center_row - dy / scale_row, center_col - dx / scale_col)
+
+    def widget_to_grid(self, x: float, y: float) -> tuple:
+        """
+        :param x: The horizontal position in the widget.
+        :param y: The vertical position in the widget.
+        :return: The position in the grid as fractional (row, column).
+        """
+        scale_row, scale_col = self.get_scale()
+        center_row, center_col = self.get_center()
+        height, width = self._widget_size
+        return center_row + (y - height / 2) / scale_row, center_col + (x - width / 2) / scale_col
+
+    def grid_to_widget(self, row: float, col: float) -> tuple:
+        """
+        :param row: The row in the grid, possibly fractional.
+        :param col: The column in the grid, possibly fractional.
+        :return: The position in the widget as (x, y).
+        """
+        scale_row, scale_col = self.get_scale()
+        center_row, center_col = self.get_center()
+        height, width = self._widget_size
+        return width / 2 + (col - center_col) * scale_col, height / 2 + (row - center_row) * scale_row
+
+    def widget_to_cell(self, x: float, y: float) -> tuple:
+        """
+        :param x: The horizontal position in the widget.
+        :param y: The vertical position in the widget.
+        :return: The cell under the position as (row, column), None if the position is outside the grid.
+        """
+        row, col = (int(math.floor(value)) for value in self.widget_to_grid(x, y))
+        if 0 <= row < self._grid_size[0] and 0 <= col < self._grid_size[1]:
+            return row, col
+        return None
+
+    def _set_center(self, row: float, col: float) -> None:
+        # The center is kept inside the grid, so that the grid can't be dragged out of the widget.
+        self._center = min(max(row, 0.0), self._grid_size[0]), min(max(col, 0.0), self._grid_size[1])
+
+
+class Mipmap:
+    """
+    Class that keeps a pyramid of reduced copies of the grid: the level 0 is the grid itself, and each next level has
+    one cell per 2x2 block of the previous one, which holds the highest state of the block. Isolated alive cells are
+    then still visible when the grid is zoomed out, and a zoomed out view is drawn from an array about the size of the
+    screen rather than of the grid.
+    The levels are computed lazily, when they are first requested for a grid, and kept until the grid changes.
+    """
+
+    def __init__(self):
+        self._levels = []
+
+    def update(self, grid: np.ndarray) -> None:
+        """
+        :param grid: The current grid. Grids are immutable, so it is kept without copying it.
+        """
+        if not self._levels or grid is not self._levels[0]:
+            self._levels = [grid]
+
+    def get_level(self, level: int) -> tuple:
+        """
+        :param level: The requested level. Levels beyond the one made of a single cell are clamped to it.
+        :return: A tuple with the array of the level, which must not be modified, and the side in cells of the grid of
+        the block covered by each of its cells.
+        """
+        while len(self._levels) <= level and max(self._levels[-1].shape) > 1:
+            self._levels.append(_max_pool(self._levels[-1]))
+        level = min(level, len(self._levels) - 1)
+        return self._levels[level], 2 ** level
+
+
+def _max_pool(grid: np.ndarray) -> np.ndarray:
+    """
+    :param grid: The uint8 grid.
+    :return: The grid reduced by 2 along both axes, where each cell holds the highest state of a 2x2 block. The last row
+    and column of an odd sized grid are pooled with dead cells.
+    """
+    rows, cols = grid.shape
+    if rows % 2 or cols % 2:
+        grid = np.pad(grid, ((0, rows % 2), (0, cols % 2)), "constant")
+    pooled = np.maximum(grid[0::2, 0::2], grid[0::2, 1::2])
+    np.maximum(pooled, grid[1::2, 0::2], out=pooled)
+    np.maximum(pooled, grid[1::2, 1::2], out=pooled)
+    return pooled
@@ -1,17 +1,45 @@
+import argparse
 import sys
 
+# Run the simulation without the GUI: the Qt modules are not even imported.
+if "--headless" in sys.argv:
+    from controller import headless
+    sys.exit(headless.main([arg for arg in sys.argv[1:] if arg != "--headless"]))
+# Search random soups for the objects they settle into.
+if "--search" in sys.argv:
+    from controller import soup_search
+    sys.exit(soup_search.main([arg for arg in sys.argv[1:] if arg != "--search"]))
+
 from PyQt5.QtWidgets import QApplication
 
 from gui.main_window import MainWindow
 from model.gol_model import GOLModel
 from controller.controller import Controller
+from utils.profiler import session_profiler
+
+parser = argparse.ArgumentParser(description="Conway's Game of Life. Run it with --headless --help to list the options "
+                                             "of the simulation without the GUI, or with --search --help to list "
+                                             "the options of the search of random soups.")
+parser.add_argument("--profile", metavar="NAME",
+                    help="Profile the session with cProfile and measure the time of each phase of the frames. When the "
+                         "application is closed, the statistics are written in NAME.prof and the phases in NAME.csv.")
+# The other arguments are left to Qt.
+args, qt_args = parser.parse_known_args()
 
-application = QApplication(sys.argv)
+if args.profile:
+    session_profiler.start()
+
+application = QApplication(sys.argv[:1] + qt_args)
 
 # Create model, GUI and controller.
 gol_model = GOLModel()
 main_window = MainWindow(gol_model)
 controller = Controller(application, main_window, gol_model)
 
+if args.profile:
+    # Connected after the controller, so that the simulation thread has stopped and its profile is collected.
+    application.aboutToQuit.connect(lambda: print("Profile saved in {} and {}".format(
+        *session_profiler.stop(args.profile))))
+
 main_window.show()
 sys.exit(application.exec_())
@@ -1,17 +1,70 @@
+from contextlib import contextmanager
+
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from utils.profiler import timer
+
 
 class Observable(QObject):
     """
     Implementation of the Observable of the Observer pattern.
+    Besides the value_changed signal, emitted at every change, subclasses can define a "<field>_changed" signal for
+    each group of fields, so that observers are notified only when the fields they show change.
+    Changes made inside a batch are coalesced: each signal is emitted at most once, when the batch ends.
     """
     value_changed = pyqtSignal(object)
 
     def __init__(self):
         super().__init__()
+        # Nesting level of the open batches.
+        self._batch_depth = 0
+        # Fields changed in the current batch.
+        self._pending_fields = set()
+        self._pending = False
+
+    def observe(self, slot, field: str = None):
+        """
+        Register an observer.
+        :param slot: The callable notified with the observable.
+        :param field: The group of fields to observe. If None, the slot is notified at every change.
+        """
+        signal = self.value_changed if field is None else self._field_signal(field)
+        signal.connect(slot)
+
+    def notify(self, *fields: str):
+        """
+        Notify the observers of the changed fields and the generic observers.
+        :param fields: The groups of fields that changed.
+        """
+        if self._batch_depth:
+            self._pending_fields.update(fields)
+            self._pending = True
+        else:
+            self._emit(fields)
+
+    @contextmanager
+    def batch(self):
+        """
+        Context manager that coalesces the notifications of the changes made inside it.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._pending:
+                fields = self._pending_fields
+                self._pending_fields = set()
+                self._pending = False
+                self._emit(fields)
 
-    def observe(self, slot):
-        self.value_changed.connect(slot)
+    def _emit(self, fields):
+        # The observers are called synchronously: the time they take is part of the notification, except the phases
+        # that they measure themselves.
+        with timer.measure("notify"):
+            for field in fields:
+                self._field_signal(field).emit(self)
+            self.value_changed.emit(self)
 
-    def notify(self):
-        self.value_changed.emit(self)
\ No newline at end of file
+    def _field_signal(self, field: str):
+        return getattr(self, field + "_changed")
@@ -1,5 +1,7 @@
 import numpy as np
+from PyQt5.QtCore import pyqtSignal
 
+from engine.rules import Rule, parse_rule
 from model.Observable import Observable
 from utils.config import config
 
@@ -7,35 +9,70 @@ from utils.config import config
 class GOLModel(Observable):
     """
     Class that represent the state of the Game of Life Grid.
+    The fields are split in three groups, each one with its own signal: the grid (and how it is displayed), the
+    simulation state and settings, and the simulation statistics.
     """
 
+    # Groups of fields that can be observed separately.
+    GRID = "grid"
+    STATE = "state"
+    STATS = "stats"
+
+    grid_changed = pyqtSignal(object)
+    state_changed = pyqtSignal(object)
+    stats_changed = pyqtSignal(object)
+
     def __init__(self):
         super().__init__()
 
         # The base pattern shown.
         self._base_pattern = config.BASE_PATTERN
+        # The rule of the simulation.
+        self._rule = parse_rule(config.RULE)
         # Size of the GOL grid.
         self._grid_size = config.GRID_SIZE
         # The state of the grid is represented by a matrix of integer, where the values of each element represent the
         # corresponding cell age.
+        # The grid is immutable: every change replaces it with a new array and increases its version.
         self._grid = np.zeros(self._grid_size, dtype=np.uint8)
+        self._grid.flags.writeable = False
+        self._grid_version = 0
         # Flag that indicates if the simulation is running.
         self._is_running = False
         # Flag that indicates if cell's age need to be shown.
         self._show_age = False
         # The speed of the simulation.
         self._fps = config.SPEED
+        # The number of generations computed for each frame of the simulation.
+        self._generations_per_frame = config.GENERATIONS_PER_FRAME
         # The count of the alive cells.
         self._cells_count = 0
+        # The cells born and dead in the last generation, None if unknown.
+        self._births = 0
+        self._deaths = 0
         # The number of step taken.
         self._time = 0
 
     def get_grid(self) -> np.ndarray:
-        return self._grid.copy()
+        """
+        :return: The grid, without copying it. The array is read-only: it must be copied to be modified and the changes
+        must be applied through set_grid_state.
+        """
+        return self._grid
+
+    def get_grid_version(self) -> int:
+        """
+        :return: A counter increased at every change of the grid, so that observers can skip the work when the grid
+        didn't change.
+        """
+        return self._grid_version
 
     def get_fps(self) -> int:
         return self._fps
 
+    def get_generations_per_frame(self) -> int:
+        return self._generations_per_frame
+
     def get_grid_size(self) -> tuple:
         return self._grid_size
 
@@ -48,46 +85,83 @@ class GOLModel(Observable):
     def get_cells_count(self) -> int:
         return self._cells_count
 
+    def get_births(self) -> int:
+        return self._births
+
+    def get_deaths(self) -> int:
+        return self._deaths
+
     def get_time(self) -> int:
         return self._time
 
     def get_base_pattern(self) -> str:
         return self._base_pattern
 
+    def get_rule(self) -> Rule:
+        return self._rule
+
     def set_fps(self, value: int) -> None:
         self._fps = value
-        self.notify()
+        self.notify(self.STATE)
+
+    def set_generations_per_frame(self, value: int) -> None:
+        self._generations_per_frame = value
+        self.notify(self.STATE)
 
     def set_grid_size(self, rows: int, columns: int) -> None:
         self._grid_size = (rows, columns)
-        self.notify()
+        self.notify(self.GRID)
 
     def set_grid_state(self, grid: np.ndarray) -> None:
+        """
+        Replace the grid. The model takes the ownership of the array, which becomes read-only.
+        :param grid: The new grid.
+        """
+        grid.flags.writeable = False
         self._grid = grid
-        self.notify()
+        self._grid_version += 1
+        self.notify(self.GRID)
 
     def set_running(self, value: bool) -> None:
         self._is_running = value
-        self.notify()
+        self.notify(self.STATE)
 
     def set_show_age(self, value: bool) -> None:
         self._show_age = value
-        self.notify()
-
-    def set_cells_count(self, value: int) -> None:
-        self._cells_count = value
-        self.notify()
+        # The flag changes how the grid is displayed.
+        self.notify(self.GRID, self.STATE)
+
+    def set_population_stats(self, cells_count: int, births: int, deaths: int) -> None:
+        """
+        Set the population statistics, as computed by the engine while stepping.
+        :param cells_count: The number of alive cells.
+        :param births: The number of cells born in the last generation, None if unknown.
+        :param deaths: The number of cells dead in the last generation, None if unknown.
+        """
+        self._cells_count = cells_count
+        self._births = births
+        self._deaths = deaths
+        self.notify(self.STATS)
 
     def update_time(self) -> None:
         self._time += 1
-        self.notify()
+        self.notify(self.STATS)
+
+    def set_time(self, value: int) -> None:
+        self._time = value
+        self.notify(self.STATS)
 
     def reset_time(self) -> None:
         self._time = 0
-        self.notify()
+        self.notify(self.STATS)
 
     def set_base_pattern(self, value: str) -> None:
         self._base_pattern = value
-        self.notify()
+        self.notify(self.STATE)
+
+    def set_rule(self, value: Rule) -> None:
+        self._rule = value
+        # The decay states of the Generations rules are displayed with their own colors.
+        self.notify(self.GRID, self.STATE)
 
 
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from engine.cycle_detector import CycleDetector, run_detecting_cycles
+from engine.engines import ENGINES, create_engine
+
+# HashLife doesn't track the age of the cells.
+AGE_ENGINES = [name for name in ENGINES if name != "hashlife"]
+
+
+def _block_and_blinker() -> np.ndarray:
+    grid = np.zeros((12, 16), np.uint8)
+    grid[2:4, 2:4] = 1
+    grid[7, 9:12] = 1
+    return grid
+
+
+@pytest.mark.parametrize("engine_name", AGE_ENGINES)
+@pytest.mark.parametrize("generations", [5, 100, 500])
+def test_skipped_cycles_match_computed_ages(engine_name, generations):
+    skipping = create_engine(engine_name, _block_and_blinker(), track_age=True)
+    computing = create_engine(engine_name, _block_and_blinker(), track_age=True)
+
+    period = run_detecting_cycles(skipping, generations, CycleDetector(64))
+    computing.run(generations)
+
+    assert period == 2
+    assert skipping.get_time() == computing.get_time() == generations
+    assert np.array_equal(skipping.get_grid(), computing.get_grid())
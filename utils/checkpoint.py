@@ -0,0 +1,232 @@
+import json
+import os
+import struct
+import threading
+from pathlib import Path
+
+import numpy as np
+
+# Suffix of the checkpoint files.
+CHECKPOINT_SUFFIX = ".gol"
+# The checkpoint file starts with a fixed size header, followed by two slots that hold the uint8 age grid.
+MAGIC = b"GOLCKPT1"
+HEADER_SIZE = 4096
+# The changed regions of the grid are found and written in bands of rows.
+BAND_ROWS = 64
+
+
+def read_checkpoint(file_path: str) -> tuple:
+    """
+    Read a checkpoint. The grid is memory mapped, so it's read from the disk only when it's accessed.
+    :param file_path: The checkpoint file.
+    :return: A tuple with the read-only age grid and the dictionary of the session metadata, None if the file does not
+    exist or is invalid.
+    """
+    header = _read_header(Path(file_path))
+    if header is None:
+        return None
+    rows, cols, slot = header["rows"], header["cols"], header["slot"]
+    try:
+        grid = np.memmap(file_path, np.uint8, "r", offset=HEADER_SIZE + slot * rows * cols, shape=(rows, cols))
+    except (OSError, ValueError):
+        return None
+    return grid, header["metadata"]
+
+
+def write_checkpoint(file_path: str, grid: np.ndarray, metadata: dict) -> None:
+    """
+    Write a checkpoint of a session.
+    :param file_path: The checkpoint file.
+    :param grid: The age grid.
+    :param metadata: The dictionary of the session metadata, which must be serializable in JSON.
+    """
+    writer = CheckpointWriter(file_path)
+    writer.write(grid, metadata)
+    writer.close()
+
+
+class CheckpointWriter:
+    """
+    Class that writes the checkpoints of a session into the same file again and again, rewriting only the regions of
+    the grid that changed.
+    The file holds two copies of the grid and the header points to the valid one. A new checkpoint is written into the
+    other copy, which is then made valid by rewriting the header: if the writing is interrupted, the previous
+    checkpoint is still valid. A checkpoint file of the same size is reused in the same way, while a new file is built
+    under a temporary name that replaces the previous file only when it holds a complete checkpoint.
+    """
+
+    def __init__(self, file_path: str):
+        self._file_path = Path(file_path)
+        # The two slots of the file, memory mapped as a (2, rows, columns) array. None until the first write.
+        self._slots = None
+        # The grid held by each slot, used to find the changed regions. None if the slot content is unknown.
+        self._slot_grids = [None, None]
+        # The slot of the last written checkpoint.
+        self._valid_slot = 1
+        # The file into which the slots are written: the checkpoint file, or the temporary file that will replace it.
+        self._write_path = self._file_path
+
+    def write(self, grid: np.ndarray, metadata: dict) -> None:
+        """
+        Write a checkpoint.
+        :param grid: The age grid. It's kept to find the changes of the next writes, so it must not be modified. A
+        memory-mapped grid is read in bands and not kept: its changes are found comparing it with the file.
+        :param metadata: The dictionary of the session metadata, which must be serializable in JSON.
+        """
+        if self._slots is None or self._slots.shape[1:] != grid.shape:
+            self._open(grid.shape)
+
+        slot = 1 - self._valid_slot
+        target = self._slots[slot]
+        out_of_core = isinstance(grid, np.memmap)
+        previous = self._slot_grids[slot]
+        if previous is None and out_of_core:
+            previous = target
+        # Copy only the bands of rows that changed, so that only their pages are written to the disk, and a
+        # memory-mapped grid is never loaded as a whole.
+        for start in range(0, grid.shape[0], BAND_ROWS):
+            band = grid[start:start + BAND_ROWS]
+            if previous is None or not np.array_equal(band, previous[start:start + BAND_ROWS]):
+                target[start:start + BAND_ROWS] = band
+        self._slots.flush()
+        self._slot_grids[slot] = None if out_of_core else grid
+
+        _write_header(self._write_path, {"rows": grid.shape[0], "cols": grid.shape[1], "slot": int(slot),
+                                         "metadata": metadata})
+        self._valid_slot = slot
+        if self._write_path != self._file_path:
+            # The new file is complete: it replaces the previous one, and is mapped again under its final name.
+            self._slots = None
+            os.replace(self._write_path, self._file_path)
+            self._write_path = self._file_path
+            self._slots = np.memmap(self._file_path, np.uint8, "r+", offset=HEADER_SIZE, shape=(2,) + grid.shape)
+
+    def close(self) -> None:
+        if self._slots is not None:
+            self._slots.flush()
+            # Drop the mapping to close the file.
+            self._slots = None
+            self._slot_grids = [None, None]
+
+    def _open(self, shape: tuple) -> None:
+        """
+        Map the two slots of the given shape. A valid checkpoint of the same shape is kept, and the next checkpoint is
+        written into its other slot. Otherwise a temporary file is created with an empty header.
+        """
+        self.close()
+        header = _read_header(self._file_path)
+        if header is not None and (header["rows"], header["cols"]) == tuple(shape):
+            self._write_path = self._file_path
+            self._valid_slot = header["slot"]
+        else:
+            self._write_path = self._file_path.with_name(self._file_path.name + ".tmp")
+            with open(self._write_path, "wb") as f:
+                f.truncate(HEADER_SIZE + 2 * shape[0] * shape[1])
+            self._valid_slot = 1
+        self._slots = np.memmap(self._write_path, np.uint8, "r+", offset=HEADER_SIZE, shape=(2,) + tuple(shape))
+        self._slot_grids = [None, None]
+
+
+class Autosaver:
+    """
+    Class that writes a checkpoint of the session in background every given number of generations.
+    A checkpoint is skipped if the previous one is still being written.
+    """
+
+    def __init__(self, file_path: str, interval: int):
+        self._file_path = Path(file_path)
+        # The number of generations between two checkpoints, 0 to disable the autosave.
+        self._interval = interval
+        self._writer = CheckpointWriter(file_path)
+        # The generation of the last checkpoint, None if no checkpoint was written.
+        self._last_time = None
+        self._thread = None
+
+    def get_file_path(self) -> Path:
+        return self._file_path
+
+    def get_interval(self) -> int:
+        return self._interval
+
+    def update(self, grid: np.ndarray, time: int, metadata: dict) -> bool:
+        """
+        Write a checkpoint in background if enough generations passed since the last one.
+        :param grid: The age grid, which must not be modified.
+        :param time: The current generation.
+        :param metadata: The dictionary of the session metadata.
+        :return: True if a checkpoint is being written.
+        """
+        if self._interval <= 0:
+            return False
+        if self._last_time is not None and abs(time - self._last_time) < self._interval:
+            return False
+        if self._thread is not None and self._thread.is_alive():
+            return False
+
+        self._last_time = time
+        self._thread = threading.Thread(target=self._writer.write, args=(grid, metadata), daemon=True)
+        self._thread.start()
+        return True
+
+    def write(self, grid: np.ndarray, metadata: dict) -> None:
+        """
+        Write a checkpoint now, after the one being written in background, e.g. at the end of a session.
+        :param grid: The age grid.
+        :param metadata: The dictionary of the session metadata.
+        """
+        if self._thread is not None:
+            self._thread.join()
+        self._writer.write(grid, metadata)
+
+    def close(self) -> None:
+        """
+        Wait for the checkpoint being written and close the file.
+        """
+        if self._thread is not None:
+            self._thread.join()
+        self._writer.close()
+
+    def discard(self) -> None:
+        """
+        Close and delete the checkpoint file, e.g. when the session ends normally and there is nothing to resume.
+        """
+        self.close()
+        # The temporary file is left only if a first checkpoint was interrupted.
+        for file_path in (self._file_path, self._file_path.with_name(self._file_path.name + ".tmp")):
+            if file_path.exists():
+                file_path.unlink()
+
+
+def _read_header(file_path: Path) -> dict:
+    """
+    :return: The dictionary of the header, None if the file does not exist or is not a checkpoint.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            data = f.read(HEADER_SIZE)
+    except OSError:
+        return None
+    if len(data) < len(MAGIC) + 4 or not data.startswith(MAGIC):
+        return None
+    length, = struct.unpack_from("<I", data, len(MAGIC))
+    try:
+        header = json.loads(data[len(MAGIC) + 4:len(MAGIC) + 4 + length])
+        size = HEADER_SIZE + 2 * header["rows"] * header["cols"]
+        if header["slot"] not in (0, 1) or os.path.getsize(file_path) < size:
+            return None
+    except (ValueError, KeyError, TypeError):
+        return None
+    return header
+
+
+def _write_header(file_path: Path, header: dict) -> None:
+    """
+    Write the header and wait until it's on the disk.
+    """
+    data = json.dumps(header).encode()
+    if len(MAGIC) + 4 + len(data) > HEADER_SIZE:
+        raise ValueError("The checkpoint metadata is too big")
+    with open(file_path, "r+b") as f:
+        f.write(MAGIC + struct.pack("<I", len(data)) + data)
+        f.flush()
+        os.fsync(f.fileno())
@@ -1,6 +1,8 @@
 """
 Define the color tables.
 """
+from functools import lru_cache
+
 from PyQt5.QtGui import qRgb
 
 ALIVE_COLOR = qRgb(255, 255, 255)
@@ -10,3 +12,15 @@ COLOR_TABLE = [DEAD_COLOR] + [qRgb(0, 255, 255 - i * 2) for i in range(128)] + \
               [qRgb(i*2, 255-i*2, 0) for i in range(127)]
 # Alive cell: white - Dead cell: black
 BW_COLOR_TABLE = [DEAD_COLOR] + [ALIVE_COLOR for i in range(256)]
+
+
+@lru_cache()
+def decay_color_table(states: int) -> list:
+    """
+    Color table of the Generations rules.
+    :param states: The number of states of the rule.
+    :return: The colors of the cells: alive cells are white and the cells in a decay state fade from light gray to dark
+    gray. The values beyond the last state are dead.
+    """
+    decay = [qRgb(v, v, v) for v in (200 - 160 * i // max(states - 3, 1) for i in range(states - 2))]
+    return [DEAD_COLOR, ALIVE_COLOR] + decay + [DEAD_COLOR] * (256 - states)
@@ -15,6 +15,12 @@ class Config:
             cfg = yaml.safe_load(file)
 
         _game_cfg = cfg['game_config']
+        _engine_cfg = cfg['engine_config']
+        _cycle_cfg = cfg['cycle_config']
+        _checkpoint_cfg = cfg['checkpoint_config']
+        _recording_cfg = cfg['recording_config']
+        _profiling_cfg = cfg['profiling_config']
+        _search_cfg = cfg['search_config']
         _pattern_cfg = cfg['pattern_config']
         _paths_cfg = cfg['filepaths']
 
@@ -22,14 +28,78 @@ class Config:
 
         self.SPEED = int(_game_cfg['speed'])
 
+        self.GENERATIONS_PER_FRAME = int(_game_cfg['generations_per_frame'])
+
+        self.ENGINE = _engine_cfg['engine']
+
+        self.RULE = str(_engine_cfg['rule'])
+
+        self.HASHLIFE_MEMORY_MB = int(_engine_cfg['hashlife_memory_mb'])
+
+        self.TILE_SIZE = int(_engine_cfg['tile_size'])
+
+        self.PARALLEL_WORKERS = int(_engine_cfg['parallel_workers'])
+
+        self.PARALLEL_BACKEND = _engine_cfg['parallel_backend']
+
+        self.MEMMAP_BUDGET_MB = int(_engine_cfg['memmap_budget_mb'])
+
+        self.MEMMAP_DIR = _engine_cfg['memmap_dir'] or None
+
+        self.CYCLE_WINDOW = int(_cycle_cfg['window'])
+
+        self.PAUSE_ON_CYCLE = _cycle_cfg['on_cycle'] == "pause"
+
+        self.AUTOSAVE_GENERATIONS = int(_checkpoint_cfg['autosave_generations'])
+
+        self.PATH_AUTOSAVE = self._root_path.joinpath(_checkpoint_cfg['autosave_file'])
+
+        self.RECORDING_ENABLED = bool(_recording_cfg['enabled'])
+
+        self.KEYFRAME_INTERVAL = int(_recording_cfg['keyframe_interval'])
+
+        self.RECORDING_MEMORY_MB = int(_recording_cfg['memory_mb'])
+
+        self.PATH_RECORDING = self._root_path.joinpath(_recording_cfg['spill_file'])
+
+        self.RECORDING_DISK_MB = int(_recording_cfg['disk_mb'])
+
+        self.SHOW_TIMINGS = bool(_profiling_cfg['show_timings'])
+
+        self.TIMING_WINDOW = int(_profiling_cfg['window'])
+
+        self.SEARCH_SOUP_SIZE = int(_search_cfg['soup_size'])
+
+        self.SEARCH_DENSITY = float(_search_cfg['density'])
+
+        self.SEARCH_MARGIN = int(_search_cfg['margin'])
+
+        self.SEARCH_CHUNK_SIZE = int(_search_cfg['chunk_size'])
+
+        self.SEARCH_WORKERS = int(_search_cfg['workers'])
+
+        self.SEARCH_MAX_GENERATIONS = int(_search_cfg['max_generations'])
+
+        self.SEARCH_MAX_PERIOD = int(_search_cfg['max_period'])
+
+        self.PATH_CENSUS = self._root_path.joinpath(_search_cfg['census_file'])
+
         self.BASE_PATTERN = _pattern_cfg['base']
 
-        self.DIR_PATTERN = self._root_path.joinpath(_paths_cfg['resources']['path'])
+        self.PATTERN_CACHE_SIZE = int(_pattern_cfg['cache_size'])
+
+        self.DIR_RESOURCES = self._root_path.joinpath(_paths_cfg['resources']['path'])
+
+        self.DIR_CENSUS = self.DIR_RESOURCES.joinpath(_paths_cfg['resources']['census']['path'])
+
+        self.DIR_PATTERN = self.DIR_RESOURCES
 
         _pattern_paths_cfg = _paths_cfg['resources']['patterns']
 
         self.DIR_PATTERN = self.DIR_PATTERN.joinpath(_pattern_paths_cfg['path'])
 
+        self.PATH_PATTERN_INDEX = self.DIR_PATTERN.joinpath(_pattern_paths_cfg['index'])
+
 
 config = Config()
 
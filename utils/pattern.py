@@ -1,70 +1,264 @@
 from pathlib import Path
 import numpy as np
-from utils.config import config
 
 
-def get_pattern() -> list:
-    """
-    Get all the .cells file stored in the path described by the configuration file.
-    :return: List of file name.
-    """
-    folder_path = config.DIR_PATTERN.glob('**/*')
-    lst = [str(f).replace(".cells", '').replace(str(config.DIR_PATTERN) + '/', "") for f in folder_path if f.is_file()
-           and f.suffix == ".cells"]
-    return lst
+# The formats of the pattern files, by file suffix.
+PLAINTEXT_SUFFIX = ".cells"
+RLE_SUFFIX = ".rle"
+PATTERN_SUFFIXES = (PLAINTEXT_SUFFIX, RLE_SUFFIX)
+# Rule written in the RLE header when no other rule is given.
+DEFAULT_RULE = "B3/S23"
+
+# Characters of the plaintext format.
+_PLAINTEXT_ALIVE = ord("O")
+_PLAINTEXT_DEAD = ord(".")
+# Tags of the RLE format: any other letter is an alive cell.
+_RLE_DEAD_TAGS = (ord("b"), ord("."))
+_RLE_END_OF_LINE = ord("$")
+# Maximum length of the lines of a RLE file.
+_RLE_LINE_LENGTH = 70
 
 
 def read_pattern(file_path: str) -> np.ndarray:
     """
-    Read pattern from a .cells file in plain text format.
+    Read pattern from a .cells file in plain text format or from a .rle file in run length encoded format.
+    The pattern is cropped to the bounding box of its alive cells.
     :param file_path: The file that contains the pattern.
-    :return: The numpy array that represents the requested pattern.
+    :return: The numpy array that represents the requested pattern, None if the file does not exist or is invalid.
     """
     file_path = Path(file_path)
     # Check if the example file exist.
     if not Path.is_file(file_path):
         return None
 
-    rows = 0
-    cols = 0
-    with open(file_path) as f:
-        for i, line in enumerate(f):
-            if line[0] != "!":
-                rows += 1
-                if len(line) > cols:
-                    # Exclude the end of line char from the column count.
-                    cols = len(line) - 1
+    data = file_path.read_bytes()
+    try:
+        if file_path.suffix.lower() == RLE_SUFFIX:
+            grid = parse_rle(data)
+        else:
+            grid = parse_plaintext(data)
+    except ValueError:
+        return None
+    return crop_pattern(grid)
 
-    grid = np.zeros((rows, cols), dtype=np.uint8)
 
-    skip_rows = 0
-    with open(file_path) as f:
-        for i, line in enumerate(f):
-            for k, c in enumerate(line):
-                if c == "!" and k == 0:
-                    skip_rows += 1
-                    break
-                elif c == "O":
-                    grid[i - skip_rows, k] = 1
+def save_pattern(file_path: str, grid_pattern: np.ndarray, rule: str = DEFAULT_RULE):
+    """
+    Write a pattern into a .rle file in run length encoded format or otherwise into a .cells file in plain text format.
+    Only the bounding box of the alive cells is saved.
+    :param file_path: The file into which save the pattern.
+    :param grid_pattern: Numpy array representing the grid state of the pattern.
+    :param rule: The rule of the pattern, written in the header of the .rle files.
+    """
+    file_path = Path(file_path)
+    grid_pattern = crop_pattern(grid_pattern)
+    if file_path.suffix.lower() == RLE_SUFFIX:
+        data = format_rle(grid_pattern, file_path.stem, rule)
+    else:
+        data = format_plaintext(grid_pattern)
+    file_path.write_bytes(data)
+
 
-    return grid
+def crop_pattern(grid_pattern: np.ndarray) -> np.ndarray:
+    """
+    Crop a pattern to the bounding box of its alive cells.
+    :param grid_pattern: Numpy array representing the pattern.
+    :return: The cropped pattern, a single dead cell if the pattern has no alive cells.
+    """
+    rows = np.flatnonzero(grid_pattern.any(axis=1))
+    if rows.size == 0:
+        return np.zeros((1, 1), np.uint8)
+    cols = np.flatnonzero(grid_pattern.any(axis=0))
+    return (grid_pattern[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1] != 0).astype(np.uint8)
 
 
-def save_pattern(file_path: str, grid_pattern: np.ndarray):
+def parse_plaintext(data: bytes) -> np.ndarray:
     """
-    Write a pattern into a .cells file in plain text format.
-    :param file_path: The file into which save the pattern.
-    :param grid_pattern: Numpy array representing the grid state of the pattern.
+    Parse a pattern in plain text format: one line per row, "O" for the alive cells and "." for the dead ones. The lines
+    that start with "!" are comments.
+    :param data: The content of the file.
+    :return: The numpy array that represents the pattern.
+    """
+    lines = [line.rstrip(b"\r") for line in data.split(b"\n") if not line.startswith(b"!")]
+    # Drop the empty lines after the last row.
+    while lines and not lines[-1]:
+        lines.pop()
+    if not lines:
+        return np.zeros((1, 1), np.uint8)
+
+    # Pad the lines to the same width, so that the whole text becomes a 2D array of characters.
+    cols = max(len(line) for line in lines)
+    chars = np.frombuffer(b"".join(line.ljust(cols, b".") for line in lines), np.uint8).reshape(len(lines), cols)
+    # Some files use "*" for the alive cells.
+    return ((chars == _PLAINTEXT_ALIVE) | (chars == ord("*"))).astype(np.uint8)
+
+
+def format_plaintext(grid_pattern: np.ndarray) -> bytes:
+    """
+    Format a pattern in plain text format.
+    :param grid_pattern: Numpy array representing the pattern.
+    :return: The content of the file.
+    """
+    rows, cols = grid_pattern.shape
+    chars = np.full((rows, cols + 1), ord("\n"), np.uint8)
+    chars[:, :cols] = np.where(grid_pattern != 0, _PLAINTEXT_ALIVE, _PLAINTEXT_DEAD)
+    return chars.tobytes()
+
+
+def parse_rle(data: bytes) -> np.ndarray:
+    """
+    Parse a pattern in run length encoded format: a "x = columns, y = rows" header line followed by runs of cells,
+    like "3o2b$", ended by "!". The lines that start with "#" are comments.
+    :param data: The content of the file.
+    :return: The numpy array that represents the pattern.
+    """
+    lines = [line.strip() for line in data.split(b"\n")]
+    lines = [line for line in lines if line and not line.startswith(b"#")]
+    if not lines or not lines[0].startswith(b"x"):
+        raise ValueError("Missing RLE header")
+
+    header = dict(item.split(b"=", 1) for item in lines[0].replace(b" ", b"").split(b",") if b"=" in item)
+    try:
+        rows, cols = int(header.get(b"y", 0)), int(header.get(b"x", 0))
+    except ValueError:
+        raise ValueError("Invalid RLE header")
+    body = b"".join(lines[1:]).split(b"!", 1)[0].translate(None, b" \t\r")
+
+    chars = np.frombuffer(body, np.uint8)
+    is_digit = (chars >= ord("0")) & (chars <= ord("9"))
+    tag_pos = np.flatnonzero(~is_digit)
+    tags = chars[tag_pos]
+
+    # The run count of a tag is made by the digits before it: each digit is weighted by its distance to the tag, then
+    # the weights are summed by difference of cumulative sums. A tag without digits counts once.
+    digit_pos = np.flatnonzero(is_digit)
+    tag_of_digit = np.searchsorted(tag_pos, digit_pos)
+    if tag_of_digit.size and tag_of_digit[-1] == tag_pos.size:
+        raise ValueError("RLE run count without tag")
+    values = np.zeros(chars.size, np.int64)
+    values[digit_pos] = (chars[digit_pos] - ord("0")) * 10 ** (tag_pos[tag_of_digit] - digit_pos - 1)
+    counts = np.diff(np.cumsum(values)[tag_pos], prepend=0)
+    counts[counts == 0] = 1
+
+    # The row of each tag is given by the end of lines before it, and its column by the cells since the last end of line.
+    end_of_line = tags == _RLE_END_OF_LINE
+    row = np.cumsum(np.where(end_of_line, counts, 0)) - np.where(end_of_line, counts, 0)
+    cells = np.where(end_of_line, 0, counts)
+    cells_before = np.cumsum(cells) - cells
+    line_start = np.maximum.accumulate(np.where(end_of_line, cells_before + cells, 0))
+    col = cells_before - line_start
+
+    alive = ~end_of_line & ~np.isin(tags, _RLE_DEAD_TAGS)
+    row, col, counts = row[alive], col[alive], counts[alive]
+    if row.size:
+        rows = max(rows, int(row[-1]) + 1)
+        cols = max(cols, int((col + counts).max()))
+    if rows == 0 or cols == 0:
+        return np.zeros((1, 1), np.uint8)
+
+    # Mark the start and the end of each run of alive cells, then fill the runs with a cumulative sum.
+    size = rows * (cols + 1)
+    start = row * (cols + 1) + col
+    marks = np.bincount(start, minlength=size + 1) - np.bincount(start + counts, minlength=size + 1)
+    return (np.cumsum(marks[:-1]).reshape(rows, cols + 1)[:, :cols] > 0).astype(np.uint8)
+
+
+def format_rle(grid_pattern: np.ndarray, name: str = None, rule: str = DEFAULT_RULE) -> bytes:
     """
+    Format a pattern in run length encoded format.
+    :param grid_pattern: Numpy array representing the pattern.
+    :param name: The name of the pattern written in the header, None to omit it.
+    :param rule: The rule of the pattern written in the header.
+    :return: The content of the file.
+    """
+    rows, cols = grid_pattern.shape
+    cells = (grid_pattern != 0).ravel()
+
+    # A run starts at the beginning of each row and at each change of state.
+    boundary = np.ones(cells.size, bool)
+    boundary[1:] = cells[1:] != cells[:-1]
+    boundary[::cols] = True
+    run_start = np.flatnonzero(boundary)
+    run_length = np.diff(run_start, append=cells.size)
+    run_alive = cells[run_start]
+    run_row = run_start // cols
+
+    # The dead runs at the end of the rows are implicit.
+    keep = run_alive | ((run_start + run_length) % cols != 0)
+    run_length, run_alive, run_row = run_length[keep], run_alive[keep], run_row[keep]
+    # The end of lines before a run skip the empty rows.
+    row_skip = np.diff(run_row, prepend=0)
+
+    # Each token is made by the end of lines and the run, like "2$3o". The counts of 1 are implicit.
+    skip_digits = np.where(row_skip > 1, _count_digits(row_skip), 0)
+    length_digits = np.where(run_length > 1, _count_digits(run_length), 0)
+    token_length = skip_digits + (row_skip > 0) + length_digits + 1
+
+    # Split the tokens into lines of limited length: a line holds the tokens that start in a fixed size slot of the
+    # stream, which is small enough to contain the longest token.
+    token_start = np.cumsum(token_length) - token_length
+    slot = _RLE_LINE_LENGTH + 1 - (int(token_length.max()) if token_length.size else 1)
+    new_line = np.diff(token_start // slot, prepend=0) > 0
+    token_start += np.cumsum(new_line)
+
+    size = int(token_start[-1] + token_length[-1]) if token_length.size else 0
+    body = np.empty(size + 2, np.uint8)
+    body[token_start[new_line] - 1] = ord("\n")
+    _write_counts(body, token_start, row_skip, skip_digits)
+    body[(token_start + skip_digits)[row_skip > 0]] = _RLE_END_OF_LINE
+    _write_counts(body, token_start + skip_digits + (row_skip > 0), run_length, length_digits)
+    body[token_start + token_length - 1] = np.where(run_alive, ord("o"), ord("b"))
+    body[-2:] = (ord("!"), ord("\n"))
 
-    # Transform the grid into a list of string lines.
-    lines = []
-    for row in range(len(grid_pattern)):
-        line = ["." if cell == 0 else "O" for cell in grid_pattern[row]]
-        line_str = "".join(line) + "\n"
-        lines.append(line_str)
+    header = [f"#N {name}"] if name else []
+    header.append(f"x = {cols}, y = {rows}, rule = {rule}")
+    return ("\n".join(header) + "\n").encode() + body.tobytes()
 
-    with open(file_path, "w") as f:
-        f.writelines(lines)
 
+def _count_digits(values: np.ndarray) -> np.ndarray:
+    """
+    :param values: Positive integers.
+    :return: The number of decimal digits of each integer.
+    """
+    digits = np.ones(values.shape, np.int64)
+    power = 10
+    while True:
+        more = values >= power
+        if not more.any():
+            return digits
+        digits += more
+        power *= 10
+
+
+def _write_counts(body: np.ndarray, start: np.ndarray, values: np.ndarray, digits: np.ndarray):
+    """
+    Write integers as decimal text.
+    :param body: The characters into which write the integers.
+    :param start: The position of the first digit of each integer.
+    :param values: The integers.
+    :param digits: The number of digits of each integer, 0 to skip it.
+    """
+    # Index of each digit in its integer, from the most significant.
+    index = np.arange(int(digits.sum())) - np.repeat(np.cumsum(digits) - digits, digits)
+    weight = 10 ** (np.repeat(digits, digits) - 1 - index)
+    body[np.repeat(start, digits) + index] = np.repeat(values, digits) // weight % 10 + ord("0")
+
+
+def place_pattern(grid_pattern: np.ndarray, grid_size: tuple) -> np.ndarray:
+    """
+    Copy a pattern at the center of a blank grid.
+    :param grid_pattern: Numpy array representing the pattern.
+    :param grid_size: The size of the grid as (rows, columns).
+    :return: The grid containing the pattern, None if the pattern does not fit the grid.
+    """
+    grid_height, grid_width = grid_size
+    pattern_height, pattern_width = grid_pattern.shape
+
+    if pattern_height > grid_height or pattern_width > grid_width:
+        return None
 
+    new_grid = np.zeros(grid_size, np.uint8)
+    v_margin = (grid_height - pattern_height) // 2
+    h_margin = (grid_width - pattern_width) // 2
+    new_grid[v_margin:v_margin + pattern_height, h_margin:h_margin + pattern_width] = grid_pattern
+    return new_grid
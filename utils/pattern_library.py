@@ -0,0 +1,202 @@
+import base64
+import json
+import os
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from utils import pattern
+from utils.config import config
+
+# Version of the index format: an index with a different version is rebuilt.
+INDEX_VERSION = 1
+# Maximum side of the thumbnails, in pixels.
+THUMBNAIL_SIZE = 32
+
+# Information about a pattern of the library, available without parsing its file.
+PatternInfo = namedtuple("PatternInfo", ["name", "path", "rows", "cols", "population"])
+
+
+class PatternLibrary:
+    """
+    Class that manages the patterns stored in a folder.
+    The names, the sizes, the populations and the thumbnails of the patterns are kept in an index file, so that they
+    are known without parsing the pattern files. An entry of the index is rebuilt only when the modification time or
+    the size of its file change. The parsed patterns are kept in a least recently used cache.
+    """
+
+    def __init__(self, directory: Path, index_path: Path, cache_size: int):
+        self._directory = Path(directory)
+        self._index_path = Path(index_path)
+        self._cache_size = cache_size
+        # The index entries by pattern name, loaded on the first access.
+        self._entries = None
+        # The parsed patterns by name, from the least to the most recently used.
+        self._cache = OrderedDict()
+
+    def get_names(self) -> list:
+        """
+        :return: The names of the patterns, sorted alphabetically.
+        """
+        return sorted(self._get_entries())
+
+    def get_info(self, name: str) -> PatternInfo:
+        """
+        :param name: The name of the pattern.
+        :return: The information about the pattern, None if there is no such pattern.
+        """
+        entry = self._get_entries().get(name)
+        if entry is None:
+            return None
+        return PatternInfo(name, self._directory / entry["file"], entry["rows"], entry["cols"], entry["population"])
+
+    def get_thumbnail(self, name: str) -> np.ndarray:
+        """
+        :param name: The name of the pattern.
+        :return: A reduced image of the pattern, where a pixel is 1 if any cell of its block is alive. None if there is
+        no such pattern.
+        """
+        entry = self._get_entries().get(name)
+        if entry is None:
+            return None
+        rows, cols, data = entry["thumbnail"]
+        bits = np.frombuffer(base64.b64decode(data), np.uint8)
+        return np.unpackbits(bits, count=rows * cols).reshape(rows, cols)
+
+    def get_pattern(self, name: str) -> np.ndarray:
+        """
+        Get a parsed pattern. The file is parsed only if the pattern is not in the cache.
+        :param name: The name of the pattern.
+        :return: The read-only numpy array that represents the pattern, None if there is no such pattern or its file is
+        invalid.
+        """
+        grid_pattern = self._cache.get(name)
+        if grid_pattern is not None:
+            self._cache.move_to_end(name)
+            return grid_pattern
+
+        info = self.get_info(name)
+        if info is None:
+            return None
+        grid_pattern = pattern.read_pattern(info.path)
+        if grid_pattern is None:
+            return None
+        self._add_to_cache(name, grid_pattern)
+        return grid_pattern
+
+    def refresh(self) -> None:
+        """
+        Update the index with the files added, changed or removed since it was last saved.
+        """
+        stored = self._load_index()
+        # Drop the parsed patterns, since their files may have changed.
+        self._cache.clear()
+        entries = {}
+        changed = False
+        for file_path in self._scan():
+            file = file_path.relative_to(self._directory).as_posix()
+            name = file_path.relative_to(self._directory).with_suffix("").as_posix()
+            # A pattern saved with more formats is listed once.
+            if name in entries:
+                continue
+            stat = file_path.stat()
+            entry = stored.get(name)
+            if entry is None or entry["file"] != file or entry["mtime"] != stat.st_mtime_ns or \
+                    entry["size"] != stat.st_size:
+                entry = self._build_entry(name, file_path, file, stat)
+                changed = True
+            if entry is not None:
+                entries[name] = entry
+        changed = changed or entries.keys() != stored.keys()
+
+        self._entries = entries
+        if changed:
+            self._save_index()
+
+    def _get_entries(self) -> dict:
+        if self._entries is None:
+            self.refresh()
+        return self._entries
+
+    def _scan(self) -> list:
+        """
+        :return: The paths of the pattern files in the folder and in its sub folders, in the order of preference of
+        their formats.
+        """
+        files = []
+        folders = [self._directory]
+        while folders:
+            try:
+                with os.scandir(folders.pop()) as it:
+                    for item in it:
+                        if item.is_dir():
+                            folders.append(item.path)
+                        elif os.path.splitext(item.name)[1] in pattern.PATTERN_SUFFIXES:
+                            files.append(Path(item.path))
+            except OSError:
+                continue
+        return sorted(files, key=lambda f: pattern.PATTERN_SUFFIXES.index(f.suffix))
+
+    def _build_entry(self, name: str, file_path: Path, file: str, stat: os.stat_result) -> dict:
+        """
+        Parse a pattern file to build its index entry. The parsed pattern is cached, since it's likely to be used soon.
+        :return: The entry, None if the file is invalid.
+        """
+        grid_pattern = pattern.read_pattern(file_path)
+        if grid_pattern is None:
+            return None
+        self._add_to_cache(name, grid_pattern)
+
+        thumbnail = _make_thumbnail(grid_pattern)
+        data = base64.b64encode(np.packbits(thumbnail).tobytes()).decode("ascii")
+        return {"file": file, "mtime": stat.st_mtime_ns, "size": stat.st_size,
+                "rows": grid_pattern.shape[0], "cols": grid_pattern.shape[1],
+                "population": int(np.count_nonzero(grid_pattern)),
+                "thumbnail": [thumbnail.shape[0], thumbnail.shape[1], data]}
+
+    def _add_to_cache(self, name: str, grid_pattern: np.ndarray) -> None:
+        # The cached patterns are shared, so they can't be modified.
+        grid_pattern.flags.writeable = False
+        self._cache[name] = grid_pattern
+        self._cache.move_to_end(name)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def _load_index(self) -> dict:
+        """
+        :return: The entries of the saved index, empty if the index is missing, invalid or of an older version.
+        """
+        try:
+            with open(self._index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+            return {}
+        return index.get("patterns", {})
+
+    def _save_index(self) -> None:
+        # The index is only an optimisation: if the folder is read-only, it's rebuilt at every start.
+        try:
+            with open(self._index_path, "w") as f:
+                json.dump({"version": INDEX_VERSION, "patterns": self._entries}, f)
+        except OSError:
+            pass
+
+
+def _make_thumbnail(grid_pattern: np.ndarray) -> np.ndarray:
+    """
+    Reduce a pattern to at most THUMBNAIL_SIZE pixels per side. A pixel is 1 if any cell of its block is alive.
+    :param grid_pattern: Numpy array representing the pattern.
+    :return: The thumbnail.
+    """
+    rows, cols = grid_pattern.shape
+    block = max(1, -(-max(rows, cols) // THUMBNAIL_SIZE))
+    thumb_rows, thumb_cols = -(-rows // block), -(-cols // block)
+    padded = np.zeros((thumb_rows * block, thumb_cols * block), np.uint8)
+    padded[:rows, :cols] = grid_pattern != 0
+    return padded.reshape(thumb_rows, block, thumb_cols, block).max(axis=(1, 3))
+
+
+library = PatternLibrary(config.DIR_PATTERN, config.PATH_PATTERN_INDEX, config.PATTERN_CACHE_SIZE)
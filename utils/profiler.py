@@ -0,0 +1,224 @@
+import cProfile
+import csv
+import pstats
+import threading
+import time
+from array import array
+from collections import deque
+from contextlib import contextmanager
+
+from utils.config import config
+
+# The phases of a frame, in the order in which they happen: the generations computed by the engine, the cycle
+# detection, the recording, the copy of the grid and of its statistics, the notification of the observers, the update
+# of the grid image, its scaling to the widget size and the paint of the widget.
+PHASES = ("step", "cycles", "record", "copy", "stats", "notify", "render", "scale", "paint")
+
+
+class PhaseTimer:
+    """
+    Class that measures the time spent in each phase of the simulation, from the step of the engine to the paint of the
+    grid, and keeps the rolling average of the recent measures.
+    The phases can be nested: the time of a phase doesn't include the time of the phases measured inside it, so that
+    the times of the phases add up to the time of a frame. The phases can be measured by different threads.
+    While recording, every measure is kept, to be exported as CSV at the end of a profiling session.
+    """
+
+    def __init__(self, window: int, enabled: bool = False):
+        # The number of recent measures averaged for each phase.
+        self._window = max(window, 1)
+        # Flag that indicates if the phases are measured. When they are not, measuring a phase costs nothing.
+        self._enabled = enabled
+        # The recent durations in seconds of each phase, and the recent times of each event.
+        self._durations = {phase: deque(maxlen=self._window) for phase in PHASES}
+        self._ticks = {}
+        # The recorded measures as (phase index, start, duration), stored in arrays to keep long sessions small. The
+        # start is in seconds since the recording started. None if the measures are not recorded.
+        self._recording_start = None
+        self._phase_names = []
+        self._sample_phases = array("H")
+        self._sample_starts = array("d")
+        self._sample_durations = array("d")
+        # The times of the nested phases measured by each thread.
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def is_enabled(self) -> bool:
+        return self._enabled
+
+    def set_enabled(self, value: bool) -> None:
+        self._enabled = value
+
+    def start_recording(self) -> None:
+        """
+        Keep every measure from now on, to export them with export_csv.
+        """
+        with self._lock:
+            self._recording_start = time.perf_counter()
+            self._phase_names = []
+            self._sample_phases = array("H")
+            self._sample_starts = array("d")
+            self._sample_durations = array("d")
+
+    @contextmanager
+    def measure(self, phase: str):
+        """
+        Context manager that measures the time spent in a phase.
+        :param phase: The name of the phase.
+        """
+        if not self._enabled:
+            yield
+            return
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        # The time of the phases nested in this one, which is not part of it.
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self._add_sample(phase, start, elapsed - nested)
+
+    def tick(self, event: str) -> None:
+        """
+        Count an event, e.g. a frame shown, to measure its rate. While recording, it's exported as a measure of zero
+        duration.
+        :param event: The name of the event.
+        """
+        if not self._enabled:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            ticks = self._ticks.get(event)
+            if ticks is None:
+                ticks = self._ticks[event] = deque(maxlen=self._window)
+            ticks.append(now)
+        self._add_sample(event, now, 0.0, False)
+
+    def get_averages(self) -> dict:
+        """
+        :return: The average duration in milliseconds of the recent measures of each phase, for the phases measured,
+        in the order of PHASES.
+        """
+        with self._lock:
+            return {phase: sum(durations) * 1000 / len(durations)
+                    for phase, durations in self._durations.items() if durations}
+
+    def get_rate(self, event: str) -> float:
+        """
+        :param event: The name of the event.
+        :return: The number of events per second, measured on the recent events. 0 if it's not known.
+        """
+        with self._lock:
+            ticks = self._ticks.get(event)
+            if ticks is None or len(ticks) < 2 or ticks[-1] == ticks[0]:
+                return 0.0
+            return (len(ticks) - 1) / (ticks[-1] - ticks[0])
+
+    def clear(self) -> None:
+        """
+        Forget the recent measures, e.g. when the simulation restarts, without stopping the recording.
+        """
+        with self._lock:
+            for durations in self._durations.values():
+                durations.clear()
+            self._ticks.clear()
+
+    def export_csv(self, file_path: str) -> int:
+        """
+        Write the recorded measures in a CSV file, one row per measure with the phase, its start in seconds since the
+        recording started and its duration in milliseconds.
+        :param file_path: The CSV file.
+        :return: The number of measures written.
+        """
+        with self._lock:
+            with open(file_path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["phase", "start_s", "duration_ms"])
+                for phase, start, duration in zip(self._sample_phases, self._sample_starts, self._sample_durations):
+                    writer.writerow([self._phase_names[phase], f"{start:.6f}", f"{duration * 1000:.4f}"])
+            return len(self._sample_phases)
+
+    def _add_sample(self, phase: str, start: float, duration: float, average: bool = True) -> None:
+        with self._lock:
+            if average:
+                durations = self._durations.get(phase)
+                if durations is None:
+                    durations = self._durations[phase] = deque(maxlen=self._window)
+                durations.append(duration)
+            if self._recording_start is not None:
+                if phase not in self._phase_names:
+                    self._phase_names.append(phase)
+                self._sample_phases.append(self._phase_names.index(phase))
+                self._sample_starts.append(start - self._recording_start)
+                self._sample_durations.append(duration)
+
+
+class SessionProfiler:
+    """
+    Class that profiles a whole session with cProfile, including the threads that opt in with profile_thread, and
+    records the measures of the phase timer.
+    """
+
+    def __init__(self, phase_timer: PhaseTimer):
+        self._timer = phase_timer
+        # The profiler of the main thread, None if the session is not profiled.
+        self._profile = None
+        # The profiles of the other threads, collected when they end.
+        self._thread_profiles = []
+        self._lock = threading.Lock()
+
+    def is_active(self) -> bool:
+        return self._profile is not None
+
+    def start(self) -> None:
+        """
+        Start profiling the calling thread and recording the phases.
+        """
+        self._timer.set_enabled(True)
+        self._timer.start_recording()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    @contextmanager
+    def profile_thread(self):
+        """
+        Context manager that profiles the code of a thread other than the main one, if the session is profiled.
+        """
+        if self._profile is None:
+            yield
+            return
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._thread_profiles.append(profile)
+
+    def stop(self, file_prefix: str) -> tuple:
+        """
+        Stop profiling and write the results: the cProfile statistics of all the threads, readable with pstats or
+        snakeviz, in <file_prefix>.prof and the phase measures in <file_prefix>.csv.
+        :param file_prefix: The path of the files without suffix.
+        :return: The paths of the statistics file and of the CSV file.
+        """
+        self._profile.disable()
+        with self._lock:
+            stats = pstats.Stats(self._profile, *self._thread_profiles)
+            self._thread_profiles = []
+        self._profile = None
+        stats_path, csv_path = file_prefix + ".prof", file_prefix + ".csv"
+        stats.dump_stats(stats_path)
+        self._timer.export_csv(csv_path)
+        return stats_path, csv_path
+
+
+timer = PhaseTimer(config.TIMING_WINDOW, config.SHOW_TIMINGS)
+session_profiler = SessionProfiler(timer)
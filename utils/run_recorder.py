@@ -0,0 +1,323 @@
+import struct
+import threading
+import zlib
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+from engine.gol_engine import age_cells
+from engine.rules import CONWAY, Rule
+
+# Kinds of the encoded differences between two generations.
+_DIFF_INDICES = b"i"
+_DIFF_BITPLANE = b"b"
+
+
+class _Segment:
+    """
+    A keyframe with the differences of the following generations.
+    The parts are the compressed age grid of the keyframe followed by the encoded differences. They are None when the
+    segment was spilled to the file, where it's stored at the given offset.
+    """
+
+    __slots__ = ("start", "count", "parts", "size", "offset", "length")
+
+    def __init__(self, start: int, keyframe: bytes):
+        # The generation of the keyframe and the number of generations of the segment, keyframe included.
+        self.start = start
+        self.count = 1
+        self.parts = [keyframe]
+        self.size = len(keyframe)
+        self.offset = None
+        self.length = 0
+
+    def get_last(self) -> int:
+        return self.start + self.count - 1
+
+
+class RunRecorder:
+    """
+    Class that records the generations of a run to replay or rewind it.
+    Every keyframe_interval generations a keyframe holds the whole age grid, compressed. The other generations hold only
+    the cells that changed state: either their indices or the XOR of the alive cells, compressed, whichever is smaller.
+    The ages are not stored, since they are computed again from the alive cells while decoding. With a Generations rule
+    the decay states can't be computed again, so the changed cells are stored with their new state.
+    The segments are kept in memory up to a budget, then the oldest ones are spilled to a file. The file is used as a
+    ring buffer: when it's full, the oldest segments are overwritten and dropped from the recording.
+    The recording covers a range of consecutive generations. A generation that does not follow the last one starts a
+    new recording, and a generation that follows a recorded one, e.g. after a rewind, replaces the recording after it.
+    """
+
+    def __init__(self, keyframe_interval: int, memory_mb: int, file_path: str, disk_mb: int, rule: Rule = CONWAY):
+        # Flag that indicates if the cells have more states than dead and alive, stored as they are.
+        self._multistate = rule.is_generations()
+        self._keyframe_interval = max(keyframe_interval, 1)
+        self._memory_budget = memory_mb * 1024 * 1024
+        self._file_path = Path(file_path)
+        self._disk_budget = disk_mb * 1024 * 1024
+        # The segments from the oldest to the current one, which receives the new generations.
+        self._segments = deque()
+        # The bytes of the segments kept in memory.
+        self._memory = 0
+        # The spill file, opened on the first spill, and the position of the next write.
+        self._file = None
+        self._file_pos = 0
+        # The shape of the recorded grids and the states of the cells of the last recorded generation: the alive cells,
+        # or the whole grid for the multistate rules.
+        self._shape = None
+        self._last_state = None
+        # The recorder is fed by the simulation thread and read by the GUI.
+        self._lock = threading.RLock()
+
+    def get_range(self) -> tuple:
+        """
+        :return: The first and the last recorded generations, None if nothing is recorded.
+        """
+        with self._lock:
+            if not self._segments:
+                return None
+            return self._segments[0].start, self._segments[-1].get_last()
+
+    def get_memory_size(self) -> int:
+        """
+        :return: The bytes of the recording kept in memory.
+        """
+        return self._memory
+
+    def clear(self) -> None:
+        with self._lock:
+            self._segments.clear()
+            self._memory = 0
+            self._file_pos = 0
+            self._shape = None
+            self._last_state = None
+
+    def set_rule(self, rule: Rule) -> None:
+        """
+        Change the rule of the recorded generations. The recording is cleared if the states of the cells change.
+        :param rule: The rule.
+        """
+        with self._lock:
+            if rule.is_generations() != self._multistate:
+                self.clear()
+                self._multistate = rule.is_generations()
+
+    def close(self) -> None:
+        """
+        Clear the recording and delete the spill file.
+        """
+        with self._lock:
+            self.clear()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                if self._file_path.exists():
+                    self._file_path.unlink()
+
+    def record(self, grid: np.ndarray, generation: int) -> None:
+        """
+        Record a generation.
+        :param grid: The age grid.
+        :param generation: The generation of the grid.
+        """
+        with self._lock:
+            state = self._get_state(grid)
+            if self._segments:
+                first, last = self.get_range()
+                # The same generation recorded again, e.g. when the simulation is paused.
+                if generation == last and grid.shape == self._shape and np.array_equal(state, self._last_state):
+                    return
+                # The generation replaces a recorded one: drop the recording after its previous generation.
+                if first <= generation - 1 < last:
+                    self._truncate(generation - 1)
+                elif generation <= last:
+                    self.clear()
+
+            if not self._segments or generation != self._segments[-1].get_last() + 1 or grid.shape != self._shape:
+                self.clear()
+                self._shape = grid.shape
+                self._start_segment(grid, generation)
+            elif self._segments[-1].count >= self._keyframe_interval:
+                self._start_segment(grid, generation)
+            else:
+                segment = self._segments[-1]
+                changed = state != self._last_state
+                diff = _encode_diff(changed, state[changed] if self._multistate else None)
+                segment.parts.append(diff)
+                segment.count += 1
+                segment.size += len(diff)
+                self._memory += len(diff)
+            self._last_state = state
+            self._enforce_budget()
+
+    def get_grid(self, generation: int) -> np.ndarray:
+        """
+        Decode a recorded generation, starting from the nearest keyframe before it.
+        :param generation: The generation.
+        :return: The age grid, None if the generation is not recorded.
+        """
+        with self._lock:
+            segment = self._find_segment(generation)
+            if segment is None:
+                return None
+            return self._decode(segment, self._load_parts(segment), generation)
+
+    def _find_segment(self, generation: int) -> _Segment:
+        if not self._segments or not self._segments[0].start <= generation <= self._segments[-1].get_last():
+            return None
+        # The segments are sorted by generation: bisect them.
+        low, high = 0, len(self._segments) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._segments[middle].start <= generation:
+                low = middle
+            else:
+                high = middle - 1
+        return self._segments[low]
+
+    def _get_state(self, grid: np.ndarray) -> np.ndarray:
+        return np.array(grid, np.uint8) if self._multistate else grid != 0
+
+    def _decode(self, segment: _Segment, parts: list, generation: int) -> np.ndarray:
+        ages = np.frombuffer(zlib.decompress(parts[0]), np.uint8).reshape(self._shape).copy()
+        alive = ages != 0
+        for diff in parts[1:generation - segment.start + 1]:
+            changed, values = _decode_diff(diff, self._shape, self._multistate)
+            if self._multistate:
+                ages[changed] = values
+            else:
+                alive ^= changed
+                ages = age_cells(ages, alive)
+        return ages
+
+    def _start_segment(self, grid: np.ndarray, generation: int) -> None:
+        keyframe = zlib.compress(np.ascontiguousarray(grid, np.uint8).tobytes(), 1)
+        self._segments.append(_Segment(generation, keyframe))
+        self._memory += len(keyframe)
+
+    def _truncate(self, generation: int) -> None:
+        """
+        Drop the generations recorded after the given one, which becomes the last one.
+        """
+        while self._segments[-1].start > generation:
+            self._drop(self._segments.pop())
+        segment = self._segments[-1]
+        parts = self._load_parts(segment)[:generation - segment.start + 1]
+        self._last_state = self._get_state(self._decode(segment, parts, generation))
+        # The segment is back in memory, since it receives the next generations.
+        self._drop(segment)
+        segment.parts = parts
+        segment.count = len(parts)
+        segment.size = sum(len(part) for part in parts)
+        segment.offset = None
+        self._memory += segment.size
+
+    def _drop(self, segment: _Segment) -> None:
+        if segment.parts is not None:
+            self._memory -= segment.size
+
+    def _enforce_budget(self) -> None:
+        """
+        Spill the oldest segments held in memory to the file, or drop them if there is no room on disk, until the
+        memory is within the budget. The current segment is never spilled.
+        """
+        index = 0
+        while self._memory > self._memory_budget and index < len(self._segments) - 1:
+            segment = self._segments[index]
+            index += 1
+            if segment.parts is None:
+                continue
+            blob = _pack_parts(segment.parts)
+            self._memory -= segment.size
+            segment.parts = None
+            if len(blob) > self._disk_budget:
+                # No room on disk: drop the segments up to this one.
+                for _ in range(index):
+                    self._drop(self._segments.popleft())
+                index = 0
+            else:
+                index -= self._spill(segment, blob)
+
+    def _spill(self, segment: _Segment, blob: bytes) -> int:
+        """
+        Write a segment into the file, wrapping to its start when it's full. The segments overwritten are dropped.
+        :return: The number of segments dropped.
+        """
+        if self._file is None:
+            self._file = open(self._file_path, "w+b")
+        if self._file_pos + len(blob) > self._disk_budget:
+            self._file_pos = 0
+        start, end = self._file_pos, self._file_pos + len(blob)
+
+        # The overwritten segments are the oldest ones: drop all the segments up to the last one overwritten.
+        overwritten = [i for i, other in enumerate(self._segments)
+                       if other.parts is None and other.offset is not None and other is not segment and
+                       other.offset < end and start < other.offset + other.length]
+        dropped = overwritten[-1] + 1 if overwritten else 0
+        for _ in range(dropped):
+            self._drop(self._segments.popleft())
+
+        self._file.seek(start)
+        self._file.write(blob)
+        segment.offset, segment.length = start, len(blob)
+        self._file_pos = end
+        return dropped
+
+    def _load_parts(self, segment: _Segment) -> list:
+        if segment.parts is not None:
+            return segment.parts
+        self._file.seek(segment.offset)
+        return _unpack_parts(self._file.read(segment.length))
+
+
+def _encode_diff(changed: np.ndarray, values: np.ndarray = None) -> bytes:
+    """
+    Encode the cells that changed state between two generations.
+    :param changed: The boolean grid of the changed cells.
+    :param values: The new states of the changed cells, None if they are only toggled between dead and alive.
+    :return: The indices of the changed cells, or the compressed bitplane of the changed cells if it's smaller, followed
+    by their new states.
+    """
+    values = values.tobytes() if values is not None else b""
+    indices = np.flatnonzero(changed).astype(np.uint32)
+    bitplane = np.packbits(changed)
+    if indices.nbytes <= bitplane.nbytes // 4:
+        return _DIFF_INDICES + indices.tobytes() + values
+    return _DIFF_BITPLANE + zlib.compress(bitplane.tobytes() + values, 1)
+
+
+def _decode_diff(diff: bytes, shape: tuple, multistate: bool) -> tuple:
+    """
+    :return: The boolean grid of the cells that changed state, and their new states if the cells are multistate,
+    otherwise None.
+    """
+    size = shape[0] * shape[1]
+    if diff[:1] == _DIFF_INDICES:
+        # Each changed cell has a 4 bytes index, and a 1 byte state if the cells are multistate.
+        count = (len(diff) - 1) // (5 if multistate else 4)
+        indices = np.frombuffer(diff, np.uint32, count, offset=1)
+        changed = np.zeros(size, bool)
+        changed[indices] = True
+        # The states follow the order of the indices, which are sorted.
+        values = np.frombuffer(diff, np.uint8, offset=1 + 4 * count) if multistate else None
+    else:
+        data = zlib.decompress(diff[1:])
+        planes = -(-size // 8)
+        changed = np.unpackbits(np.frombuffer(data, np.uint8, planes), count=size).astype(bool)
+        values = np.frombuffer(data, np.uint8, offset=planes) if multistate else None
+    return changed.reshape(shape), values
+
+
+def _pack_parts(parts: list) -> bytes:
+    return b"".join(struct.pack("<I", len(part)) + part for part in parts)
+
+
+def _unpack_parts(blob: bytes) -> list:
+    parts = []
+    pos = 0
+    while pos < len(blob):
+        length, = struct.unpack_from("<I", blob, pos)
+        parts.append(blob[pos + 4:pos + 4 + length])
+        pos += 4 + length
+    return parts
@@ -27,3 +27,31 @@ def np_to_qimage(np_array: np.ndarray, show_age: bool) -> QImage:
         image.setColorTable(colors.BW_COLOR_TABLE)
 
     return image
+
+
+def create_grid_image(shape: tuple) -> QImage:
+    """
+    Create an indexed image that owns its pixels, to be used as the image of the visible window of a grid.
+    :param shape: The shape of the visible window as (rows, columns).
+    :return: The blank QImage.
+    """
+    height, width = shape
+    image = QImage(width, height, QImage.Format_Indexed8)
+    image.setColorTable(colors.BW_COLOR_TABLE)
+    image.fill(0)
+    return image
+
+
+def qimage_to_np_view(image: QImage) -> np.ndarray:
+    """
+    Function to get a writable np.ndarray view of the pixels of an indexed QImage, without copying them
+    :param image: The Format_Indexed8 image.
+    :return: The uint8 array of shape (height, width) that shares the memory of the image.
+    """
+    assert image.format() == QImage.Format_Indexed8
+
+    pixels = image.bits()
+    pixels.setsize(image.bytesPerLine() * image.height())
+    # Each line of the image is padded to a multiple of 4 bytes.
+    array = np.frombuffer(pixels, dtype=np.uint8).reshape(image.height(), image.bytesPerLine())
+    return array[:, :image.width()]